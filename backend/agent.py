@@ -0,0 +1,362 @@
+"""
+BabyPluto Security Scanner - Headless Agent
+Runs the scanners on a schedule without the API server
+
+Results go to a local SQLite database or NDJSON file. Run from the
+backend directory:
+
+    python agent.py --once --output ndjson:-
+    python agent.py --interval 900 --output sqlite:data/agent.db --nice 10 --ionice idle --max-cpu 25
+    python agent.py --interval 300 --output fleet:http://fleet.example:8000
+
+Exit codes: 0 clean, 1 findings at or above --fail-on, 2 usage error,
+3 scan or output error, 130 interrupted.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import signal
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import psutil
+
+from security.analyzer import generate_metrics, generate_alerts, calculate_security_score
+from security.fleet import FleetClient
+from security.governor import governor
+
+
+EXIT_CLEAN = 0
+EXIT_FINDINGS = 1
+EXIT_USAGE = 2
+EXIT_ERROR = 3
+EXIT_INTERRUPTED = 130
+
+SCANS = ('processes', 'ports', 'startup_items', 'file_integrity')
+SEVERITY_ORDER = {'low': 1, 'medium': 2, 'high': 3}
+
+
+class CpuBudget:
+    """
+    Keeps the agent's average CPU usage under a percentage of one core
+
+    throttle() is called between scan steps and sleeps long enough for
+    CPU time used since the start of the run to stay within budget.
+    """
+
+    def __init__(self, max_percent: Optional[float]):
+        self.max_percent = max_percent
+        self.throttled = 0.0
+        self.reset()
+
+    def reset(self):
+        """Start a new accounting window"""
+        self.cpu_start = time.process_time()
+        self.wall_start = time.monotonic()
+
+    def throttle(self, stop: threading.Event):
+        """Sleep off any CPU time used beyond the budget"""
+        if not self.max_percent:
+            return
+        cpu = time.process_time() - self.cpu_start
+        wall = time.monotonic() - self.wall_start
+        delay = cpu / (self.max_percent / 100) - wall
+        if delay > 0:
+            self.throttled += delay
+            stop.wait(delay)
+
+
+def lower_priority(nice: Optional[int], ionice: Optional[str]):
+    """
+    Lower the CPU and IO priority of this process
+
+    Args:
+        nice: Niceness increment (Unix) or any value for below-normal (Windows)
+        ionice: 'idle' or 'best-effort' (Linux and Windows)
+    """
+    proc = psutil.Process()
+
+    if nice:
+        try:
+            if hasattr(os, 'nice'):
+                os.nice(nice)
+            else:
+                proc.nice(psutil.BELOW_NORMAL_PRIORITY_CLASS)
+        except (OSError, psutil.Error) as e:
+            print(f"warning: could not lower CPU priority: {e}", file=sys.stderr)
+
+    if ionice:
+        try:
+            if hasattr(psutil, 'IOPRIO_CLASS_IDLE'):
+                proc.ionice(psutil.IOPRIO_CLASS_IDLE if ionice == 'idle' else psutil.IOPRIO_CLASS_BE, None if ionice == 'idle' else 7)
+            elif hasattr(psutil, 'IOPRIO_VERYLOW'):
+                proc.ionice(psutil.IOPRIO_VERYLOW if ionice == 'idle' else psutil.IOPRIO_LOW)
+            else:
+                print("warning: IO priority is not supported on this platform", file=sys.stderr)
+        except (OSError, psutil.Error, AttributeError) as e:
+            print(f"warning: could not lower IO priority: {e}", file=sys.stderr)
+
+
+def run_scan(scans: List[str], budget: CpuBudget, stop: threading.Event) -> Optional[Dict]:
+    """
+    Run the selected scanners once
+
+    Args:
+        scans: Sections to scan (others are reported empty)
+        budget: CPU budget applied between sections
+        stop: Set to abort between sections
+
+    Returns:
+        Result dictionary with sections, metrics, alerts and score, or
+        None if stopped before every selected section was scanned (a
+        partial result would report the skipped items as removed)
+    """
+    from security.processes import scan_processes
+    from security.ports import scan_open_ports
+    from security.startup import scan_startup_items
+    from security.integrity import scan_file_integrity, get_critical_files
+
+    scanners = {
+        'processes': lambda: scan_processes(include_hashes=True),
+        'ports': scan_open_ports,
+        'startup_items': scan_startup_items,
+        'file_integrity': lambda: scan_file_integrity(get_critical_files()),
+    }
+
+    started = time.time()
+    usage = governor.snapshot()
+    budget.reset()
+    sections = {section: [] for section in SCANS}
+    durations = {}
+
+    for section in scans:
+        if stop.is_set():
+            return None
+        section_start = time.perf_counter()
+        sections[section] = scanners[section]()
+        durations[section] = int((time.perf_counter() - section_start) * 1000)
+        budget.throttle(stop)
+
+    metrics = generate_metrics(sections['processes'], sections['ports'], sections['startup_items'], sections['file_integrity'])
+    alerts = generate_alerts(sections['processes'], sections['ports'], sections['startup_items'], sections['file_integrity'])
+
+    return {
+        'host': platform.node(),
+        'timestamp': int(started),
+        'scans': list(scans),
+        'scan_duration': int((time.time() - started) * 1000),
+        'section_durations': durations,
+        'throttled_ms': int(budget.throttled * 1000),
+        'budget': governor.report(since=usage),
+        'security_score': calculate_security_score(metrics),
+        'metrics': metrics,
+        'alerts': alerts,
+        **sections,
+    }
+
+
+class NdjsonWriter:
+    """Appends one JSON line per scan to a file or stdout ('-')"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def write(self, result: Dict):
+        line = json.dumps(result, separators=(',', ':')) + '\n'
+        if self.path == '-':
+            sys.stdout.write(line)
+            sys.stdout.flush()
+            return
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a') as f:
+            f.write(line)
+
+    def close(self):
+        pass
+
+
+class SqliteWriter:
+    """Stores one row per scan in an agent_scans table"""
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS agent_scans (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                scanned_at TIMESTAMP NOT NULL,
+                host TEXT,
+                scan_duration INTEGER,
+                security_score INTEGER,
+                alerts_count INTEGER,
+                metrics TEXT,
+                alerts TEXT,
+                result TEXT
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_agent_scans_time ON agent_scans (scanned_at)")
+        self.conn.commit()
+
+    def write(self, result: Dict):
+        self.conn.execute("""
+            INSERT INTO agent_scans
+            (scanned_at, host, scan_duration, security_score, alerts_count, metrics, alerts, result)
+            VALUES (datetime(?, 'unixepoch'), ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            result['timestamp'],
+            result['host'],
+            result['scan_duration'],
+            result['security_score'],
+            len(result['alerts']),
+            json.dumps(result['metrics']),
+            json.dumps(result['alerts']),
+            json.dumps(result)
+        ))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+class FleetWriter:
+    """Pushes each scan to a fleet server (deltas after the first push)"""
+
+    def __init__(self, url: str):
+        self.client = FleetClient(
+            url,
+            host_id=os.environ.get('AGENT_HOST_ID') or platform.node(),
+            token=os.environ.get('FLEET_TOKEN') or None
+        )
+
+    def write(self, result: Dict):
+        self.client.push(result)
+
+    def close(self):
+        pass
+
+
+def open_output(spec: str):
+    """
+    Build a writer from 'sqlite:<path>', 'ndjson:<path>' ('-' = stdout)
+    or 'fleet:<server url>'
+
+    Raises:
+        ValueError: For an unknown output kind
+    """
+    kind, _, path = spec.partition(':')
+    if kind == 'sqlite' and path:
+        return SqliteWriter(path)
+    if kind == 'ndjson' and path:
+        return NdjsonWriter(path)
+    if kind == 'fleet' and path.startswith(('http://', 'https://')):
+        return FleetWriter(path)
+    raise ValueError(f"Invalid output '{spec}' (expected sqlite:<path>, ndjson:<path|-> or fleet:<url>)")
+
+
+def exit_status(result: Dict, fail_on: str) -> int:
+    """EXIT_FINDINGS if any alert reaches the fail_on severity"""
+    if fail_on == 'never':
+        return EXIT_CLEAN
+    threshold = SEVERITY_ORDER[fail_on]
+    worst = max((SEVERITY_ORDER.get(alert['severity'], 0) for alert in result['alerts']), default=0)
+    return EXIT_FINDINGS if worst >= threshold else EXIT_CLEAN
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog='babypluto-agent',
+        description="Run BabyPluto scans on a schedule without the API server"
+    )
+    parser.add_argument('--once', action='store_true', help="Scan once and exit (default when --interval is 0)")
+    parser.add_argument('--interval', type=float, default=float(os.environ.get('AGENT_INTERVAL', 0)),
+                        help="Seconds between scans (0 = scan once)")
+    parser.add_argument('--jitter', type=float, default=0, help="Random extra delay in seconds added to each interval")
+    parser.add_argument('--scans', default=','.join(SCANS), help=f"Comma-separated sections ({', '.join(SCANS)})")
+    parser.add_argument('--output', default=os.environ.get('AGENT_OUTPUT', 'ndjson:-'),
+                        help="sqlite:<path>, ndjson:<path> ('ndjson:-' writes to stdout) or fleet:<server url>")
+    parser.add_argument('--nice', type=int, default=int(os.environ.get('AGENT_NICE', 10)),
+                        help="CPU niceness increment (0 to keep the current priority)")
+    parser.add_argument('--ionice', choices=['idle', 'best-effort', 'none'], default=os.environ.get('AGENT_IONICE', 'idle'),
+                        help="IO priority class")
+    parser.add_argument('--max-cpu', type=float, default=float(os.environ.get('AGENT_MAX_CPU', 0)) or None,
+                        help="Average CPU budget in percent of one core (sleeps between scan steps)")
+    parser.add_argument('--max-runs', type=int, default=0, help="Stop after this many scans (0 = no limit)")
+    parser.add_argument('--fail-on', choices=['low', 'medium', 'high', 'never'], default='high',
+                        help="Exit with 1 when an alert reaches this severity")
+    parser.add_argument('--quiet', action='store_true', help="No progress lines on stderr")
+    args = parser.parse_args(argv)
+
+    args.scans = [scan.strip() for scan in args.scans.split(',') if scan.strip()]
+    unknown = [scan for scan in args.scans if scan not in SCANS]
+    if unknown:
+        parser.error(f"unknown scans: {', '.join(unknown)}")
+    if args.max_cpu is not None and not 0 < args.max_cpu <= 100:
+        parser.error("--max-cpu must be between 0 and 100")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+
+    stop = threading.Event()
+    interrupted = []
+
+    def handle_signal(signum, frame):
+        interrupted.append(signum)
+        stop.set()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    if hasattr(signal, 'SIGTERM'):
+        signal.signal(signal.SIGTERM, handle_signal)
+
+    lower_priority(args.nice, None if args.ionice == 'none' else args.ionice)
+
+    try:
+        writer = open_output(args.output)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    except (OSError, sqlite3.Error) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return EXIT_ERROR
+
+    budget = CpuBudget(args.max_cpu)
+    status = EXIT_CLEAN
+    runs = 0
+
+    try:
+        while not stop.is_set():
+            try:
+                result = run_scan(args.scans, budget, stop)
+                if result is None:
+                    break
+                writer.write(result)
+            except Exception as e:
+                print(f"error: scan failed: {e}", file=sys.stderr)
+                status = EXIT_ERROR
+            else:
+                status = exit_status(result, args.fail_on)
+                if not args.quiet:
+                    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] score {result['security_score']}, "
+                          f"{len(result['alerts'])} alerts, {result['scan_duration']}ms "
+                          f"({result['throttled_ms']}ms throttled)", file=sys.stderr)
+
+            runs += 1
+            if args.once or args.interval <= 0 or (args.max_runs and runs >= args.max_runs):
+                break
+            stop.wait(args.interval + random.uniform(0, args.jitter))
+    finally:
+        writer.close()
+
+    return EXIT_INTERRUPTED if interrupted else status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,250 @@
+"""
+Benchmark Fixtures
+Synthetic /proc trees, socket tables, file trees, startup items and scan data
+
+Every fixture is deterministic for a given size and seed, so two
+benchmark runs measure the same work.
+"""
+
+import json
+import os
+import random
+import socket
+from collections import namedtuple
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+import psutil
+
+from security import procfs
+
+
+# Same fields as psutil's connection tuples
+addr = namedtuple('addr', ['ip', 'port'])
+sconn = namedtuple('sconn', ['fd', 'family', 'type', 'laddr', 'raddr', 'status', 'pid'])
+
+
+PROCESS_NAMES = ['nginx', 'postgres', 'python3', 'bash', 'sshd', 'chrome', 'node', 'java', 'cron', 'systemd']
+RISKS = ['safe'] * 85 + ['low'] * 8 + ['medium'] * 5 + ['high'] * 2
+STATUSES = ['LISTEN', 'ESTABLISHED', 'TIME_WAIT', 'CLOSE_WAIT']
+PORTS = [22, 80, 443, 3306, 5432, 6379, 8080, 4444, 23, 1337]
+
+
+def build_proc_tree(root: str, count: int, seed: int = 0):
+    """
+    Write a fake procfs with `count` processes under root
+
+    Only the files procfs.iter_process_info reads are created: the
+    system stat/meminfo files and per pid stat, cmdline and an exe link.
+
+    Args:
+        root: Empty directory to populate
+        count: Number of processes
+        seed: Random seed
+    """
+    rng = random.Random(seed)
+    os.makedirs(os.path.join(root, 'self'), exist_ok=True)
+    with open(os.path.join(root, 'stat'), 'w') as f:
+        f.write("cpu  1 2 3 4 5 6 7 0 0 0\nbtime 1700000000\n")
+    with open(os.path.join(root, 'self', 'stat'), 'w') as f:
+        f.write("1 (self) S 0\n")
+    with open(os.path.join(root, 'meminfo'), 'w') as f:
+        f.write("MemTotal:       16384000 kB\n")
+
+    for pid in range(1, count + 1):
+        name = rng.choice(PROCESS_NAMES)
+        base = os.path.join(root, str(pid))
+        os.mkdir(base)
+        ppid = rng.randint(1, pid - 1) if pid > 1 else 0
+        utime, stime, start, rss = rng.randint(0, 10 ** 5), rng.randint(0, 10 ** 4), rng.randint(0, 10 ** 6), rng.randint(100, 10 ** 5)
+        # Fields after "(comm)": state ppid ... utime(14) stime(15) ... starttime(22) vsize rss(24)
+        fields = ['S', str(ppid)] + ['0'] * 9 + [str(utime), str(stime)] + ['0'] * 6 + [str(start), '0', str(rss)]
+        with open(os.path.join(base, 'stat'), 'w') as f:
+            f.write(f"{pid} ({name}) {' '.join(fields)} 0 0 0\n")
+        with open(os.path.join(base, 'cmdline'), 'wb') as f:
+            f.write(f"/usr/bin/{name}\0--worker\0{pid}\0".encode())
+        os.symlink(f"/usr/bin/{name}", os.path.join(base, 'exe'))
+
+
+@contextmanager
+def fake_proc(root: str) -> Iterator[None]:
+    """Point the procfs reader at a fake tree for the duration of the block"""
+    previous = procfs.PROC
+    procfs.PROC = root
+    try:
+        yield
+    finally:
+        procfs.PROC = previous
+
+
+def socket_table(count: int, seed: int = 0) -> List[sconn]:
+    """
+    Generate psutil.net_connections() style entries
+
+    Entries have no pid so scan_open_ports does not look up processes
+    that do not exist.
+    """
+    rng = random.Random(seed)
+    table = []
+    for fd in range(count):
+        status = rng.choice(STATUSES)
+        kind = socket.SOCK_STREAM if rng.random() < 0.8 else socket.SOCK_DGRAM
+        local = addr('0.0.0.0' if status == 'LISTEN' else '10.0.0.2', rng.choice(PORTS) if rng.random() < 0.5 else rng.randint(1024, 65535))
+        remote = () if status == 'LISTEN' else addr(f"203.0.113.{rng.randint(1, 254)}", rng.randint(1024, 65535))
+        table.append(sconn(fd, socket.AF_INET, kind, local, remote, status, None))
+    return table
+
+
+@contextmanager
+def fake_connections(table: List[sconn]) -> Iterator[None]:
+    """Serve a generated socket table from psutil.net_connections"""
+    previous = psutil.net_connections
+    psutil.net_connections = lambda kind='inet': list(table)
+    try:
+        yield
+    finally:
+        psutil.net_connections = previous
+
+
+def build_file_tree(root: str, count: int, size: int, seed: int = 0) -> List[str]:
+    """
+    Write `count` files of `size` bytes spread over subdirectories
+
+    Returns:
+        The file paths
+    """
+    rng = random.Random(seed)
+    paths = []
+    for i in range(count):
+        directory = os.path.join(root, f"d{i % 32:02d}")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"file{i:05d}.bin")
+        with open(path, 'wb') as f:
+            f.write(rng.getrandbits(size * 8).to_bytes(size, 'little') if size else b'')
+        paths.append(path)
+    return paths
+
+
+def build_startup_home(home: str, count: int):
+    """
+    Create a home directory with `count` autostart entries and user units
+
+    Point HOME at it so the user-level collectors read it.
+    """
+    autostart = os.path.join(home, '.config', 'autostart')
+    units = os.path.join(home, '.config', 'systemd', 'user')
+    wants = os.path.join(units, 'default.target.wants')
+    for directory in (autostart, wants):
+        os.makedirs(directory, exist_ok=True)
+
+    for i in range(count):
+        with open(os.path.join(autostart, f"app{i}.desktop"), 'w') as f:
+            f.write(f"[Desktop Entry]\nType=Application\nName=App {i}\nExec=/usr/bin/app{i} --tray\n")
+        unit = f"svc{i}.service"
+        with open(os.path.join(units, unit), 'w') as f:
+            f.write(f"[Service]\nExecStart=/usr/bin/svc{i} --daemon\n")
+        if i % 2:
+            os.symlink(os.path.join(units, unit), os.path.join(wants, unit))
+
+    with open(os.path.join(home, '.profile'), 'w') as f:
+        f.write("export PATH=$HOME/bin:$PATH\n")
+
+
+def scan_data(count: int, seed: int = 0) -> Dict[str, List[Dict]]:
+    """
+    Synthetic processes/ports/startup_items/file_integrity scan results
+
+    Args:
+        count: Number of processes (other sections scale from it)
+        seed: Random seed
+
+    Returns:
+        Dictionary of section -> items, shaped like the scanner output
+    """
+    rng = random.Random(seed)
+    processes = [
+        {
+            'pid': pid, 'ppid': 1, 'name': rng.choice(PROCESS_NAMES), 'username': 'root',
+            'cpu_percent': round(rng.random() * 100, 1), 'memory_percent': rng.random() * 10,
+            'status': 'sleeping', 'create_time': 1700000000 + pid,
+            'cmdline': f"/usr/bin/worker --id {pid}", 'exe': '/usr/bin/worker',
+            'risk_level': rng.choice(RISKS),
+        }
+        for pid in range(1, count + 1)
+    ]
+    ports = [
+        {
+            'local_address': '0.0.0.0', 'local_port': port, 'remote_address': None, 'remote_port': None,
+            'status': rng.choice(STATUSES), 'protocol': rng.choice(['tcp', 'udp']),
+            'process_name': rng.choice(PROCESS_NAMES), 'pid': rng.randint(1, count),
+            'risk_level': rng.choice(RISKS),
+        }
+        for port in range(10000, 10000 + max(count // 5, 1))
+    ]
+    startup_items = [
+        {
+            'name': f"item{i}", 'path': f"/usr/bin/item{i}", 'location': 'systemd (user)',
+            'enabled': bool(i % 2), 'publisher': None, 'risk_level': rng.choice(RISKS),
+        }
+        for i in range(max(count // 10, 1))
+    ]
+    file_integrity = [
+        {'file_path': f"/etc/file{i}", 'status': rng.choice(['safe'] * 8 + ['modified', 'missing']), 'risk_level': 'safe'}
+        for i in range(20)
+    ]
+    return {
+        'processes': processes,
+        'ports': ports,
+        'startup_items': startup_items,
+        'file_integrity': file_integrity,
+    }
+
+
+def mutate_scan(data: Dict[str, List[Dict]], rate: float = 0.05, seed: int = 1) -> Dict[str, List[Dict]]:
+    """
+    Copy of scan data with a fraction of items removed, added or modified
+
+    Used as the "current" side of baseline comparisons.
+    """
+    rng = random.Random(seed)
+    result = {}
+    for section, items in data.items():
+        current = []
+        for item in items:
+            roll = rng.random()
+            if roll < rate / 3:
+                continue
+            item = dict(item)
+            if roll < 2 * rate / 3:
+                item['risk_level'] = 'high'
+            current.append(item)
+        extra = [dict(item, name=f"{item.get('name')}-new", local_port=(item.get('local_port') or 0) + 50000)
+                 for item in items[:int(len(items) * rate / 3)]]
+        result[section] = current + extra
+    return result
+
+
+def insert_baseline(manager, data: Dict[str, List[Dict]], name: str = "benchmark") -> int:
+    """
+    Store scan data as the active baseline without scanning the host
+
+    Returns:
+        The new baseline id
+    """
+    with manager._connect() as conn:
+        cursor = conn.execute("""
+            INSERT INTO baselines
+            (name, description, processes, ports, startup_items, file_integrity, metrics, is_active)
+            VALUES (?, ?, ?, ?, ?, ?, ?, 1)
+        """, (
+            name,
+            "synthetic benchmark baseline",
+            json.dumps(data['processes']),
+            json.dumps(data['ports']),
+            json.dumps(data['startup_items']),
+            json.dumps(data['file_integrity']),
+            json.dumps({})
+        ))
+        conn.execute("UPDATE baselines SET is_active = 0 WHERE id != ?", (cursor.lastrowid,))
+        conn.commit()
+        return cursor.lastrowid
@@ -0,0 +1,164 @@
+"""
+Fleet Simulation
+Many simulated agents pushing delta snapshots to a fleet server
+
+Each agent starts from its own synthetic scan (see fixtures.py) and
+mutates a few percent of it every round. By default the server is the
+local app in-process (FLEET_ENABLED forced on, temporary database); with
+--url the agents push to a running server instead. Run from the backend
+directory:
+
+    python benchmarks/fleet_simulation.py --hosts 200 --rounds 10
+    python benchmarks/fleet_simulation.py --hosts 50 --concurrency 8 --url http://localhost:8000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('DRIFT_CHECK_INTERVAL', '0')
+os.environ.setdefault('PROCESS_SAMPLE_INTERVAL', '0')
+
+import fixtures
+from suite import percentile
+
+
+class SimulatedAgent:
+    """One host: a FleetClient plus scan data that drifts every round"""
+
+    def __init__(self, index: int, size: int, url: str, transport=None, token: str = None):
+        from security.fleet import FleetClient
+
+        self.host_id = f"sim-{index:05d}"
+        self.data = fixtures.scan_data(size, seed=index)
+        self.client = FleetClient(url, host_id=self.host_id, token=token, transport=transport)
+        self.index = index
+
+    def push(self, round_number: int, rate: float) -> Dict:
+        if round_number:
+            self.data = fixtures.mutate_scan(self.data, rate=rate, seed=self.index * 1000 + round_number)
+        start = time.perf_counter()
+        ack = self.client.push({**self.data, 'host': self.host_id, 'platform': 'Linux', 'timestamp': int(time.time())})
+        ack['latency_ms'] = (time.perf_counter() - start) * 1000
+        return ack
+
+
+def in_process_transport(workdir: str, token: str):
+    """Post through FastAPI's TestClient to the app in this process"""
+    from fastapi.testclient import TestClient
+
+    os.environ['FLEET_ENABLED'] = 'true'
+    os.environ['FLEET_TOKEN'] = token
+    os.environ['FLEET_DB'] = os.path.join(workdir, 'fleet.db')
+    os.chdir(workdir)
+    import main
+
+    client = TestClient(main.app)
+
+    def post(url: str, body: bytes, headers: Dict[str, str], timeout: float):
+        response = client.post('/api/fleet/ingest', content=body, headers=headers)
+        return response.status_code, response.json()
+
+    def get(path: str):
+        response = client.get(path)
+        response.raise_for_status()
+        return response.json()
+
+    return post, get
+
+
+def url_getter(url: str, token: str = None):
+    """GET JSON from a running server"""
+    import json
+    import urllib.request
+
+    def get(path: str):
+        request = urllib.request.Request(url.rstrip('/') + path)
+        if token:
+            request.add_header('Authorization', f"Bearer {token}")
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return json.loads(response.read())
+
+    return get
+
+
+def summarize(label: str, acks: List[Dict]):
+    latencies = sorted(ack['latency_ms'] for ack in acks)
+    sizes = [ack['wire_bytes'] for ack in acks]
+    print(f"{label:<14} {len(acks):>6} pushes  p50 {percentile(latencies, 0.5):>7.2f}ms  "
+          f"p99 {percentile(latencies, 0.99):>7.2f}ms  avg {sum(sizes) / len(sizes) / 1024:>8.1f} KiB")
+
+
+def time_query(get, path: str, runs: int = 20) -> float:
+    """Median latency of a GET in milliseconds"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        get(path)
+        timings.append((time.perf_counter() - start) * 1000)
+    return percentile(sorted(timings), 0.5)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate many agents pushing to a fleet server")
+    parser.add_argument('--hosts', type=int, default=100, help="Simulated agents")
+    parser.add_argument('--size', type=int, default=300, help="Processes per host (other sections scale from it)")
+    parser.add_argument('--rounds', type=int, default=5, help="Pushes per agent")
+    parser.add_argument('--rate', type=float, default=0.05, help="Fraction of items changed per round")
+    parser.add_argument('--concurrency', type=int, default=1, help="Agents pushing at the same time")
+    parser.add_argument('--url', help="Push to this server instead of the in-process app")
+    parser.add_argument('--token', default=os.environ.get('FLEET_TOKEN'), help="Server FLEET_TOKEN")
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            if args.url:
+                transport, get = None, url_getter(args.url, args.token)
+            else:
+                args.token = args.token or 'simulation'
+                transport, get = in_process_transport(workdir, args.token)
+
+            agents = [SimulatedAgent(i, args.size, args.url or 'http://testserver', transport, args.token)
+                      for i in range(args.hosts)]
+
+            full, delta = [], []
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+                for round_number in range(args.rounds):
+                    for ack in pool.map(lambda agent: agent.push(round_number, args.rate), agents):
+                        (delta if ack['delta'] else full).append(ack)
+            elapsed = time.perf_counter() - start
+
+            total = len(full) + len(delta)
+            print(f"{args.hosts} hosts x {args.rounds} rounds: {total} pushes in {elapsed:.1f}s "
+                  f"({total / elapsed:.0f} pushes/s)")
+            if full:
+                summarize('full', full)
+            if delta:
+                summarize('delta', delta)
+
+            summary = get('/api/fleet/hosts')['summary']
+            print(f"\nServer: {summary['hosts']} hosts, {summary['snapshots']} snapshots "
+                  f"({summary['keyframes']} keyframes), {summary['wire_bytes'] / 1024 / 1024:.1f} MiB received, "
+                  f"{summary['stored_bytes'] / 1024 / 1024:.1f} MiB stored, "
+                  f"{summary['index']['terms']} index terms / {summary['index']['postings']} postings")
+
+            port = 10000
+            listening = get(f'/api/fleet/ports/{port}?status=any')['count']
+            print(f"\nQueries (median of 20):")
+            print(f"  hosts with port {port} ({listening} hosts)  {time_query(get, f'/api/fleet/ports/{port}?status=any'):>7.2f}ms")
+            print(f"  host list                        {time_query(get, '/api/fleet/hosts'):>7.2f}ms")
+            print(f"  high alerts                      {time_query(get, '/api/fleet/alerts?severity=high'):>7.2f}ms")
+            print(f"  index: process name              {time_query(get, '/api/fleet/search?kind=process&value=nginx'):>7.2f}ms")
+            print(f"  index: port {port}, with history  {time_query(get, f'/api/fleet/search?kind=port&value={port}&history=true'):>7.2f}ms")
+            last = get(f"/api/fleet/hosts/{agents[0].host_id}")['last_snapshot_id']
+            print(f"  rebuild latest snapshot          {time_query(get, f'/api/fleet/snapshots/{last}'):>7.2f}ms")
+        finally:
+            os.chdir(cwd)
@@ -0,0 +1,109 @@
+"""
+Security Score Benchmark
+Compares looping generate_metrics/calculate_security_score with the
+vectorized batch functions over synthetic scan snapshots
+
+Run from the backend directory:
+
+    python benchmarks/security_score.py --snapshots 5000 --items 300
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from security.analyzer import generate_metrics, calculate_security_score
+from security.analytics import (
+    load_snapshot_columns, generate_metrics_batch, calculate_security_scores, metrics_records
+)
+
+RISKS = ['safe'] * 85 + ['low'] * 8 + ['medium'] * 5 + ['high'] * 2
+PORT_STATUSES = ['LISTEN', 'ESTABLISHED', 'TIME_WAIT']
+FILE_STATUSES = ['safe'] * 95 + ['modified'] * 3 + ['missing'] * 2
+
+
+def synthetic_snapshots(count: int, items: int, seed: int = 0) -> List[Dict]:
+    """
+    Build scan snapshots with random risk levels and statuses
+
+    Args:
+        count: Number of snapshots
+        items: Processes per snapshot (ports/startup/files scale from it)
+        seed: Random seed
+
+    Returns:
+        List of snapshot dictionaries
+    """
+    rng = random.Random(seed)
+    return [
+        {
+            'processes': [{'risk_level': rng.choice(RISKS)} for _ in range(items)],
+            'ports': [{'risk_level': rng.choice(RISKS), 'status': rng.choice(PORT_STATUSES)}
+                      for _ in range(items // 5)],
+            'startup_items': [{'risk_level': rng.choice(RISKS)} for _ in range(items // 10)],
+            'file_integrity': [{'risk_level': 'safe', 'status': rng.choice(FILE_STATUSES)}
+                               for _ in range(10)],
+            'timestamp': 1700000000 + i * 600,
+        }
+        for i in range(count)
+    ]
+
+
+def loop_scores(snapshots: List[Dict]) -> List[int]:
+    """Existing per-snapshot path"""
+    return [
+        calculate_security_score(generate_metrics(
+            s['processes'], s['ports'], s['startup_items'], s['file_integrity']
+        ))
+        for s in snapshots
+    ]
+
+
+def batch_scores(snapshots) -> List[int]:
+    """Vectorized path (snapshot dicts or preloaded columns)"""
+    return calculate_security_scores(generate_metrics_batch(snapshots)).tolist()
+
+
+def best_of(func, runs: int) -> float:
+    """Fastest of `runs` calls, in milliseconds"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark looped vs vectorized security scoring")
+    parser.add_argument('--snapshots', type=int, default=2000, help="Number of snapshots")
+    parser.add_argument('--items', type=int, default=300, help="Processes per snapshot")
+    parser.add_argument('--runs', type=int, default=3, help="Timed runs per case")
+    args = parser.parse_args()
+
+    snapshots = synthetic_snapshots(args.snapshots, args.items)
+
+    # Both paths must agree before timing them
+    assert loop_scores(snapshots) == batch_scores(snapshots)
+    batch = metrics_records(generate_metrics_batch(snapshots))
+    for snapshot, metrics in zip(snapshots, batch):
+        expected = generate_metrics(snapshot['processes'], snapshot['ports'],
+                                    snapshot['startup_items'], snapshot['file_integrity'])
+        assert {**expected, 'last_scan': 0} == {**metrics, 'last_scan': 0}
+
+    columns = load_snapshot_columns(snapshots)
+    cases = {
+        'loop (existing functions)': lambda: loop_scores(snapshots),
+        'vectorized from dicts': lambda: batch_scores(snapshots),
+        '  load columns only': lambda: load_snapshot_columns(snapshots),
+        'vectorized from columns': lambda: batch_scores(columns),
+    }
+
+    print(f"{len(snapshots)} snapshots, {args.items} processes each")
+    for name, func in cases.items():
+        print(f"{name:<28} {best_of(func, args.runs):>8.1f}ms")
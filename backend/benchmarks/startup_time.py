@@ -0,0 +1,84 @@
+"""
+Startup Time Benchmark
+Measures how long it takes to import the API and the scanner modules
+
+Each target is imported in a fresh interpreter so module caches do not
+hide the real cost. Run from the backend directory:
+
+    python benchmarks/startup_time.py --runs 10
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = [
+    'main',
+    'security.baseline',
+    'security.processes',
+    'security.ports',
+    'security.startup',
+    'security.integrity',
+    'security.analyzer',
+    'security.analytics',
+]
+
+
+def time_import(module: str, runs: int) -> Dict:
+    """
+    Import a module in fresh interpreters and collect timings
+
+    Args:
+        module: Dotted module name relative to the backend directory
+        runs: Number of interpreter launches
+
+    Returns:
+        Timing statistics in milliseconds
+    """
+    code = (
+        "import time; start = time.perf_counter(); "
+        f"import {module}; "
+        "print((time.perf_counter() - start) * 1000)"
+    )
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR, DRIFT_CHECK_INTERVAL='0')
+    timings: List[float] = []
+
+    # Run from an empty directory to prove imports never touch data/
+    with tempfile.TemporaryDirectory() as workdir:
+        for _ in range(runs):
+            result = subprocess.run(
+                [sys.executable, '-c', code],
+                cwd=workdir, env=env, capture_output=True, text=True, check=True
+            )
+            timings.append(float(result.stdout.strip().splitlines()[-1]))
+
+        created = os.listdir(workdir)
+
+    return {
+        'module': module,
+        'median_ms': statistics.median(timings),
+        'min_ms': min(timings),
+        'max_ms': max(timings),
+        'created_files': created,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark BabyPluto import/startup time")
+    parser.add_argument('--runs', type=int, default=5, help="Interpreter launches per module")
+    parser.add_argument('modules', nargs='*', default=TARGETS, help="Modules to import")
+    args = parser.parse_args()
+
+    print(f"{'module':<22} {'median':>9} {'min':>9} {'max':>9}")
+    for module in args.modules:
+        stats = time_import(module, args.runs)
+        print(f"{module:<22} {stats['median_ms']:>7.1f}ms {stats['min_ms']:>7.1f}ms {stats['max_ms']:>7.1f}ms")
+        if stats['created_files']:
+            print(f"  ⚠️  import created files: {', '.join(stats['created_files'])}")
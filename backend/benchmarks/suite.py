@@ -0,0 +1,368 @@
+"""
+Benchmark Suite
+Latency percentiles, throughput and peak memory for every scanner and API endpoint
+
+Scanners run against synthetic fixtures (see fixtures.py) so results are
+comparable across hosts; the api group calls the real endpoints through
+FastAPI's TestClient. Run from the backend directory:
+
+    python benchmarks/suite.py --runs 20 --output before.json
+    python benchmarks/suite.py --runs 20 --output after.json --compare before.json
+    python benchmarks/suite.py --groups processes,baseline --size 5000
+    python benchmarks/suite.py --diff before.json after.json
+
+--compare/--diff exit with status 1 when a case's p50 regressed by more
+than --threshold (default 10%).
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep background threads out of the measurements
+os.environ.setdefault('DRIFT_CHECK_INTERVAL', '0')
+os.environ.setdefault('PROCESS_SAMPLE_INTERVAL', '0')
+
+import fixtures
+
+
+class Case:
+    """One benchmarked call: func(), with optional per-run setup()"""
+
+    def __init__(self, name: str, func: Callable, items: int = 1, setup: Optional[Callable] = None):
+        """
+        Args:
+            name: Case name ('group/what')
+            func: Callable to time
+            items: Units of work per call, for throughput
+            setup: Called before every run, outside the timing
+        """
+        self.name = name
+        self.func = func
+        self.items = items
+        self.setup = setup
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Linear-interpolated percentile of an already sorted list"""
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def run_case(case: Case, runs: int) -> Dict:
+    """
+    Time a case and measure its peak traced memory
+
+    Memory is measured in a separate run because tracemalloc slows
+    allocation-heavy code down considerably.
+
+    Args:
+        case: Case to run
+        runs: Timed runs (after one warm-up run)
+
+    Returns:
+        Statistics in milliseconds, items per second and peak KiB
+    """
+    if case.setup:
+        case.setup()
+    case.func()
+
+    timings = []
+    for _ in range(runs):
+        if case.setup:
+            case.setup()
+        start = time.perf_counter()
+        case.func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    if case.setup:
+        case.setup()
+    tracemalloc.start()
+    try:
+        case.func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings.sort()
+    p50 = percentile(timings, 0.50)
+    return {
+        'runs': runs,
+        'items': case.items,
+        'mean_ms': round(statistics.mean(timings), 3),
+        'p50_ms': round(p50, 3),
+        'p90_ms': round(percentile(timings, 0.90), 3),
+        'p99_ms': round(percentile(timings, 0.99), 3),
+        'max_ms': round(timings[-1], 3),
+        'throughput': round(case.items / (p50 / 1000), 1) if p50 else None,
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+# ==================== CASES ====================
+
+def process_cases(workdir: str, size: int) -> List[Case]:
+    """scan_processes and the raw readers over a fake /proc"""
+    from security import procfs
+    from security.processes import iter_process_info, scan_processes
+
+    if not procfs.is_available():
+        return []
+
+    root = os.path.join(workdir, 'proc')
+    fixtures.build_proc_tree(root, size)
+
+    def under_fake_proc(func):
+        def wrapped():
+            with fixtures.fake_proc(root):
+                return func()
+        return wrapped
+
+    return [
+        Case('processes/procfs_reader', under_fake_proc(lambda: list(iter_process_info('procfs'))), size),
+        Case('processes/scan_processes', under_fake_proc(lambda: scan_processes(engine='procfs')), size),
+    ]
+
+
+def port_cases(workdir: str, size: int) -> List[Case]:
+    """scan_open_ports over a generated socket table"""
+    from security.ports import scan_open_ports
+
+    table = fixtures.socket_table(size)
+
+    def scan():
+        with fixtures.fake_connections(table):
+            return scan_open_ports()
+
+    return [Case('ports/scan_open_ports', scan, size)]
+
+
+def startup_cases(workdir: str, size: int) -> List[Case]:
+    """scan_startup_items with a synthetic home, cold and cached"""
+    from security.startup import scan_startup_items, clear_startup_cache
+    from security.integrity import clear_hash_cache
+
+    home = os.path.join(workdir, 'home')
+    entries = max(size // 10, 1)
+    fixtures.build_startup_home(home, entries)
+
+    def scan():
+        previous = os.environ.get('HOME')
+        os.environ['HOME'] = home
+        try:
+            return scan_startup_items()
+        finally:
+            if previous is None:
+                del os.environ['HOME']
+            else:
+                os.environ['HOME'] = previous
+
+    def cold():
+        clear_startup_cache()
+        clear_hash_cache()
+
+    return [
+        Case('startup/scan_cold', scan, entries * 2, setup=cold),
+        Case('startup/scan_cached', scan, entries * 2),
+    ]
+
+
+def integrity_cases(workdir: str, size: int) -> List[Case]:
+    """scan_file_integrity over a file tree, cold and cached"""
+    from security.integrity import scan_file_integrity, clear_hash_cache
+
+    count = max(size // 10, 1)
+    paths = fixtures.build_file_tree(os.path.join(workdir, 'files'), count, 64 * 1024)
+
+    return [
+        Case('integrity/scan_cold', lambda: scan_file_integrity(paths), count, setup=clear_hash_cache),
+        Case('integrity/scan_cached', lambda: scan_file_integrity(paths), count),
+    ]
+
+
+def analyzer_cases(workdir: str, size: int) -> List[Case]:
+    """generate_metrics, generate_alerts and calculate_security_score"""
+    from security.analyzer import generate_metrics, generate_alerts, calculate_security_score
+
+    data = fixtures.scan_data(size)
+    sections = (data['processes'], data['ports'], data['startup_items'], data['file_integrity'])
+    total = sum(len(section) for section in sections)
+
+    return [
+        Case('analyzer/generate_metrics', lambda: generate_metrics(*sections), total),
+        Case('analyzer/generate_alerts', lambda: generate_alerts(*sections), total),
+        Case('analyzer/security_score', lambda: calculate_security_score(generate_metrics(*sections)), total),
+    ]
+
+
+def baseline_cases(workdir: str, size: int) -> List[Case]:
+    """compare_with_baseline and loading against a large stored baseline"""
+    from security.baseline import BaselineManager
+
+    manager = BaselineManager(db_path=os.path.join(workdir, 'baselines.db'))
+    manager.ensure_database()
+    data = fixtures.scan_data(size)
+    baseline_id = fixtures.insert_baseline(manager, data)
+    current = fixtures.mutate_scan(data)
+    current.pop('file_integrity')
+    total = sum(len(items) for items in current.values())
+
+    return [
+        Case('baseline/compare', lambda: manager.compare_with_baseline(baseline_id, current=current), total),
+        Case('baseline/load_full', lambda: manager.get_baseline(baseline_id), total),
+        Case('baseline/load_metadata', lambda: manager.get_baseline(baseline_id, sections=[])),
+    ]
+
+
+def api_cases(workdir: str, size: int) -> List[Case]:
+    """Real endpoints on this host through TestClient (not synthetic)"""
+    try:
+        from fastapi.testclient import TestClient
+    except ImportError:
+        print("api group skipped: fastapi TestClient (httpx) not installed")
+        return []
+
+    # main creates data/ relative to the working directory
+    os.chdir(workdir)
+    import main
+
+    client = TestClient(main.app)
+    endpoints = [
+        ('GET', '/health'),
+        ('GET', '/api/processes'),
+        ('GET', '/api/processes/tree'),
+        ('GET', '/api/ports'),
+        ('GET', '/api/startup'),
+        ('GET', '/api/integrity'),
+        ('POST', '/api/scan/quick'),
+        ('POST', '/api/scan/full'),
+        ('GET', '/api/baseline/list'),
+    ]
+
+    def call(method: str, path: str):
+        def request():
+            response = client.request(method, path)
+            response.raise_for_status()
+            return response
+        return request
+
+    return [Case(f"api/{method} {path}", call(method, path)) for method, path in endpoints]
+
+
+GROUPS = {
+    'processes': process_cases,
+    'ports': port_cases,
+    'startup': startup_cases,
+    'integrity': integrity_cases,
+    'analyzer': analyzer_cases,
+    'baseline': baseline_cases,
+    'api': api_cases,
+}
+
+
+# ==================== REPORTING ====================
+
+def compare_results(before: Dict, after: Dict, threshold: float) -> List[str]:
+    """
+    Print p50/peak memory changes between two result files
+
+    Args:
+        before: Earlier results
+        after: Later results
+        threshold: Relative p50 increase counted as a regression
+
+    Returns:
+        Names of regressed cases
+    """
+    regressions = []
+    print(f"\n{'case':<34} {'p50 before':>11} {'p50 after':>11} {'change':>8} {'peak KiB':>18}")
+    for name, new in after['cases'].items():
+        old = before['cases'].get(name)
+        if not old:
+            continue
+        change = (new['p50_ms'] - old['p50_ms']) / old['p50_ms'] if old['p50_ms'] else 0.0
+        flag = ''
+        if change > threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print(f"{name:<34} {old['p50_ms']:>9.2f}ms {new['p50_ms']:>9.2f}ms {change:>+7.1%} "
+              f"{old['peak_kib']:>8.0f} -> {new['peak_kib']:<8.0f}{flag}")
+    return regressions
+
+
+def print_results(results: Dict):
+    """Print one line per case"""
+    print(f"{'case':<34} {'p50':>9} {'p90':>9} {'p99':>9} {'items/s':>11} {'peak KiB':>9}")
+    for name, stats in results['cases'].items():
+        throughput = f"{stats['throughput']:.0f}" if stats['throughput'] else '-'
+        print(f"{name:<34} {stats['p50_ms']:>7.2f}ms {stats['p90_ms']:>7.2f}ms {stats['p99_ms']:>7.2f}ms "
+              f"{throughput:>11} {stats['peak_kib']:>9.0f}")
+
+
+def load_results(path: str) -> Dict:
+    """Read a results file written with --output"""
+    with open(path) as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the scanners and API endpoints")
+    parser.add_argument('--groups', default=','.join(GROUPS), help="Comma-separated groups to run")
+    parser.add_argument('--size', type=int, default=1000, help="Fixture size (processes/sockets; other fixtures scale from it)")
+    parser.add_argument('--runs', type=int, default=10, help="Timed runs per case")
+    parser.add_argument('--output', help="Write results as JSON to this file")
+    parser.add_argument('--compare', help="Compare against an earlier results file")
+    parser.add_argument('--diff', nargs=2, metavar=('BEFORE', 'AFTER'), help="Only compare two results files")
+    parser.add_argument('--threshold', type=float, default=0.10, help="p50 regression threshold (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    if args.diff:
+        regressed = compare_results(load_results(args.diff[0]), load_results(args.diff[1]), args.threshold)
+        sys.exit(1 if regressed else 0)
+
+    results = {
+        'meta': {
+            'date': datetime.now().isoformat(),
+            'host': platform.node(),
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'size': args.size,
+            'runs': args.runs,
+        },
+        'cases': {},
+    }
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            for group in args.groups.split(','):
+                group_dir = os.path.join(workdir, group)
+                os.makedirs(group_dir)
+                for case in GROUPS[group](group_dir, args.size):
+                    results['cases'][case.name] = run_case(case, args.runs)
+        finally:
+            os.chdir(cwd)
+
+    print_results(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        regressed = compare_results(load_results(args.compare), results, args.threshold)
+        sys.exit(1 if regressed else 0)
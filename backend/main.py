@@ -3,27 +3,90 @@ BabyPluto Security Scanner - Main API Server
 FastAPI-based REST API for security scanning
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from contextlib import asynccontextmanager
 from typing import Dict, List
-import uvicorn
 import time
 from datetime import datetime
 
-# Import security modules (to be implemented)
-from security.processes import scan_processes
-from security.ports import scan_open_ports
-from security.startup import scan_startup_items
-from security.integrity import scan_file_integrity
-from security.analyzer import generate_metrics, generate_alerts
+# Scanner modules (psutil, platform collectors) are imported by the
+# endpoints that use them, so the server starts without loading them
 from security.baseline import baseline_manager
+from security.scheduler import DriftScheduler, scan_lock
+from security.sampler import ProcessSampler
+from security.metrics_store import MetricsStore
+from security.anomaly import AnomalyDetector
+from security.governor import governor
+from security.workers import worker_pool
+from security.scan_jobs import scan_job_manager
+from security.fleet import FleetStore, DeltaMismatch
+from security import export, fleet, instrumentation, profiling
+
+# Background baseline drift checks (DRIFT_CHECK_INTERVAL=0 disables them)
+drift_scheduler = DriftScheduler.from_env(baseline_manager)
+
+# Process/port/host time series, fed by the sampler
+metrics_store = MetricsStore.from_env()
+
+# Behavioural anomaly scoring against this host's own history
+anomaly_detector = AnomalyDetector.from_env()
+
+# Snapshots pushed by agents on other hosts (FLEET_ENABLED=true)
+fleet_store = FleetStore.from_env()
+
+# Background CPU/socket sampling (PROCESS_SAMPLE_INTERVAL=0 disables it)
+process_sampler = ProcessSampler.from_env(metrics_store, anomaly_detector)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop background tasks with the server"""
+    baseline_manager.ensure_database()
+    if fleet.ENABLED and not fleet.TOKEN:
+        print("WARNING: FLEET_ENABLED=true without FLEET_TOKEN: /api/fleet/ingest refuses all pushes until a token is set")
+    drift_scheduler.start()
+    process_sampler.start()
+    scan_job_manager.start()
+    yield
+    scan_job_manager.stop()
+    process_sampler.stop()
+    drift_scheduler.stop()
+    metrics_store.flush()
+    worker_pool.shutdown()
+
+
+class InstrumentedJSONResponse(JSONResponse):
+    """JSONResponse whose encoding is timed as the serialization stage"""
+
+    def render(self, content) -> bytes:
+        with instrumentation.timer('serialization.json'):
+            return super().render(content)
+
 
 app = FastAPI(
     title="BabyPluto Security API",
     description="Cross-platform security scanner for Windows and Linux",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=InstrumentedJSONResponse if instrumentation.ENABLED else JSONResponse
 )
 
+
+if instrumentation.ENABLED:
+    @app.middleware("http")
+    async def record_request_metrics(request: Request, call_next):
+        """Count requests and time them per route template"""
+        start = time.perf_counter()
+        response = await call_next(request)
+        route = request.scope.get("route")
+        path = route.path if route else "unmatched"
+        instrumentation.HTTP_SECONDS.observe(time.perf_counter() - start, request.method, path)
+        instrumentation.HTTP_REQUESTS.inc(request.method, path, str(response.status_code))
+        return response
+
 # CORS middleware for frontend integration
 app.add_middleware(
     CORSMiddleware,
@@ -72,18 +135,48 @@ def system_info():
     }
 
 
+def _profile_mode(request: Request, profile: str = None):
+    """Profiler mode requested with ?profile= or the X-Profile header (None if not)"""
+    value = (profile or request.headers.get("x-profile") or "").lower()
+    if value in ("", "0", "false", "no"):
+        return None
+    if not profiling.ENABLED:
+        raise HTTPException(status_code=403, detail="Profiling is disabled (PROFILING=false)")
+    return value if value in profiling.MODES else "cprofile"
+
+
+def _run_scan(request: Request, profile: str, name: str, scan):
+    """Run a scan, under the profiler when the request asks for it"""
+    mode = _profile_mode(request, profile)
+    if mode is None:
+        return scan()
+    
+    try:
+        result, report = profiling.profile_call(scan, name, mode)
+    except profiling.ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    result["profile"] = report
+    return result
+
+
 @app.post("/api/scan/quick")
-def quick_scan():
+def quick_scan(request: Request, profile: str = None):
     """
     Quick security scan: processes + ports
     Returns basic security information quickly
     """
-    try:
+    def scan():
+        from security.processes import scan_processes
+        from security.ports import scan_open_ports
+        
         start_time = time.time()
+        usage = governor.snapshot()
         
         # Scan processes and ports
         processes = scan_processes()
         ports = scan_open_ports()
+        drift_scheduler.record_scan(processes=processes, ports=ports)
         
         scan_duration = int((time.time() - start_time) * 1000)  # milliseconds
         
@@ -92,25 +185,40 @@ def quick_scan():
             "ports": ports,
             "scan_type": "quick",
             "scan_duration": scan_duration,
+            "budget": governor.report(since=usage),
             "timestamp": int(time.time())
         }
+    
+    try:
+        return _run_scan(request, profile, "quick_scan", scan)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Scan failed: {str(e)}")
 
 
 @app.post("/api/scan/full")
-def full_scan():
+def full_scan(request: Request, profile: str = None):
     """
     Full security scan: complete system analysis
     Includes processes, ports, startup, file integrity, and threat analysis
     """
-    try:
+    def scan():
+        from security.processes import scan_processes
+        from security.ports import scan_open_ports
+        from security.startup import scan_startup_items
+        from security.integrity import scan_file_integrity
+        from security.analyzer import generate_metrics, generate_alerts
+        
         start_time = time.time()
+        usage = governor.snapshot()
         
-        # Perform all scans
-        processes = scan_processes()
-        ports = scan_open_ports()
-        startup_items = scan_startup_items()
+        # Perform all scans (background drift checks wait for us)
+        with scan_lock:
+            processes = scan_processes(include_hashes=True)
+            ports = scan_open_ports()
+            startup_items = scan_startup_items()
+        drift_scheduler.record_scan(processes=processes, ports=ports, startup_items=startup_items)
         
         # Define critical system files based on OS
         import platform
@@ -135,6 +243,7 @@ def full_scan():
         # Generate metrics and alerts
         metrics = generate_metrics(processes, ports, startup_items, file_integrity)
         alerts = generate_alerts(processes, ports, startup_items, file_integrity)
+        alerts += anomaly_detector.alerts()
         
         scan_duration = int((time.time() - start_time) * 1000)  # milliseconds
         
@@ -147,17 +256,127 @@ def full_scan():
             "metrics": metrics,
             "scan_type": "full",
             "scan_duration": scan_duration,
+            "budget": governor.report(since=usage),
             "timestamp": int(time.time())
         }
+    
+    try:
+        return _run_scan(request, profile, "full_scan", scan)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Full scan failed: {str(e)}")
 
 
+# ==================== SCAN JOB ENDPOINTS ====================
+
+@app.post("/api/scan/jobs")
+def create_scan_job(roots: str = None):
+    """
+    Queue a file integrity walk of whole directories
+    
+    Jobs run one at a time in the background and checkpoint their
+    progress, so they survive cancellation and server restarts. Use
+    ?roots=/etc,/usr/bin to override the configured SCAN_JOB_ROOTS.
+    """
+    try:
+        return scan_job_manager.submit(_split_param(roots))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to create scan job: {str(e)}")
+
+
+@app.get("/api/scan/jobs")
+def list_scan_jobs(limit: int = Query(50, ge=1, le=1000)):
+    """List scan jobs, most recent first"""
+    try:
+        jobs = scan_job_manager.list_jobs(limit=limit)
+        return {
+            "jobs": jobs,
+            "count": len(jobs),
+            "runner": scan_job_manager.status()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to list scan jobs: {str(e)}")
+
+
+@app.get("/api/scan/jobs/{job_id}")
+def get_scan_job(job_id: int):
+    """Get a scan job's status and progress"""
+    job = scan_job_manager.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Scan job not found")
+    return job
+
+
+@app.get("/api/scan/jobs/{job_id}/files")
+def get_scan_job_files(
+    job_id: int,
+    status: str = None,
+    limit: int = Query(1000, ge=1, le=10000),
+    offset: int = Query(0, ge=0)
+):
+    """Files hashed by a scan job so far (?status=error for unreadable ones)"""
+    try:
+        if not scan_job_manager.get_job(job_id):
+            raise HTTPException(status_code=404, detail="Scan job not found")
+        files = scan_job_manager.list_files(job_id, status=status, offset=offset, limit=limit)
+        return {
+            "job_id": job_id,
+            "files": files,
+            "count": len(files),
+            "offset": offset
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get scan job files: {str(e)}")
+
+
+@app.post("/api/scan/jobs/{job_id}/cancel")
+def cancel_scan_job(job_id: int):
+    """Cancel a scan job (progress is kept and it can be resumed)"""
+    try:
+        job = scan_job_manager.cancel(job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not job:
+        raise HTTPException(status_code=404, detail="Scan job not found")
+    return job
+
+
+@app.post("/api/scan/jobs/{job_id}/resume")
+def resume_scan_job(job_id: int):
+    """Queue a cancelled, failed or interrupted scan job from its last checkpoint"""
+    try:
+        job = scan_job_manager.resume(job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not job:
+        raise HTTPException(status_code=404, detail="Scan job not found")
+    return job
+
+
+@app.delete("/api/scan/jobs/{job_id}")
+def delete_scan_job(job_id: int):
+    """Delete a scan job and its results"""
+    try:
+        if not scan_job_manager.delete(job_id):
+            raise HTTPException(status_code=404, detail="Scan job not found")
+        return {"success": True, "message": f"Scan job {job_id} deleted"}
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
 @app.get("/api/processes")
-def get_processes():
-    """Get current running processes"""
+def get_processes(hashes: bool = False):
+    """Get current running processes (?hashes=true adds exe hashes and reputation)"""
+    from security.processes import scan_processes
+    
     try:
-        processes = scan_processes()
+        processes = scan_processes(include_hashes=hashes)
+        drift_scheduler.record_scan(processes=processes)
         return {
             "processes": processes,
             "count": len(processes),
@@ -167,11 +386,89 @@ def get_processes():
         raise HTTPException(status_code=500, detail=f"Failed to get processes: {str(e)}")
 
 
+@app.get("/api/processes/tree")
+def get_process_tree(fields: str = None):
+    """Get processes as a parent/child tree with lineage findings"""
+    from security.processes import scan_processes
+    from security.process_tree import ProcessTree
+    
+    try:
+        processes = scan_processes()
+        drift_scheduler.record_scan(processes=processes)
+        tree = ProcessTree(processes)
+        return {
+            "tree": tree.to_nested(fields=_split_param(fields)),
+            "findings": [
+                alert for p in processes for alert in p.get("lineage_alerts", [])
+            ],
+            "count": len(processes),
+            "timestamp": int(time.time())
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to build process tree: {str(e)}")
+
+
+@app.get("/api/processes/{pid}/ancestry")
+def get_process_ancestry(pid: int):
+    """Get a process and its ancestors, nearest parent first"""
+    from security.processes import scan_processes
+    from security.process_tree import ProcessTree
+    
+    try:
+        tree = ProcessTree(scan_processes())
+        process = tree.by_pid.get(pid)
+        if not process:
+            raise HTTPException(status_code=404, detail="Process not found")
+        return {
+            "process": process,
+            "ancestry": tree.ancestry(pid),
+            "timestamp": int(time.time())
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get process ancestry: {str(e)}")
+
+
+@app.get("/api/processes/{pid}")
+def get_process(pid: int, include: str = None):
+    """
+    Get details of one process
+    
+    CPU usage and socket counts come from the background sampler, so the
+    request never blocks; ?include=open_files,memory_maps adds details
+    that are expensive to read.
+    """
+    from security.processes import get_process_by_pid
+    
+    try:
+        process = get_process_by_pid(
+            pid,
+            usage=process_sampler.usage(pid),
+            connections=process_sampler.connection_count(pid),
+            include=tuple(_split_param(include) or ())
+        )
+        if not process:
+            raise HTTPException(status_code=404, detail="Process not found or access denied")
+        return {
+            "process": process,
+            "sampled_at": process_sampler.sampled_at,
+            "timestamp": int(time.time())
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get process: {str(e)}")
+
+
 @app.get("/api/ports")
 def get_ports():
     """Get open ports and connections"""
+    from security.ports import scan_open_ports
+    
     try:
         ports = scan_open_ports()
+        drift_scheduler.record_scan(ports=ports)
         return {
             "ports": ports,
             "count": len(ports),
@@ -184,11 +481,15 @@ def get_ports():
 @app.get("/api/startup")
 def get_startup():
     """Get startup items"""
+    from security.startup import scan_startup_items, last_collector_stats
+    
     try:
         startup_items = scan_startup_items()
+        drift_scheduler.record_scan(startup_items=startup_items)
         return {
             "startup_items": startup_items,
             "count": len(startup_items),
+            "collectors": dict(last_collector_stats),
             "timestamp": int(time.time())
         }
     except Exception as e:
@@ -200,7 +501,7 @@ def get_file_integrity():
     """Get file integrity checks"""
     try:
         import platform
-        from security.integrity import get_critical_files
+        from security.integrity import get_critical_files, scan_file_integrity
         
         critical_files = get_critical_files()
         file_integrity = scan_file_integrity(critical_files)
@@ -214,13 +515,97 @@ def get_file_integrity():
         raise HTTPException(status_code=500, detail=f"Failed to check file integrity: {str(e)}")
 
 
+# ==================== PROFILING ENDPOINTS ====================
+
+@app.get("/api/profiles")
+def list_profiles():
+    """List stored scan profiles (?profile=1 on /api/scan/* creates them)"""
+    if not profiling.ENABLED:
+        raise HTTPException(status_code=403, detail="Profiling is disabled (PROFILING=false)")
+    profiles = profiling.list_profiles()
+    return {
+        "profiles": profiles,
+        "count": len(profiles)
+    }
+
+
+@app.get("/api/profiles/{artifact}")
+def download_profile(artifact: str):
+    """Download a stored profile (.prof for pstats/snakeviz, .collapsed for flame graphs)"""
+    if not profiling.ENABLED:
+        raise HTTPException(status_code=403, detail="Profiling is disabled (PROFILING=false)")
+    path = profiling.profile_path(artifact)
+    if not path:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, filename=artifact, media_type="application/octet-stream")
+
+
+# ==================== METRICS ENDPOINTS ====================
+
+@app.get("/api/metrics/series")
+def list_metric_series(kind: str = None):
+    """List the process/port/host series currently being sampled"""
+    try:
+        series = metrics_store.list_series(kind)
+        return {
+            "series": series,
+            "count": len(series),
+            "timestamp": int(time.time())
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to list metric series: {str(e)}")
+
+
+@app.get("/api/metrics/history")
+def get_metrics_history(
+    series: str = "host",
+    start: float = Query(None, alias="from"),
+    end: float = Query(None, alias="to")
+):
+    """
+    Get the history of a series between two Unix timestamps
+
+    Older points are downsampled buckets from SQLite; the most recent
+    ones are raw samples from memory.
+    """
+    try:
+        if start is None:
+            start = time.time() - 3600
+        return metrics_store.history(series, start=start, end=end)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get metrics history: {str(e)}")
+
+
+@app.get("/api/anomalies")
+def get_anomalies(scan: bool = False):
+    """
+    Get the latest behavioural anomalies found by the background sampler
+
+    ?scan=true also scores a fresh process scan (per process name)
+    against the learned history without updating it.
+    """
+    from security.processes import scan_processes
+    
+    try:
+        result = anomaly_detector.status()
+        if scan:
+            result["process_scores"] = anomaly_detector.score_snapshot(scan_processes())
+        return {
+            **result,
+            "timestamp": int(time.time())
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get anomalies: {str(e)}")
+
+
 # ==================== BASELINE ENDPOINTS ====================
 
 @app.post("/api/baseline/create")
 def create_baseline(name: str, description: str = ""):
     """Create a new baseline of the current system state"""
     try:
-        baseline = baseline_manager.create_baseline(name, description)
+        with scan_lock:
+            baseline = baseline_manager.create_baseline(name, description)
         return {
             "success": True,
             "baseline": baseline,
@@ -230,11 +615,34 @@ def create_baseline(name: str, description: str = ""):
         raise HTTPException(status_code=500, detail=f"Failed to create baseline: {str(e)}")
 
 
+def _split_param(value: str):
+    """Split a comma-separated query parameter (None stays None)"""
+    if value is None:
+        return None
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+
 @app.get("/api/baseline/active")
-def get_active_baseline():
-    """Get the currently active baseline"""
+def get_active_baseline(
+    sections: str = None,
+    fields: str = None,
+    limit: int = Query(None, ge=1),
+    offset: int = Query(0, ge=0)
+):
+    """
+    Get the currently active baseline
+    
+    Use ?sections=ports,processes to load only some sections (empty for
+    metadata only), ?fields=local_port,risk_level to project item fields
+    and limit/offset to paginate inside each section.
+    """
     try:
-        baseline = baseline_manager.get_active_baseline()
+        baseline = baseline_manager.get_active_baseline(
+            sections=_split_param(sections),
+            fields=_split_param(fields),
+            limit=limit,
+            offset=offset
+        )
         if not baseline:
             return {
                 "exists": False,
@@ -244,10 +652,27 @@ def get_active_baseline():
             "exists": True,
             "baseline": baseline
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get active baseline: {str(e)}")
 
 
+@app.get("/api/baseline/drift")
+def get_drift_status():
+    """Get background drift check status and recent drift alerts"""
+    return drift_scheduler.status()
+
+
+@app.post("/api/baseline/drift/check")
+def run_drift_check():
+    """Run a drift check now (waits for any running full scan)"""
+    try:
+        return drift_scheduler.run_check(blocking=True)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Drift check failed: {str(e)}")
+
+
 @app.get("/api/baseline/list")
 def list_baselines():
     """List all baselines"""
@@ -262,19 +687,71 @@ def list_baselines():
 
 
 @app.get("/api/baseline/{baseline_id}")
-def get_baseline(baseline_id: int):
-    """Get a specific baseline"""
+def get_baseline(
+    baseline_id: int,
+    sections: str = None,
+    fields: str = None,
+    limit: int = Query(None, ge=1),
+    offset: int = Query(0, ge=0)
+):
+    """Get a specific baseline (same filters as /api/baseline/active)"""
     try:
-        baseline = baseline_manager.get_baseline(baseline_id)
+        baseline = baseline_manager.get_baseline(
+            baseline_id,
+            sections=_split_param(sections),
+            fields=_split_param(fields),
+            limit=limit,
+            offset=offset
+        )
         if not baseline:
             raise HTTPException(status_code=404, detail="Baseline not found")
         return baseline
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get baseline: {str(e)}")
 
 
+@app.get("/api/baseline/{baseline_id}/comparisons")
+def get_comparison_history(
+    baseline_id: int,
+    start: str = Query(None, alias="from"),
+    end: str = Query(None, alias="to"),
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    include_differences: bool = False
+):
+    """Get the comparison history of a baseline (summaries only by default)"""
+    try:
+        return baseline_manager.get_comparison_history(
+            baseline_id,
+            start=start,
+            end=end,
+            limit=limit,
+            offset=offset,
+            include_differences=include_differences
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get comparison history: {str(e)}")
+
+
+@app.post("/api/baseline/comparisons/retention")
+def apply_comparison_retention():
+    """Prune and downsample stored baseline comparisons"""
+    try:
+        result = baseline_manager.apply_retention()
+        return {
+            "success": True,
+            **result
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to apply retention: {str(e)}")
+
+
 @app.post("/api/baseline/{baseline_id}/activate")
 def activate_baseline(baseline_id: int):
     """Set a baseline as active"""
@@ -305,7 +782,8 @@ def delete_baseline(baseline_id: int):
 def compare_with_baseline(baseline_id: int = None):
     """Compare current system state with baseline"""
     try:
-        comparison = baseline_manager.compare_with_baseline(baseline_id)
+        with scan_lock:
+            comparison = baseline_manager.compare_with_baseline(baseline_id)
         return comparison
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -313,16 +791,296 @@ def compare_with_baseline(baseline_id: int = None):
         raise HTTPException(status_code=500, detail=f"Failed to compare with baseline: {str(e)}")
 
 
+# ==================== FLEET ENDPOINTS ====================
+
+def _require_fleet():
+    if not fleet.ENABLED:
+        raise HTTPException(status_code=404, detail="Fleet mode is disabled (FLEET_ENABLED=false)")
+
+
+async def _read_fleet_body(request: Request) -> bytes:
+    """Read the request body, refusing it once it exceeds FLEET_MAX_PAYLOAD_BYTES as sent"""
+    limit = fleet.MAX_PAYLOAD_BYTES
+    too_large = HTTPException(status_code=413, detail=f"Payload exceeds {limit} bytes")
+    
+    length = request.headers.get("content-length")
+    if length is not None:
+        if not length.isdigit():
+            raise HTTPException(status_code=400, detail="Invalid Content-Length")
+        if int(length) > limit:
+            raise too_large
+    
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > limit:
+            raise too_large
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+@app.post("/api/fleet/ingest")
+async def fleet_ingest(request: Request):
+    """
+    Receive a snapshot pushed by an agent (python agent.py --output fleet:<url>)
+
+    The body is gzip-compressed JSON with either the full snapshot or a
+    delta against the host's previous one. A delta that does not apply
+    returns 409 and the agent resends the full snapshot.
+    """
+    _require_fleet()
+    if not fleet.TOKEN:
+        raise HTTPException(status_code=503, detail="Fleet ingest needs FLEET_TOKEN to be set on the server")
+    if not fleet.check_token(request.headers.get("authorization")):
+        raise HTTPException(status_code=401, detail="Invalid fleet token")
+    
+    # Compressed bodies are capped too, before anything is inflated
+    body = await _read_fleet_body(request)
+    try:
+        payload = await run_in_threadpool(fleet.decode_payload, body, request.headers.get("content-encoding"))
+        return await run_in_threadpool(fleet_store.ingest, payload, len(body))
+    except DeltaMismatch as e:
+        return JSONResponse(status_code=409, content={"detail": str(e), "expected_seq": e.expected_seq})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to ingest snapshot: {str(e)}")
+
+
+@app.get("/api/fleet/hosts")
+def list_fleet_hosts():
+    """List hosts that pushed snapshots, lowest security score first"""
+    _require_fleet()
+    try:
+        hosts = fleet_store.list_hosts()
+        return {
+            "hosts": hosts,
+            "count": len(hosts),
+            "summary": fleet_store.summary(),
+            "timestamp": int(time.time())
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to list fleet hosts: {str(e)}")
+
+
+@app.get("/api/fleet/hosts/{host_id}")
+def get_fleet_host(host_id: str, limit: int = 50):
+    """Latest metrics and alerts of a host plus its snapshot history"""
+    _require_fleet()
+    try:
+        host = fleet_store.get_host(host_id)
+        if not host:
+            raise HTTPException(status_code=404, detail="Host not found")
+        host["snapshots"] = fleet_store.list_snapshots(host_id, limit=limit)
+        return host
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get fleet host: {str(e)}")
+
+
+@app.get("/api/fleet/snapshots/{snapshot_id}")
+def get_fleet_snapshot(snapshot_id: int):
+    """Full data of a stored snapshot (rebuilt from its keyframe and deltas)"""
+    _require_fleet()
+    try:
+        snapshot = fleet_store.get_snapshot(snapshot_id)
+        if not snapshot:
+            raise HTTPException(status_code=404, detail="Snapshot not found")
+        return snapshot
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get fleet snapshot: {str(e)}")
+
+
+@app.get("/api/fleet/search")
+def search_fleet(
+    kind: str,
+    value: str,
+    history: bool = False,
+    prefix: bool = False,
+    limit: int = Query(1000, ge=1, le=100000)
+):
+    """
+    Look a term up in the fleet index
+
+    kind is one of process, hash, port, remote or startup, e.g.
+    ?kind=hash&value=sha256:... or ?kind=port&value=31337. With
+    ?history=true hosts where the term was present in the past are
+    returned too, with the snapshots it was seen in.
+    """
+    _require_fleet()
+    try:
+        postings = fleet_store.search(kind, value, history=history, prefix=prefix, limit=limit)
+        return {
+            "kind": kind,
+            "value": value,
+            "postings": postings,
+            "count": len(postings),
+            "hosts": len({posting["host_id"] for posting in postings}),
+            "timestamp": int(time.time())
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to search fleet index: {str(e)}")
+
+
+@app.get("/api/fleet/ports/{port}")
+def get_fleet_port(port: int, status: str = "LISTEN"):
+    """
+    Hosts with a socket on a local port, e.g. which hosts listen on 4444
+
+    ?status=any matches every socket state.
+    """
+    _require_fleet()
+    try:
+        hosts = fleet_store.hosts_with_port(port, status=None if status == "any" else status)
+        return {
+            "port": port,
+            "hosts": hosts,
+            "count": len(hosts),
+            "timestamp": int(time.time())
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to query fleet ports: {str(e)}")
+
+
+@app.get("/api/fleet/alerts")
+def get_fleet_alerts(severity: str = None, limit: int = 500):
+    """Current alerts across all hosts, most severe first"""
+    _require_fleet()
+    try:
+        alerts = fleet_store.fleet_alerts(severity=severity, limit=limit)
+        return {
+            "alerts": alerts,
+            "count": len(alerts),
+            "timestamp": int(time.time())
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get fleet alerts: {str(e)}")
+
+
+# ==================== EXPORT ENDPOINTS ====================
+
+def _export_response(rows, fmt: str, name: str) -> StreamingResponse:
+    """Stream rows as a file download in an already resolved format"""
+    return StreamingResponse(
+        export.stream_export(rows, fmt),
+        media_type=export.media_type(fmt),
+        headers={"Content-Disposition": f'attachment; filename="{export.export_filename(name, fmt)}"'}
+    )
+
+
+@app.get("/api/export/formats")
+def list_export_formats():
+    """Export formats available on this server (Parquet/Arrow need pyarrow, MessagePack needs msgpack)"""
+    return {
+        "formats": export.available_formats(),
+        "default": export.resolve_format(None),
+        "columns": [{"name": name, "type": kind} for name, kind in export.EXPORT_COLUMNS]
+    }
+
+
+@app.get("/api/export/baseline/{baseline_id}")
+def export_baseline(baseline_id: int, sections: str = None, fmt: str = Query(None, alias="format")):
+    """
+    Download a baseline, one row per item
+    
+    ?format=parquet|arrow|msgpack|ndjson (default: best available) and
+    ?sections=processes,ports to export only some sections.
+    """
+    try:
+        fmt = export.resolve_format(fmt)
+        if not baseline_manager.get_baseline(baseline_id, sections=[]):
+            raise HTTPException(status_code=404, detail="Baseline not found")
+        rows = export.baseline_rows(baseline_manager, baseline_id, export.check_sections(_split_param(sections)))
+        return _export_response(rows, fmt, f"baseline-{baseline_id}")
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to export baseline: {str(e)}")
+
+
+@app.get("/api/export/fleet")
+def export_fleet_snapshots(
+    host_id: str = None,
+    since: float = None,
+    until: float = None,
+    sections: str = None,
+    fmt: str = Query(None, alias="format")
+):
+    """
+    Download fleet snapshot history, one row per item per snapshot
+    
+    Filter with ?host_id=, ?since= and ?until= (epoch seconds, by receive
+    time) and ?sections=. The file is written while deltas are replayed,
+    so long histories are streamed without being held in memory.
+    """
+    _require_fleet()
+    try:
+        fmt = export.resolve_format(fmt)
+        if host_id and not fleet_store.get_host(host_id):
+            raise HTTPException(status_code=404, detail="Host not found")
+        sections = export.check_sections(_split_param(sections))
+        rows = export.fleet_rows(fleet_store, host_id=host_id, since=since, until=until, sections=sections)
+        return _export_response(rows, fmt, f"fleet-{host_id}" if host_id else "fleet")
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to export fleet snapshots: {str(e)}")
+
+
+@app.get("/api/export/scan-jobs/{job_id}")
+def export_scan_job(job_id: int, fmt: str = Query(None, alias="format")):
+    """Download the files hashed by a scan job, one row per file"""
+    try:
+        fmt = export.resolve_format(fmt)
+        if not scan_job_manager.get_job(job_id):
+            raise HTTPException(status_code=404, detail="Scan job not found")
+        return _export_response(export.scan_job_rows(scan_job_manager, job_id), fmt, f"scan-job-{job_id}")
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to export scan job: {str(e)}")
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Stage and request metrics in Prometheus text format"""
+    if not instrumentation.ENABLED:
+        raise HTTPException(status_code=404, detail="Instrumentation is disabled (INSTRUMENTATION=false)")
+    return PlainTextResponse(
+        instrumentation.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 @app.get("/health")
 def health_check():
-    """Health check endpoint"""
+    """Health check endpoint (degraded while the background sampler is failing)"""
+    sampler = process_sampler.status()
+    failing = sampler["last_run"] is not None and sampler["last_run"]["status"] == "error"
     return {
-        "status": "healthy",
+        "status": "degraded" if failing else "healthy",
+        "sampler": sampler,
+        "worker_pool": worker_pool.status(),
         "timestamp": datetime.now().isoformat()
     }
 
 
 if __name__ == "__main__":
+    # Only needed when run directly; `uvicorn main:app` imports it itself
+    import uvicorn
+    
     print("🛡️  BabyPluto Security Scanner API")
     print("=" * 50)
     print(f"Starting server on http://0.0.0.0:8000")
@@ -0,0 +1,151 @@
+"""
+Security Analytics Module
+Vectorized generate_metrics/calculate_security_score over many scan snapshots
+
+Kept apart from the analyzer so that only batch callers load numpy.
+"""
+
+from typing import List, Dict
+from itertools import chain, repeat
+import time
+
+import numpy as np
+
+from .analyzer import RISK_LEVELS, RISK_CODES, SNAPSHOT_SECTIONS
+
+
+def load_snapshot_columns(snapshots: List[Dict]) -> Dict:
+    """
+    Load the risk_level and status fields of many scan snapshots into arrays
+
+    Extracting fields from dicts is the only per-item Python work of the
+    batch path; the result can be kept and scored repeatedly.
+
+    Args:
+        snapshots: Dicts with 'processes', 'ports', 'startup_items' and
+            'file_integrity' lists (missing sections count as empty) and
+            an optional 'timestamp'
+
+    Returns:
+        {'count', 'timestamps', <section>: {'owners', 'risks', 'flagged'}}
+        where owners is the snapshot index of each item, risks its
+        RISK_CODES value (-1 if unknown) and flagged whether its status
+        is counted (LISTEN ports, modified/missing files)
+    """
+    flagged = {'ports': ('LISTEN',), 'file_integrity': ('modified', 'missing')}
+    now = int(time.time())
+
+    columns = {
+        'count': len(snapshots),
+        'timestamps': np.array([snapshot.get('timestamp', now) for snapshot in snapshots], dtype=np.int64),
+    }
+    for section in SNAPSHOT_SECTIONS:
+        columns[section] = _load_section(snapshots, section, flagged.get(section))
+
+    return columns
+
+
+def generate_metrics_batch(snapshots) -> Dict[str, np.ndarray]:
+    """
+    Vectorized generate_metrics for many scan snapshots at once
+
+    Each metric is a single bincount over the flat item columns.
+
+    Args:
+        snapshots: List of snapshot dicts, or the output of
+            load_snapshot_columns
+
+    Returns:
+        Dictionary of arrays with one entry per snapshot, keyed like
+        generate_metrics; alerts_count has shape (len(snapshots), 4)
+        in RISK_LEVELS order
+    """
+    columns = snapshots if isinstance(snapshots, dict) else load_snapshot_columns(snapshots)
+    count = columns['count']
+
+    def per_snapshot(section: Dict, mask: np.ndarray) -> np.ndarray:
+        return np.bincount(section['owners'][mask], minlength=count)
+
+    processes = columns['processes']
+    ports = columns['ports']
+    startup = columns['startup_items']
+    files = columns['file_integrity']
+
+    # Aggregate risk levels of all sections
+    owners = np.concatenate([columns[section]['owners'] for section in SNAPSHOT_SECTIONS])
+    risks = np.concatenate([columns[section]['risks'] for section in SNAPSHOT_SECTIONS])
+    known = risks >= 0
+    alerts_count = np.bincount(
+        owners[known] * len(RISK_LEVELS) + risks[known],
+        minlength=count * len(RISK_LEVELS)
+    ).reshape(count, len(RISK_LEVELS))
+
+    return {
+        'total_processes': np.bincount(processes['owners'], minlength=count),
+        'suspicious_processes': per_snapshot(processes, processes['risks'] >= RISK_CODES['medium']),
+        'open_ports': per_snapshot(ports, ports['flagged']),
+        'high_risk_ports': per_snapshot(ports, ports['risks'] == RISK_CODES['high']),
+        'startup_items': np.bincount(startup['owners'], minlength=count),
+        'suspicious_startup': per_snapshot(startup, startup['risks'] >= RISK_CODES['medium']),
+        'file_changes': per_snapshot(files, files['flagged']),
+        'alerts_count': alerts_count,
+        'last_scan': columns['timestamps'],
+    }
+
+
+def calculate_security_scores(metrics: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    Vectorized calculate_security_score
+
+    Args:
+        metrics: Output of generate_metrics_batch (or any dict of
+            equal-length count arrays with the same keys)
+
+    Returns:
+        Array of security scores (0-100), one per snapshot
+    """
+    score = 100 - np.minimum(np.asarray(metrics['suspicious_processes']) * 10, 30)
+    score -= np.minimum(np.asarray(metrics['high_risk_ports']) * 15, 40)
+    score -= np.minimum(np.asarray(metrics['suspicious_startup']) * 5, 15)
+    score -= np.minimum(np.asarray(metrics['file_changes']) * 20, 40)
+    return np.maximum(score, 0)
+
+
+def metrics_records(metrics: Dict[str, np.ndarray]) -> List[Dict]:
+    """
+    Convert generate_metrics_batch output to generate_metrics dicts
+
+    Args:
+        metrics: Output of generate_metrics_batch
+
+    Returns:
+        One metrics dictionary per snapshot
+    """
+    scalars = {key: values.tolist() for key, values in metrics.items() if key != 'alerts_count'}
+    alerts = metrics['alerts_count'].tolist()
+    return [
+        {
+            **{key: values[i] for key, values in scalars.items()},
+            'alerts_count': dict(zip(RISK_LEVELS, alerts[i]))
+        }
+        for i in range(len(alerts))
+    ]
+
+
+def _load_section(snapshots: List[Dict], section: str, flagged_statuses=None) -> Dict[str, np.ndarray]:
+    """Flatten one section of every snapshot into owners/risks/flagged columns"""
+    sizes = [len(snapshot.get(section) or ()) for snapshot in snapshots]
+    items = list(chain.from_iterable(snapshot.get(section) or () for snapshot in snapshots))
+    levels = [item.get('risk_level', 'safe') for item in items]
+
+    if flagged_statuses:
+        flagged = np.fromiter((item.get('status') in flagged_statuses for item in items),
+                              dtype=bool, count=len(items))
+    else:
+        flagged = np.zeros(len(items), dtype=bool)
+
+    return {
+        'owners': np.repeat(np.arange(len(snapshots)), sizes),
+        'risks': np.fromiter(map(RISK_CODES.get, levels, repeat(-1)), dtype=np.int64, count=len(levels)),
+        'flagged': flagged,
+    }
@@ -7,7 +7,17 @@ from typing import List, Dict
 import time
 import uuid
 
+from .instrumentation import instrument
 
+
+# Column order of alerts_count in batch results (security.analytics)
+RISK_LEVELS = ('safe', 'low', 'medium', 'high')
+RISK_CODES = {level: code for code, level in enumerate(RISK_LEVELS)}
+
+SNAPSHOT_SECTIONS = ('processes', 'ports', 'startup_items', 'file_integrity')
+
+
+@instrument('analyzer.metrics')
 def generate_metrics(
     processes: List[Dict],
     ports: List[Dict],
@@ -67,6 +77,7 @@ def generate_metrics(
     }
 
 
+@instrument('analyzer.alerts')
 def generate_alerts(
     processes: List[Dict],
     ports: List[Dict],
@@ -183,6 +194,7 @@ def generate_alerts(
     return alerts
 
 
+@instrument('analyzer.score')
 def calculate_security_score(metrics: Dict) -> int:
     """
     Calculate an overall security score (0-100)
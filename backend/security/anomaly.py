@@ -0,0 +1,432 @@
+"""
+Anomaly Detection Module
+Streaming per-host and per-process statistics for behavioural anomaly scoring
+"""
+
+import os
+import threading
+import time
+import uuid
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+# numpy is imported where it is used, so the API starts without it
+if TYPE_CHECKING:
+    import numpy as np
+
+
+# Metrics tracked per process name (all instances of a name are summed)
+PROCESS_METRICS = ('cpu_percent', 'memory_percent', 'connections', 'instances')
+
+# Metrics tracked for the whole host; spawn_rate is new processes per minute
+HOST_METRICS = ('cpu_percent', 'memory_percent', 'processes', 'connections', 'spawn_rate')
+
+# Smallest standard deviation used for z-scores, so a process that has
+# always idled at 0% does not become "infinitely" anomalous at 1%
+MIN_STD = {
+    'cpu_percent': 2.0,
+    'memory_percent': 0.5,
+    'connections': 2.0,
+    'instances': 1.0,
+    'processes': 5.0,
+    'spawn_rate': 5.0,
+}
+
+
+class StatsBank:
+    """
+    Exponentially weighted statistics for many keys, stored as NumPy arrays
+
+    Each key owns one row holding, per metric, the EWMA mean, EW variance
+    and a streaming upper-quantile estimate. Updating or scoring a whole
+    snapshot is a handful of vectorized operations, and the cost per
+    sample is O(1) regardless of how much history has been seen.
+
+    Rows of keys that stop being updated are freed by evict() and reused.
+    The arrays are allocated on first use.
+    """
+
+    def __init__(
+        self,
+        metrics: Sequence[str],
+        alpha: float = 0.05,
+        quantile: float = 0.95,
+        warmup: int = 30,
+        capacity: int = 256
+    ):
+        """
+        Args:
+            metrics: Metric names (columns)
+            alpha: EWMA smoothing factor (higher forgets faster)
+            quantile: Upper quantile to track per metric
+            warmup: Samples a key needs before it can be scored
+            capacity: Initial number of key rows (grows as needed)
+        """
+        self.metrics = tuple(metrics)
+        self.alpha = alpha
+        self.quantile = quantile
+        self.warmup = warmup
+        self.capacity = capacity
+
+        self.slots: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._allocated = False
+
+    def _allocate(self):
+        """Create the statistics arrays"""
+        import numpy as np
+
+        width = len(self.metrics)
+        self.min_std = np.array([MIN_STD.get(metric, 1.0) for metric in self.metrics])
+        self.mean = np.zeros((self.capacity, width))
+        self.var = np.zeros((self.capacity, width))
+        self.upper = np.zeros((self.capacity, width))
+        self.count = np.zeros(self.capacity, dtype=np.int64)
+        # Time each row was last updated
+        self.seen = np.zeros(self.capacity)
+        self._allocated = True
+
+    def indices(self, keys: Sequence[str]) -> 'np.ndarray':
+        """Row index of each key, allocating rows for new keys"""
+        import numpy as np
+
+        if not self._allocated:
+            self._allocate()
+        rows = np.empty(len(keys), dtype=np.intp)
+        for i, key in enumerate(keys):
+            slot = self.slots.get(key)
+            if slot is None:
+                slot = self._free.pop() if self._free else len(self.slots)
+                self.slots[key] = slot
+                if slot >= len(self.count):
+                    self._grow()
+            rows[i] = slot
+        return rows
+
+    def evict(self, before: float, max_keys: Optional[int] = None) -> int:
+        """
+        Free the rows of keys not updated since `before`, then the least
+        recently updated ones beyond max_keys
+
+        Args:
+            before: Unix time; keys last updated earlier are forgotten
+            max_keys: Most keys to keep (None for no limit)
+
+        Returns:
+            Number of keys evicted
+        """
+        import numpy as np
+
+        if not self.slots:
+            return 0
+
+        keys = list(self.slots)
+        seen = self.seen[np.fromiter(self.slots.values(), dtype=np.intp, count=len(keys))]
+        stale = int((seen < before).sum())
+        excess = len(keys) - max_keys if max_keys is not None else 0
+        evicted = max(stale, excess)
+        if evicted <= 0:
+            return 0
+
+        # Least recently updated first
+        for index in np.argsort(seen, kind='stable')[:evicted]:
+            slot = self.slots.pop(keys[index])
+            self.count[slot] = 0
+            self._free.append(slot)
+        return evicted
+
+    def score(self, rows: 'np.ndarray', values: 'np.ndarray') -> 'np.ndarray':
+        """
+        One-sided z-scores of values against each row's history
+
+        Args:
+            rows: Row indices (unique)
+            values: Array of shape (len(rows), len(metrics))
+
+        Returns:
+            z-scores of the same shape; 0 for rows still warming up
+        """
+        import numpy as np
+
+        std = np.maximum(np.sqrt(self.var[rows]), self.min_std)
+        z = (values - self.mean[rows]) / std
+        z[self.count[rows] < self.warmup] = 0.0
+        return np.maximum(z, 0.0)
+
+    def update(self, rows: 'np.ndarray', values: 'np.ndarray', timestamp: Optional[float] = None):
+        """
+        Fold one sample per row into the statistics
+
+        Args:
+            rows: Row indices (unique)
+            values: Array of shape (len(rows), len(metrics))
+            timestamp: Unix time of the sample (default now)
+        """
+        import numpy as np
+
+        first = (self.count[rows] == 0)[:, None]
+        mean = self.mean[rows]
+        diff = values - mean
+        increment = self.alpha * diff
+        var = (1 - self.alpha) * (self.var[rows] + diff * increment)
+
+        # Stochastic quantile tracking: step up by q, down by (1 - q),
+        # scaled to the spread of the metric
+        upper = self.upper[rows]
+        step = self.alpha * np.maximum(np.sqrt(var), self.min_std)
+        upper = upper + step * (self.quantile - (values <= upper))
+
+        self.mean[rows] = np.where(first, values, mean + increment)
+        self.var[rows] = np.where(first, 0.0, var)
+        self.upper[rows] = np.where(first, values, upper)
+        self.count[rows] += 1
+        self.seen[rows] = timestamp if timestamp is not None else time.time()
+
+    def describe(self, key: str) -> Optional[Dict]:
+        """Current statistics of a key, per metric"""
+        import numpy as np
+
+        slot = self.slots.get(key)
+        if slot is None:
+            return None
+        return {
+            'samples': int(self.count[slot]),
+            'metrics': {
+                metric: {
+                    'mean': round(float(self.mean[slot, i]), 2),
+                    'std': round(float(np.sqrt(self.var[slot, i])), 2),
+                    'p95': round(float(self.upper[slot, i]), 2),
+                }
+                for i, metric in enumerate(self.metrics)
+            }
+        }
+
+    def _grow(self):
+        """Double the number of rows"""
+        import numpy as np
+
+        capacity = len(self.count) * 2
+        for name in ('mean', 'var', 'upper'):
+            current = getattr(self, name)
+            grown = np.zeros((capacity, current.shape[1]))
+            grown[:len(current)] = current
+            setattr(self, name, grown)
+        for name, dtype in (('count', np.int64), ('seen', float)):
+            current = getattr(self, name)
+            grown = np.zeros(capacity, dtype=dtype)
+            grown[:len(current)] = current
+            setattr(self, name, grown)
+
+
+class AnomalyDetector:
+    """
+    Flags process and host behaviour that deviates from this host's history
+
+    Fed by the background sampler. Every sample is scored against the
+    statistics accumulated so far (before being folded in), and metrics
+    whose z-score reaches the threshold are reported as findings.
+    Process names not seen for forget_days, and the least recently seen
+    ones beyond max_processes, are forgotten.
+    """
+
+    def __init__(
+        self,
+        alpha: float = 0.05,
+        threshold: float = 4.0,
+        warmup: int = 30,
+        forget_days: float = 7,
+        max_processes: int = 5000
+    ):
+        """
+        Args:
+            alpha: EWMA smoothing factor
+            threshold: z-score at which a metric is anomalous
+                (twice the threshold is reported as high severity)
+            warmup: Samples needed before a key is scored
+            forget_days: Days after which an unseen process name is forgotten
+            max_processes: Most process names to keep statistics for
+        """
+        self.threshold = threshold
+        self.forget_days = forget_days
+        self.max_processes = max_processes
+        self.processes = StatsBank(PROCESS_METRICS, alpha=alpha, warmup=warmup)
+        self.host = StatsBank(HOST_METRICS, alpha=alpha, warmup=warmup)
+
+        self.findings: List[Dict] = []
+        self.observed_at: Optional[float] = None
+        self._seen: set = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> 'AnomalyDetector':
+        """Build a detector configured from ANOMALY_* environment variables"""
+        return cls(
+            alpha=float(os.environ.get('ANOMALY_ALPHA', 0.05)),
+            threshold=float(os.environ.get('ANOMALY_Z_THRESHOLD', 4.0)),
+            warmup=int(os.environ.get('ANOMALY_WARMUP', 30)),
+            forget_days=float(os.environ.get('ANOMALY_FORGET_DAYS', 7)),
+            max_processes=int(os.environ.get('ANOMALY_MAX_PROCESSES', 5000)),
+        )
+
+    def observe(
+        self,
+        timestamp: float,
+        processes: Dict[int, Dict],
+        connections: Dict[int, int],
+        host: Dict[str, float]
+    ) -> List[Dict]:
+        """
+        Score one sample, then update the statistics with it
+
+        Args:
+            timestamp: Unix time of the sample
+            processes: pid -> {'name', 'create_time', 'cpu_percent', 'memory_percent'}
+            connections: pid -> socket count
+            host: Values for HOST_METRICS except spawn_rate
+
+        Returns:
+            Findings for this sample
+        """
+        import numpy as np
+
+        names, values = aggregate_by_name(processes, connections)
+
+        with self._lock:
+            # New (pid, create_time) identities since the previous sample
+            identities = {(pid, usage.get('create_time')) for pid, usage in processes.items()}
+            spawned = len(identities - self._seen)
+            elapsed = timestamp - self.observed_at if self.observed_at else 0
+            spawn_rate = spawned * 60.0 / elapsed if elapsed > 0 else 0.0
+            self._seen = identities
+
+            host_values = np.array([[*(host[m] for m in HOST_METRICS[:-1]), spawn_rate]], dtype=float)
+
+            findings = []
+            if names:
+                rows = self.processes.indices(names)
+                findings += self._findings('process', names, rows, values, self.processes)
+                self.processes.update(rows, values, timestamp)
+            self.processes.evict(timestamp - self.forget_days * 86400, self.max_processes)
+
+            host_rows = self.host.indices(['host'])
+            if elapsed > 0:
+                findings += self._findings('host', ['host'], host_rows, host_values, self.host)
+                self.host.update(host_rows, host_values, timestamp)
+
+            findings.sort(key=lambda finding: -finding['z_score'])
+            self.findings = findings
+            self.observed_at = timestamp
+
+        return findings
+
+    def score_snapshot(self, processes: List[Dict], connections: Optional[Dict[int, int]] = None) -> Dict[str, float]:
+        """
+        Anomaly score of each process name in a scan, without learning from it
+
+        Args:
+            processes: Output of scan_processes()
+            connections: Optional pid -> socket count
+
+        Returns:
+            name -> highest z-score across its metrics
+        """
+        snapshot = {proc['pid']: proc for proc in processes}
+        names, values = aggregate_by_name(snapshot, connections or {})
+
+        with self._lock:
+            known = [i for i, name in enumerate(names) if name in self.processes.slots]
+            if not known:
+                return {}
+            rows = self.processes.indices([names[i] for i in known])
+            z = self.processes.score(rows, values[known]).max(axis=1)
+
+        return {names[i]: round(float(score), 2) for i, score in zip(known, z)}
+
+    def alerts(self) -> List[Dict]:
+        """Latest findings in the same format as analyzer.generate_alerts"""
+        timestamp = int(time.time())
+        alerts = []
+
+        with self._lock:
+            findings = list(self.findings)
+
+        for finding in findings:
+            subject = 'Host' if finding['kind'] == 'host' else f"Process '{finding['key']}'"
+            alerts.append({
+                'id': str(uuid.uuid4()),
+                'type': 'network' if finding['metric'] == 'connections' else 'process',
+                'severity': finding['severity'],
+                'title': f"Unusual {finding['metric'].replace('_', ' ')}: {finding['key']}",
+                'description': f"{subject} {finding['metric']} is {finding['value']:.1f}, "
+                              f"usually {finding['mean']:.1f} (p95 {finding['p95']:.1f}, z={finding['z_score']:.1f}).",
+                'timestamp': timestamp,
+                'resolved': False
+            })
+
+        return alerts
+
+    def status(self) -> Dict:
+        """Configuration, learned host profile and latest findings"""
+        with self._lock:
+            return {
+                'threshold': self.threshold,
+                'warmup': self.processes.warmup,
+                'observed_at': self.observed_at,
+                'tracked_processes': len(self.processes.slots),
+                'host': self.host.describe('host'),
+                'findings': list(self.findings),
+            }
+
+    def _findings(
+        self,
+        kind: str,
+        keys: List[str],
+        rows: 'np.ndarray',
+        values: 'np.ndarray',
+        bank: StatsBank
+    ) -> List[Dict]:
+        """Findings for every (key, metric) whose z-score reaches the threshold"""
+        import numpy as np
+
+        z = bank.score(rows, values)
+        findings = []
+
+        for i, j in np.argwhere(z >= self.threshold):
+            row = rows[i]
+            findings.append({
+                'kind': kind,
+                'key': keys[i],
+                'metric': bank.metrics[j],
+                'value': round(float(values[i, j]), 2),
+                'mean': round(float(bank.mean[row, j]), 2),
+                'p95': round(float(bank.upper[row, j]), 2),
+                'z_score': round(float(z[i, j]), 2),
+                'severity': 'high' if z[i, j] >= 2 * self.threshold else 'medium',
+            })
+
+        return findings
+
+
+def aggregate_by_name(processes: Dict[int, Dict], connections: Dict[int, int]) -> Tuple[List[str], 'np.ndarray']:
+    """
+    Sum the metrics of all instances of each process name
+
+    Args:
+        processes: pid -> dict with 'name', 'cpu_percent', 'memory_percent'
+        connections: pid -> socket count
+
+    Returns:
+        (names, values) with values of shape (len(names), len(PROCESS_METRICS))
+    """
+    import numpy as np
+
+    totals: Dict[str, List[float]] = {}
+    for pid, usage in processes.items():
+        row = totals.setdefault(usage.get('name') or f"pid-{pid}", [0.0, 0.0, 0.0, 0.0])
+        row[0] += usage.get('cpu_percent') or 0.0
+        row[1] += usage.get('memory_percent') or 0.0
+        row[2] += connections.get(pid, 0)
+        row[3] += 1
+
+    names = list(totals)
+    values = np.array([totals[name] for name in names], dtype=float).reshape(len(names), len(PROCESS_METRICS))
+    return names, values
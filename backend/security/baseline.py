@@ -3,22 +3,80 @@ Sistema de Baseline para BabyPluto
 Permite crear, guardar y comparar estados del sistema
 """
 
+import hashlib
 import json
 import sqlite3
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timezone
 from typing import Dict, List, Any, Optional
 from pathlib import Path
 
-from .processes import scan_processes
-from .ports import scan_ports
-from .startup import scan_startup_items
-from .integrity import scan_file_integrity, get_critical_files
+from .instrumentation import instrument
+
+
+# Identidad compuesta de cada tipo de item al comparar. El usuario no forma
+# parte de la identidad de un proceso: un cambio de dueño es una modificación
+COMPARISON_KEYS = {
+    "processes": ("name", "exe"),
+    "ports": ("protocol", "local_address", "local_port"),
+    "startup_items": ("location", "name"),
+}
+
+# Campos cuyo cambio marca un item como modificado
+TRACKED_FIELDS = {
+    "processes": ("username", "cmdline", "risk_level"),
+    "ports": ("process_name", "status", "risk_level"),
+    "startup_items": ("path", "enabled", "publisher", "executable_hash", "risk_level"),
+}
+
+RISK_ORDER = {"safe": 0, "low": 1, "medium": 2, "high": 3}
+
+# Secciones de datos guardadas en cada baseline (una columna JSON cada una)
+BASELINE_SECTIONS = ("processes", "ports", "startup_items", "file_integrity")
+BASELINE_META_COLUMNS = "id, name, description, created_at, is_active, metrics"
+
+
+# Política de retención por defecto del historial de comparaciones
+COMPARISON_MAX_AGE_DAYS = 90        # Borrar comparaciones más antiguas
+COMPARISON_DOWNSAMPLE_DAYS = 7      # Pasado este plazo, una por baseline y día
+COMPARISON_FULL_DIFFS = 50          # Comparaciones recientes que conservan el diff completo
 
 
 class BaselineManager:
-    def __init__(self, db_path: str = "data/baselines.db"):
+    def __init__(
+        self,
+        db_path: str = "data/baselines.db",
+        max_age_days: int = COMPARISON_MAX_AGE_DAYS,
+        downsample_after_days: int = COMPARISON_DOWNSAMPLE_DAYS,
+        keep_full_diffs: int = COMPARISON_FULL_DIFFS
+    ):
         self.db_path = db_path
-        self._init_database()
+        self.max_age_days = max_age_days
+        self.downsample_after_days = downsample_after_days
+        self.keep_full_diffs = keep_full_diffs
+        
+        # La retención recorre toda la tabla: como mucho una vez por hora, y
+        # no en la primera comparación tras arrancar
+        self._last_retention = time.time()
+        
+        # La base de datos se crea en el primer uso, no al importar
+        self._initialized = False
+        self._init_lock = threading.Lock()
+    
+    def ensure_database(self):
+        """Crear directorio y tablas si aún no se ha hecho"""
+        if self._initialized:
+            return
+        with self._init_lock:
+            if not self._initialized:
+                self._init_database()
+                self._initialized = True
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Abrir conexión asegurando que el esquema existe"""
+        self.ensure_database()
+        return sqlite3.connect(self.db_path)
     
     def _init_database(self):
         """Inicializar base de datos SQLite"""
@@ -47,18 +105,40 @@ class BaselineManager:
                     compared_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     differences TEXT,
                     risk_score REAL,
+                    summary TEXT,
                     FOREIGN KEY (baseline_id) REFERENCES baselines (id)
                 )
             """)
+            
+            # Migrar bases de datos anteriores sin columna de resumen
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(baseline_comparisons)")}
+            if "summary" not in columns:
+                conn.execute("ALTER TABLE baseline_comparisons ADD COLUMN summary TEXT")
+                rows = conn.execute("SELECT id, differences FROM baseline_comparisons").fetchall()
+                conn.executemany(
+                    "UPDATE baseline_comparisons SET summary = ? WHERE id = ?",
+                    [(json.dumps(json.loads(diff).get("summary", {})), row_id) for row_id, diff in rows if diff]
+                )
+            
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_comparisons_baseline_time
+                ON baseline_comparisons (baseline_id, compared_at)
+            """)
             conn.commit()
     
+    @instrument('baseline.create')
     def create_baseline(self, name: str, description: str = "") -> Dict[str, Any]:
         """Crear un nuevo baseline del estado actual del sistema"""
+        from .processes import scan_processes
+        from .ports import scan_open_ports
+        from .startup import scan_startup_items
+        from .integrity import scan_file_integrity, get_critical_files
+        
         print(f"Creating baseline: {name}")
         
         # Escanear estado actual
         processes = scan_processes()
-        ports = scan_ports()
+        ports = scan_open_ports()
         startup_items = scan_startup_items()
         
         # Escanear archivos críticos
@@ -87,7 +167,7 @@ class BaselineManager:
         }
         
         # Guardar en DB
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.execute("""
                 INSERT INTO baselines 
                 (name, description, processes, ports, startup_items, file_integrity, metrics, is_active)
@@ -113,44 +193,80 @@ class BaselineManager:
             **baseline_data
         }
     
-    def get_active_baseline(self) -> Optional[Dict[str, Any]]:
-        """Obtener el baseline activo"""
-        with sqlite3.connect(self.db_path) as conn:
+    def get_active_baseline(
+        self,
+        sections: Optional[List[str]] = None,
+        fields: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> Optional[Dict[str, Any]]:
+        """Obtener el baseline activo (ver _load_baseline para los filtros)"""
+        return self._load_baseline(
+            "is_active = 1 ORDER BY created_at DESC LIMIT 1", (),
+            sections, fields, limit, offset
+        )
+    
+    def get_baseline(
+        self,
+        baseline_id: int,
+        sections: Optional[List[str]] = None,
+        fields: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> Optional[Dict[str, Any]]:
+        """Obtener un baseline específico (ver _load_baseline para los filtros)"""
+        return self._load_baseline("id = ?", (baseline_id,), sections, fields, limit, offset)
+    
+    @instrument('sqlite.list_baselines')
+    def list_baselines(self) -> List[Dict[str, Any]]:
+        """Listar todos los baselines"""
+        with self._connect() as conn:
             conn.row_factory = sqlite3.Row
-            cursor = conn.execute("""
-                SELECT * FROM baselines WHERE is_active = 1 ORDER BY created_at DESC LIMIT 1
-            """)
-            row = cursor.fetchone()
-            
-            if not row:
-                return None
+            cursor = conn.execute(f"SELECT {BASELINE_META_COLUMNS} FROM baselines ORDER BY created_at DESC")
+            rows = cursor.fetchall()
             
-            return self._row_to_baseline(row)
+            return [self._row_to_baseline(row, sections=()) for row in rows]
     
-    def get_baseline(self, baseline_id: int) -> Optional[Dict[str, Any]]:
-        """Obtener un baseline específico"""
-        with sqlite3.connect(self.db_path) as conn:
+    @instrument('sqlite.load_baseline')
+    def _load_baseline(
+        self,
+        where: str,
+        params: tuple,
+        sections: Optional[List[str]],
+        fields: Optional[List[str]],
+        limit: Optional[int],
+        offset: int
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Cargar un baseline leyendo sólo las columnas necesarias
+        
+        Args:
+            where: Condición SQL que selecciona el baseline
+            params: Parámetros de la condición
+            sections: Secciones a cargar (None = todas, [] = sólo metadatos)
+            fields: Campos a conservar en cada item (None = todos)
+            limit: Máximo de items por sección (None = sin límite)
+            offset: Items a saltar en cada sección
+        """
+        sections = BASELINE_SECTIONS if sections is None else tuple(sections)
+        unknown = set(sections) - set(BASELINE_SECTIONS)
+        if unknown:
+            raise ValueError(f"Unknown baseline sections: {', '.join(sorted(unknown))}")
+        
+        columns = ", ".join((BASELINE_META_COLUMNS,) + sections)
+        with self._connect() as conn:
             conn.row_factory = sqlite3.Row
-            cursor = conn.execute("SELECT * FROM baselines WHERE id = ?", (baseline_id,))
+            cursor = conn.execute(f"SELECT {columns} FROM baselines WHERE {where}", params)
             row = cursor.fetchone()
             
             if not row:
                 return None
             
-            return self._row_to_baseline(row)
-    
-    def list_baselines(self) -> List[Dict[str, Any]]:
-        """Listar todos los baselines"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute("SELECT * FROM baselines ORDER BY created_at DESC")
-            rows = cursor.fetchall()
-            
-            return [self._row_to_baseline(row, include_data=False) for row in rows]
+            return self._row_to_baseline(row, sections, fields, limit, offset)
     
     def set_active_baseline(self, baseline_id: int) -> bool:
         """Establecer un baseline como activo"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             conn.execute("UPDATE baselines SET is_active = 0")
             conn.execute("UPDATE baselines SET is_active = 1 WHERE id = ?", (baseline_id,))
             conn.commit()
@@ -158,43 +274,68 @@ class BaselineManager:
     
     def delete_baseline(self, baseline_id: int) -> bool:
         """Eliminar un baseline"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             conn.execute("DELETE FROM baseline_comparisons WHERE baseline_id = ?", (baseline_id,))
             conn.execute("DELETE FROM baselines WHERE id = ?", (baseline_id,))
             conn.commit()
         return True
     
-    def compare_with_baseline(self, baseline_id: Optional[int] = None) -> Dict[str, Any]:
-        """Comparar estado actual con baseline"""
+    @instrument('baseline.compare')
+    def compare_with_baseline(
+        self,
+        baseline_id: Optional[int] = None,
+        current: Optional[Dict[str, List[Dict]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Comparar estado actual con baseline
+        
+        Args:
+            baseline_id: ID del baseline (None = baseline activo)
+            current: Datos ya escaneados por sección (processes, ports,
+                startup_items); las secciones ausentes se escanean
+        """
+        from .processes import scan_processes
+        from .ports import scan_open_ports
+        from .startup import scan_startup_items
+        
+        # Los archivos no se comparan: no hace falta decodificarlos
+        sections = ["processes", "ports", "startup_items"]
         if baseline_id:
-            baseline = self.get_baseline(baseline_id)
+            baseline = self.get_baseline(baseline_id, sections=sections)
         else:
-            baseline = self.get_active_baseline()
+            baseline = self.get_active_baseline(sections=sections)
         
         if not baseline:
             raise ValueError("No baseline found")
         
-        # Escanear estado actual
-        current_processes = scan_processes()
-        current_ports = scan_ports()
-        current_startup = scan_startup_items()
+        # Escanear estado actual (reutilizando datos recibidos)
+        current = current or {}
+        current_processes = current.get("processes")
+        if current_processes is None:
+            current_processes = scan_processes()
+        current_ports = current.get("ports")
+        if current_ports is None:
+            current_ports = scan_open_ports()
+        current_startup = current.get("startup_items")
+        if current_startup is None:
+            current_startup = scan_startup_items()
         
         # Comparar
         differences = {
             "processes": self._compare_lists(
                 baseline["processes"],
                 current_processes,
-                key="name"
+                section="processes"
             ),
             "ports": self._compare_lists(
                 baseline["ports"],
                 current_ports,
-                key="local_port"
+                section="ports"
             ),
             "startup_items": self._compare_lists(
                 baseline["startup_items"],
                 current_startup,
-                key="name"
+                section="startup_items"
             ),
             "summary": {}
         }
@@ -210,18 +351,26 @@ class BaselineManager:
             "closed_ports": len(differences["ports"]["removed"]),
             "new_startup": len(differences["startup_items"]["added"]),
             "removed_startup": len(differences["startup_items"]["removed"]),
+            "modified_processes": len(differences["processes"]["modified"]),
+            "modified_ports": len(differences["ports"]["modified"]),
+            "modified_startup": len(differences["startup_items"]["modified"]),
             "risk_score": risk_score,
             "risk_level": self._get_risk_level(risk_score)
         }
         
         # Guardar comparación
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             conn.execute("""
-                INSERT INTO baseline_comparisons (baseline_id, differences, risk_score)
-                VALUES (?, ?, ?)
-            """, (baseline["id"], json.dumps(differences), risk_score))
+                INSERT INTO baseline_comparisons (baseline_id, differences, risk_score, summary)
+                VALUES (?, ?, ?, ?)
+            """, (baseline["id"], json.dumps(differences), risk_score, json.dumps(differences["summary"])))
             conn.commit()
         
+        now = time.time()
+        if now - self._last_retention > 3600:
+            self._last_retention = now
+            self.apply_retention()
+        
         return {
             "baseline": {
                 "id": baseline["id"],
@@ -232,8 +381,159 @@ class BaselineManager:
             "differences": differences
         }
     
-    def _row_to_baseline(self, row: sqlite3.Row, include_data: bool = True) -> Dict[str, Any]:
-        """Convertir row de DB a dict"""
+    @instrument('sqlite.comparison_history')
+    def get_comparison_history(
+        self,
+        baseline_id: int,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0,
+        include_differences: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Obtener el historial de comparaciones de un baseline
+        
+        Por defecto sólo devuelve el resumen de cada comparación para que
+        las gráficas de tendencia no tengan que decodificar diffs completos.
+        
+        Args:
+            baseline_id: ID del baseline
+            start: Fecha/hora ISO inicial (inclusive)
+            end: Fecha/hora ISO final (inclusive)
+            limit: Máximo de filas devueltas
+            offset: Filas a saltar (paginación)
+            include_differences: Incluir el diff completo si se conserva
+        
+        Raises:
+            ValueError: Si start o end no son fechas ISO 8601 válidas
+        """
+        conditions = ["baseline_id = ?"]
+        params: List[Any] = [baseline_id]
+        
+        if start:
+            conditions.append("compared_at >= ?")
+            params.append(self._parse_timestamp(start, "from"))
+        if end:
+            conditions.append("compared_at <= ?")
+            params.append(self._parse_timestamp(end, "to"))
+        
+        where = " AND ".join(conditions)
+        columns = "id, baseline_id, compared_at, risk_score, summary"
+        if include_differences:
+            columns += ", differences"
+        
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            total = conn.execute(
+                f"SELECT COUNT(*) FROM baseline_comparisons WHERE {where}", params
+            ).fetchone()[0]
+            rows = conn.execute(
+                f"""
+                SELECT {columns} FROM baseline_comparisons
+                WHERE {where}
+                ORDER BY compared_at DESC, id DESC
+                LIMIT ? OFFSET ?
+                """,
+                params + [limit, offset]
+            ).fetchall()
+        
+        comparisons = []
+        for row in rows:
+            comparison = {
+                "id": row["id"],
+                "baseline_id": row["baseline_id"],
+                "compared_at": row["compared_at"],
+                "risk_score": row["risk_score"],
+                "summary": json.loads(row["summary"]) if row["summary"] else {}
+            }
+            if include_differences:
+                comparison["differences"] = json.loads(row["differences"]) if row["differences"] else None
+            comparisons.append(comparison)
+        
+        return {
+            "comparisons": comparisons,
+            "total": total,
+            "limit": limit,
+            "offset": offset
+        }
+    
+    @staticmethod
+    def _parse_timestamp(value: str, name: str) -> str:
+        """Convertir una fecha ISO 8601 al formato UTC de CURRENT_TIMESTAMP"""
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f"Invalid '{name}' timestamp '{value}' (expected ISO 8601)")
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed.strftime("%Y-%m-%d %H:%M:%S")
+    
+    @instrument('sqlite.comparison_retention')
+    def apply_retention(self) -> Dict[str, int]:
+        """
+        Aplicar la política de retención al historial de comparaciones
+        
+        1. Borra comparaciones más antiguas que max_age_days.
+        2. Pasados downsample_after_days, conserva sólo la comparación de
+           mayor riesgo por baseline y día.
+        3. Descarta el diff completo salvo en las keep_full_diffs más
+           recientes de cada baseline (el resumen se conserva siempre).
+        
+        Returns:
+            Número de filas borradas y de diffs compactados
+        """
+        with self._connect() as conn:
+            expired = conn.execute(
+                "DELETE FROM baseline_comparisons WHERE compared_at < datetime('now', ?)",
+                (f"-{self.max_age_days} days",)
+            ).rowcount
+            
+            downsampled = conn.execute("""
+                DELETE FROM baseline_comparisons
+                WHERE compared_at < datetime('now', ?)
+                AND id NOT IN (
+                    SELECT id FROM (
+                        SELECT id, ROW_NUMBER() OVER (
+                            PARTITION BY baseline_id, date(compared_at)
+                            ORDER BY risk_score DESC, id DESC
+                        ) AS rank
+                        FROM baseline_comparisons
+                        WHERE compared_at < datetime('now', ?)
+                    ) WHERE rank = 1
+                )
+            """, (f"-{self.downsample_after_days} days", f"-{self.downsample_after_days} days")).rowcount
+            
+            compacted = conn.execute("""
+                UPDATE baseline_comparisons SET differences = NULL
+                WHERE differences IS NOT NULL
+                AND id NOT IN (
+                    SELECT id FROM (
+                        SELECT id, ROW_NUMBER() OVER (
+                            PARTITION BY baseline_id
+                            ORDER BY compared_at DESC, id DESC
+                        ) AS rank
+                        FROM baseline_comparisons
+                    ) WHERE rank <= ?
+                )
+            """, (self.keep_full_diffs,)).rowcount
+            conn.commit()
+        
+        return {
+            "expired": expired,
+            "downsampled": downsampled,
+            "compacted": compacted
+        }
+    
+    def _row_to_baseline(
+        self,
+        row: sqlite3.Row,
+        sections: tuple = BASELINE_SECTIONS,
+        fields: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> Dict[str, Any]:
+        """Convertir row de DB a dict, con proyección y paginación por sección"""
         baseline = {
             "id": row["id"],
             "name": row["name"],
@@ -243,30 +543,157 @@ class BaselineManager:
             "metrics": json.loads(row["metrics"])
         }
         
-        if include_data:
-            baseline.update({
-                "processes": json.loads(row["processes"]),
-                "ports": json.loads(row["ports"]),
-                "startup_items": json.loads(row["startup_items"]),
-                "file_integrity": json.loads(row["file_integrity"])
-            })
+        paginate = limit is not None or offset
+        if paginate:
+            baseline["pagination"] = {}
+        
+        for section in sections:
+            items = json.loads(row[section])
+            
+            if paginate:
+                baseline["pagination"][section] = {
+                    "total": len(items),
+                    "limit": limit,
+                    "offset": offset
+                }
+                end = offset + limit if limit is not None else None
+                items = items[offset:end]
+            
+            if fields:
+                items = [{f: item.get(f) for f in fields} for item in items]
+            
+            baseline[section] = items
         
         return baseline
     
-    def _compare_lists(self, baseline_items: List[Dict], current_items: List[Dict], key: str) -> Dict[str, List]:
-        """Comparar dos listas de items"""
-        baseline_keys = {item[key] for item in baseline_items}
-        current_keys = {item[key] for item in current_items}
+    @instrument('baseline.diff')
+    def _compare_lists(self, baseline_items: List[Dict], current_items: List[Dict], section: str) -> Dict[str, Any]:
+        """
+        Comparar dos listas de items por identidad compuesta
+        
+        Los items se agrupan por su clave (p.ej. name+exe) para que varias
+        instancias con la misma identidad se emparejen una a una. Dentro de
+        cada grupo, las parejas con distinta huella de TRACKED_FIELDS se
+        reportan como modificadas (ver _pair_leftovers). Todo el proceso es
+        lineal en nº de items salvo la ordenación de identidades repetidas.
+        """
+        # Ignorar campos que baselines antiguos no guardaban (p.ej. exe)
+        stored_fields = set().union(*baseline_items) if baseline_items else set()
+        key_fields = tuple(f for f in COMPARISON_KEYS[section] if f in stored_fields)
+        tracked = tuple(f for f in TRACKED_FIELDS[section] if f in stored_fields)
+        
+        baseline_groups = self._group_by_identity(baseline_items, key_fields, tracked)
+        current_groups = self._group_by_identity(current_items, key_fields, tracked)
+        
+        added, removed, modified = [], [], []
+        unchanged = 0
         
-        added_keys = current_keys - baseline_keys
-        removed_keys = baseline_keys - current_keys
+        for identity, current_group in current_groups.items():
+            baseline_group = baseline_groups.pop(identity, None)
+            if not baseline_group:
+                added.extend(item for _, item in current_group)
+                continue
+            
+            pairs, group_removed, group_added = self._pair_instances(baseline_group, current_group)
+            for before_fingerprint, before, after_fingerprint, after in pairs:
+                if before_fingerprint == after_fingerprint:
+                    unchanged += 1
+                    continue
+                modified.append({
+                    "before": before,
+                    "after": after,
+                    "changed_fields": [f for f in tracked if before.get(f) != after.get(f)]
+                })
+            added.extend(group_added)
+            removed.extend(group_removed)
+        
+        # Identidades que ya no existen
+        for baseline_group in baseline_groups.values():
+            removed.extend(item for _, item in baseline_group)
         
         return {
-            "added": [item for item in current_items if item[key] in added_keys],
-            "removed": [item for item in baseline_items if item[key] in removed_keys],
-            "unchanged": len(baseline_keys & current_keys)
+            "added": added,
+            "removed": removed,
+            "modified": modified,
+            "unchanged": unchanged
         }
     
+    def _pair_instances(self, baseline: List[tuple], current: List[tuple]) -> tuple:
+        """
+        Emparejar de forma determinista las instancias de una misma identidad
+        
+        1. Las que conservan el mismo PID.
+        2. Las que tienen huella idéntica.
+        3. El resto, ordenadas por huella y PID, una a una.
+        
+        Así el resultado no depende del orden en que el scan devuelve los items.
+        
+        Args:
+            baseline: Instancias del baseline como (huella, item)
+            current: Instancias actuales como (huella, item)
+            
+        Returns:
+            (parejas (huella, antes, huella, después), items sólo del baseline,
+             items sólo actuales)
+        """
+        # Caso habitual: una instancia a cada lado
+        if len(baseline) == 1 and len(current) == 1:
+            return [(*baseline[0], *current[0])], [], []
+        
+        def order(entry):
+            return entry[0], str(entry[1].get("pid"))
+        
+        baseline = sorted(baseline, key=order)
+        current = sorted(current, key=order)
+        pairs = []
+        
+        by_pid = {}
+        for entry in baseline:
+            if entry[1].get("pid") is not None:
+                by_pid.setdefault(entry[1]["pid"], entry)
+        rest_current, matched = [], set()
+        for entry in current:
+            match = by_pid.pop(entry[1].get("pid"), None)
+            if match is None:
+                rest_current.append(entry)
+            else:
+                pairs.append((*match, *entry))
+                matched.add(id(match))
+        rest_baseline = [entry for entry in baseline if id(entry) not in matched]
+        
+        pending = {}
+        for entry in rest_baseline:
+            pending.setdefault(entry[0], []).append(entry)
+        leftover_current = []
+        for entry in rest_current:
+            if pending.get(entry[0]):
+                pairs.append((*pending[entry[0]].pop(0), *entry))
+            else:
+                leftover_current.append(entry)
+        leftover_baseline = sorted((entry for entries in pending.values() for entry in entries), key=order)
+        
+        paired = min(len(leftover_baseline), len(leftover_current))
+        pairs.extend((*before, *after) for before, after in zip(leftover_baseline, leftover_current))
+        
+        return (
+            pairs,
+            [item for _, item in leftover_baseline[paired:]],
+            [item for _, item in leftover_current[paired:]]
+        )
+    
+    def _group_by_identity(self, items: List[Dict], key_fields: tuple, tracked: tuple) -> Dict[tuple, List]:
+        """Agrupar items por identidad como listas de (huella, item)"""
+        groups = {}
+        for item in items:
+            identity = tuple(item.get(f) for f in key_fields)
+            groups.setdefault(identity, []).append((self._fingerprint(item, tracked), item))
+        return groups
+    
+    def _fingerprint(self, item: Dict, fields: tuple) -> str:
+        """Huella SHA-1 de los campos vigilados de un item"""
+        payload = json.dumps([item.get(f) for f in fields], sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+    
     def _calculate_risk_score(self, differences: Dict) -> float:
         """Calcular score de riesgo (0-100)"""
         score = 0.0
@@ -287,6 +714,19 @@ class BaselineManager:
         score += sum(25 for s in new_startup if s["risk_level"] == "high")
         score += sum(12 for s in new_startup if s["risk_level"] == "medium")
         
+        # Items existentes cuyo nivel de riesgo ha subido
+        weights = {
+            "processes": {"high": 20, "medium": 10, "low": 3},
+            "ports": {"high": 15, "medium": 8},
+            "startup_items": {"high": 25, "medium": 12},
+        }
+        for section, section_weights in weights.items():
+            for change in differences[section].get("modified", []):
+                before = RISK_ORDER.get(change["before"].get("risk_level"), 0)
+                after_level = change["after"].get("risk_level")
+                if RISK_ORDER.get(after_level, 0) > before:
+                    score += section_weights.get(after_level, 0)
+        
         return min(score, 100.0)
     
     def _get_risk_level(self, score: float) -> str:
@@ -300,5 +740,5 @@ class BaselineManager:
         return "safe"
 
 
-# Instancia global
+# Instancia global (no toca disco hasta la primera consulta)
 baseline_manager = BaselineManager()
@@ -0,0 +1,368 @@
+"""
+Export Module
+Streams baselines, fleet snapshot history and scan job results as Parquet, Arrow, MessagePack or NDJSON
+
+Every item (process, port, startup item, integrity check) becomes one row
+of a single wide table, EXPORT_COLUMNS: where it came from, its section,
+the known item fields as typed columns and anything else as a JSON
+`extra` column. Rows are produced lazily and written in batches of
+EXPORT_BATCH_ROWS, so memory stays flat however long the history is.
+
+Parquet and Arrow need pyarrow; MessagePack needs msgpack. NDJSON (gzip)
+is always available.
+"""
+
+import json
+import os
+import zlib
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+from .analyzer import SNAPSHOT_SECTIONS
+
+
+EXPORT_BATCH_ROWS = int(os.environ.get('EXPORT_BATCH_ROWS', 20000))
+
+# (name, type): first the row's origin, then item fields, then `extra`
+EXPORT_COLUMNS: List[Tuple[str, str]] = [
+    ('source', 'str'),          # 'baseline', 'fleet' or 'scan_job'
+    ('source_id', 'int'),       # Baseline, fleet snapshot or scan job id
+    ('host_id', 'str'),         # Fleet host
+    ('timestamp', 'float'),     # Baseline creation, scan or hash time (epoch seconds)
+    ('section', 'str'),
+    # Processes
+    ('name', 'str'),
+    ('pid', 'int'),
+    ('ppid', 'int'),
+    ('username', 'str'),
+    ('status', 'str'),
+    ('exe', 'str'),
+    ('cmdline', 'str'),
+    ('exe_hash', 'str'),
+    ('cpu_percent', 'float'),
+    ('memory_percent', 'float'),
+    ('create_time', 'float'),
+    # Ports
+    ('protocol', 'str'),
+    ('local_address', 'str'),
+    ('local_port', 'int'),
+    ('remote_address', 'str'),
+    ('remote_port', 'int'),
+    ('process_name', 'str'),
+    # Startup items
+    ('location', 'str'),
+    ('path', 'str'),
+    ('enabled', 'bool'),
+    ('publisher', 'str'),
+    ('executable_hash', 'str'),
+    # File integrity
+    ('file_path', 'str'),
+    ('current_hash', 'str'),
+    ('expected_hash', 'str'),
+    ('last_modified', 'int'),
+    ('size', 'int'),
+    ('risk_level', 'str'),
+    # Other item fields, as a JSON object
+    ('extra', 'str'),
+]
+
+COLUMN_NAMES = [name for name, _ in EXPORT_COLUMNS]
+CONTEXT_COLUMNS = 5
+_COLUMN_INDEX = {name: index for index, name in enumerate(COLUMN_NAMES) if index >= CONTEXT_COLUMNS}
+_PYTHON_TYPES = {'str': str, 'int': int, 'float': (int, float), 'bool': bool}
+_COLUMN_TYPES = [_PYTHON_TYPES[kind] for _, kind in EXPORT_COLUMNS]
+
+# name -> (media type, file extension, needs)
+FORMATS = {
+    'parquet': ('application/vnd.apache.parquet', 'parquet', 'pyarrow'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows', 'pyarrow'),
+    'msgpack': ('application/vnd.msgpack', 'msgpack', 'msgpack'),
+    'ndjson': ('application/gzip', 'ndjson.gz', None),
+}
+
+Row = List
+
+
+def available_formats() -> List[str]:
+    """Formats whose dependencies are installed, best first"""
+    installed = {'pyarrow': pyarrow is not None, 'msgpack': msgpack is not None}
+    return [name for name, (_, _, needs) in FORMATS.items() if needs is None or installed[needs]]
+
+
+def resolve_format(name: Optional[str]) -> str:
+    """
+    Validate a requested format ('auto' or None picks the best available)
+
+    Raises:
+        ValueError: For an unknown format or one whose dependency is missing
+    """
+    available = available_formats()
+    if not name or name == 'auto':
+        return available[0]
+    if name not in FORMATS:
+        raise ValueError(f"Unknown export format '{name}' (expected one of {', '.join(FORMATS)})")
+    if name not in available:
+        raise ValueError(f"Export format '{name}' requires {FORMATS[name][2]} (pip install {FORMATS[name][2]})")
+    return name
+
+
+def check_sections(sections: Optional[Sequence[str]]) -> Optional[List[str]]:
+    """
+    Validate requested sections before a stream starts (None = all)
+
+    Raises:
+        ValueError: For an unknown section
+    """
+    if sections is None:
+        return None
+    unknown = [section for section in sections if section not in SNAPSHOT_SECTIONS]
+    if unknown:
+        raise ValueError(f"Unknown sections: {', '.join(unknown)} (expected {', '.join(SNAPSHOT_SECTIONS)})")
+    return list(sections)
+
+
+# ==================== ROWS ====================
+
+def item_row(context: Sequence, section: str, item: Dict) -> Row:
+    """
+    One export row for an item
+
+    Args:
+        context: (source, source_id, host_id, timestamp)
+        section: Section the item belongs to
+        item: Scan item
+
+    Returns:
+        Values in EXPORT_COLUMNS order
+    """
+    row = [*context, section] + [None] * (len(EXPORT_COLUMNS) - CONTEXT_COLUMNS)
+    extra = None
+    for key, value in item.items():
+        index = _COLUMN_INDEX.get(key)
+        if value is None:
+            continue
+        if index is not None and index != len(EXPORT_COLUMNS) - 1:
+            expected = _COLUMN_TYPES[index]
+            if isinstance(value, expected) and not (isinstance(value, bool) and expected is not bool):
+                row[index] = value
+                continue
+            if expected is str and isinstance(value, list):
+                row[index] = ' '.join(map(str, value))
+                continue
+        # Unknown field, or a value the column type cannot hold
+        if extra is None:
+            extra = {}
+        extra[key] = value
+    if extra:
+        row[-1] = json.dumps(extra, sort_keys=True, separators=(',', ':'), default=str)
+    return row
+
+
+def _epoch(value) -> Optional[float]:
+    """Epoch seconds from a number or a SQLite UTC timestamp string"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    try:
+        return datetime.fromisoformat(str(value)).replace(tzinfo=timezone.utc).timestamp()
+    except ValueError:
+        return None
+
+
+def baseline_rows(manager, baseline_id: int, sections: Optional[Sequence[str]] = None) -> Iterator[Row]:
+    """
+    Rows of a stored baseline, loading one section at a time
+
+    Args:
+        manager: BaselineManager
+        baseline_id: Baseline id
+        sections: Sections to export (default: all)
+    """
+    for section in sections or SNAPSHOT_SECTIONS:
+        baseline = manager.get_baseline(baseline_id, sections=[section])
+        if baseline is None:
+            return
+        context = ('baseline', baseline_id, None, _epoch(baseline.get('created_at')))
+        for item in baseline.get(section) or []:
+            yield item_row(context, section, item)
+
+
+def fleet_rows(
+    store,
+    host_id: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    sections: Optional[Sequence[str]] = None
+) -> Iterator[Row]:
+    """
+    Rows of every item of every fleet snapshot (full state per snapshot)
+
+    Args:
+        store: FleetStore
+        host_id: Only this host
+        since: Only snapshots received at or after this time
+        until: Only snapshots received at or before this time
+        sections: Sections to export (default: all)
+    """
+    sections = sections or SNAPSHOT_SECTIONS
+    for meta, state in store.iter_snapshots(host_id=host_id, since=since, until=until):
+        context = ('fleet', meta['id'], meta['host_id'], meta['scanned_at'] or meta['received_at'])
+        for section in sections:
+            for item in state.get(section) or []:
+                yield item_row(context, section, item)
+
+
+def scan_job_rows(manager, job_id: int) -> Iterator[Row]:
+    """
+    Rows of the files hashed by a scan job (section 'file_integrity')
+
+    Args:
+        manager: ScanJobManager
+        job_id: Scan job id
+    """
+    job = manager.get_job(job_id)
+    if job is None:
+        return
+    context = ('scan_job', job_id, None, job['updated_at'])
+    for record in manager.iter_files(job_id):
+        yield item_row(context, 'file_integrity', {
+            'file_path': record['path'],
+            'current_hash': record['hash'],
+            'size': record['size'],
+            'last_modified': record['last_modified'],
+            'status': record['status'],
+        })
+
+
+# ==================== WRITERS ====================
+
+def _batches(rows: Iterable[Row], size: int) -> Iterator[List[Row]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class _BufferSink:
+    """Write-only file that pyarrow writes into and the stream drains after each batch"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def arrow_schema():
+    """EXPORT_COLUMNS as a pyarrow schema"""
+    types = {'str': pyarrow.string(), 'int': pyarrow.int64(), 'float': pyarrow.float64(), 'bool': pyarrow.bool_()}
+    return pyarrow.schema([(name, types[kind]) for name, kind in EXPORT_COLUMNS])
+
+
+def _stream_arrow(batches: Iterator[List[Row]], parquet: bool) -> Iterator[bytes]:
+    schema = arrow_schema()
+    sink = _BufferSink()
+    if parquet:
+        writer = pyarrow.parquet.ParquetWriter(sink, schema, compression='zstd')
+    else:
+        writer = pyarrow.ipc.new_stream(sink, schema)
+
+    for batch in batches:
+        columns = [pyarrow.array(values, type=field.type) for values, field in zip(zip(*batch), schema)]
+        record_batch = pyarrow.RecordBatch.from_arrays(columns, schema=schema)
+        if parquet:
+            # One row group per batch
+            writer.write_batch(record_batch, row_group_size=len(batch))
+        else:
+            writer.write_batch(record_batch)
+        data = sink.drain()
+        if data:
+            yield data
+
+    writer.close()
+    yield sink.drain()
+
+
+def _stream_msgpack(batches: Iterator[List[Row]]) -> Iterator[bytes]:
+    # A header map, then one array per row in COLUMN_NAMES order
+    packer = msgpack.Packer()
+    yield packer.pack({'format': 'babypluto-export', 'version': 1, 'columns': COLUMN_NAMES})
+    for batch in batches:
+        yield b''.join(packer.pack(row) for row in batch)
+
+
+def _stream_ndjson(batches: Iterator[List[Row]]) -> Iterator[bytes]:
+    # One JSON object per row, without its null columns
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for batch in batches:
+        lines = ''.join(
+            json.dumps({name: value for name, value in zip(COLUMN_NAMES, row) if value is not None},
+                       separators=(',', ':')) + '\n'
+            for row in batch
+        )
+        data = compressor.compress(lines.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_export(rows: Iterable[Row], fmt: str, batch_rows: int = EXPORT_BATCH_ROWS) -> Iterator[bytes]:
+    """
+    Encode rows as they are produced
+
+    Args:
+        rows: Rows from baseline_rows, fleet_rows or scan_job_rows
+        fmt: Format from resolve_format
+        batch_rows: Rows per batch (Parquet row group, Arrow record batch)
+
+    Yields:
+        Encoded chunks, to be concatenated into one file
+    """
+    batches = _batches(rows, max(batch_rows, 1))
+    if fmt in ('parquet', 'arrow'):
+        return _stream_arrow(batches, parquet=fmt == 'parquet')
+    if fmt == 'msgpack':
+        return _stream_msgpack(batches)
+    return _stream_ndjson(batches)
+
+
+def export_filename(name: str, fmt: str) -> str:
+    """Download name, e.g. babypluto-baseline-3.parquet"""
+    return f"babypluto-{name}.{FORMATS[fmt][1]}"
+
+
+def media_type(fmt: str) -> str:
+    return FORMATS[fmt][0]
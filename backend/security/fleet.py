@@ -0,0 +1,985 @@
+"""
+Fleet Module
+Central storage of snapshots pushed by agents on many hosts, with fleet-wide queries
+
+Agents push gzip-compressed JSON. The first push of an agent (and any push
+after a mismatch) carries the full snapshot; later pushes only carry a
+delta against the last snapshot the server acknowledged:
+
+    {"version": 1, "host_id": "web-01", "seq": 8, "base_seq": 7,
+     "timestamp": 1700000000, "hostname": "web-01", "platform": "Linux",
+     "delta": {"ports": {"remove": ["<fingerprint>"], "add": [{...}]}},
+     "digest": "<state digest>"}
+
+Items are identified by a fingerprint of their content, so an unchanged
+item costs nothing and a changed one is a remove plus an add. The server
+stores a full keyframe every `keyframe_interval` snapshots and deltas in
+between, and keeps the current state of every host for fleet queries.
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import platform
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.request
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .analyzer import SNAPSHOT_SECTIONS, generate_metrics, generate_alerts, calculate_security_score
+from .fleet_index import FleetIndex, snapshot_terms
+from .instrumentation import instrument
+
+
+# Server side is opt-in: FLEET_ENABLED=true exposes /api/fleet/*; ingest also needs FLEET_TOKEN
+ENABLED = os.environ.get('FLEET_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+TOKEN = os.environ.get('FLEET_TOKEN', '')
+MAX_PAYLOAD_BYTES = int(os.environ.get('FLEET_MAX_PAYLOAD_BYTES', 64 * 1024 * 1024))
+
+PROTOCOL_VERSION = 1
+
+# Rounded before pushing so idle processes do not change on every scan
+VOLATILE_FIELDS = {'processes': ('cpu_percent', 'memory_percent')}
+
+SEVERITY_ORDER = {'low': 1, 'medium': 2, 'high': 3}
+
+# Item fields the analyzer reads: always, and when the item raises an alert
+REQUIRED_FIELDS = {
+    'processes': ('risk_level',),
+    'ports': ('risk_level', 'status'),
+    'startup_items': ('risk_level',),
+    'file_integrity': ('status',),
+}
+ALERT_FIELDS = {
+    'processes': ('name', 'pid', 'username', 'cpu_percent', 'memory_percent'),
+    'ports': ('local_port', 'protocol', 'process_name'),
+    'startup_items': ('name', 'location'),
+    'file_integrity': ('file_path',),
+}
+FIELD_TYPES = {
+    'risk_level': str,
+    'status': str,
+    'protocol': str,
+    'cpu_percent': (int, float),
+    'memory_percent': (int, float),
+}
+
+
+class DeltaMismatch(ValueError):
+    """A delta does not apply to the state the server holds for the host"""
+
+    def __init__(self, message: str, expected_seq: Optional[int]):
+        super().__init__(message)
+        self.expected_seq = expected_seq
+
+
+# ==================== PROTOCOL ====================
+
+def item_fingerprint(item: Dict) -> str:
+    """Short content hash identifying an item within a section"""
+    payload = json.dumps(item, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def section_fingerprints(state: Dict[str, List[Dict]]) -> Dict[str, List[str]]:
+    """Fingerprints of every item, per section and in item order"""
+    return {section: [item_fingerprint(item) for item in state.get(section) or []] for section in SNAPSHOT_SECTIONS}
+
+
+def state_digest(state: Dict[str, List[Dict]], fingerprints: Dict[str, List[str]] = None) -> str:
+    """
+    Order-independent digest of a whole snapshot, to verify a delta was applied correctly
+
+    Args:
+        state: Snapshot sections
+        fingerprints: section_fingerprints(state), if already computed
+    """
+    fingerprints = fingerprints or section_fingerprints(state)
+    digest = hashlib.sha1()
+    for section in SNAPSHOT_SECTIONS:
+        digest.update(section.encode('utf-8'))
+        for fingerprint in sorted(fingerprints[section]):
+            digest.update(fingerprint.encode('ascii'))
+    return digest.hexdigest()
+
+
+def normalize_snapshot(result: Dict) -> Dict[str, List[Dict]]:
+    """
+    Snapshot sections of a scan result as they are pushed to the server
+
+    Args:
+        result: Scan result with processes/ports/startup_items/file_integrity
+
+    Returns:
+        Dictionary of section -> items, with volatile fields rounded
+    """
+    state = {}
+    for section in SNAPSHOT_SECTIONS:
+        items = result.get(section) or []
+        volatile = VOLATILE_FIELDS.get(section)
+        if volatile:
+            items = [
+                {**item, **{field: float(round(item[field])) for field in volatile if item.get(field) is not None}}
+                for item in items
+            ]
+        state[section] = items
+    return state
+
+
+def make_delta(
+    previous: Dict[str, List[Dict]],
+    current: Dict[str, List[Dict]],
+    previous_fingerprints: Dict[str, List[str]] = None,
+    current_fingerprints: Dict[str, List[str]] = None
+) -> Dict[str, Dict]:
+    """
+    Items to remove (by fingerprint) and add to turn previous into current
+
+    Sections are multisets: two identical items are two entries.
+
+    Args:
+        previous: Snapshot the server holds
+        current: New snapshot
+        previous_fingerprints: section_fingerprints(previous), if already computed
+        current_fingerprints: section_fingerprints(current), if already computed
+
+    Returns:
+        Dictionary of section -> {"remove": [...], "add": [...]}, only
+        for sections that changed
+    """
+    previous_fingerprints = previous_fingerprints or section_fingerprints(previous)
+    current_fingerprints = current_fingerprints or section_fingerprints(current)
+
+    delta = {}
+    for section in SNAPSHOT_SECTIONS:
+        before = Counter(previous_fingerprints[section])
+        add = []
+        for item, fingerprint in zip(current.get(section) or [], current_fingerprints[section]):
+            if before[fingerprint] > 0:
+                before[fingerprint] -= 1
+            else:
+                add.append(item)
+        remove = list(before.elements())
+        if add or remove:
+            delta[section] = {'remove': remove, 'add': add}
+    return delta
+
+
+def apply_delta(previous: Dict[str, List[Dict]], delta: Dict[str, Dict]) -> Dict[str, List[Dict]]:
+    """
+    Inverse of make_delta
+
+    Raises:
+        ValueError: If the delta removes an item previous does not have
+    """
+    return _apply_delta(previous, delta)[0]
+
+
+def _apply_delta(
+    previous: Dict[str, List[Dict]],
+    delta: Dict[str, Dict]
+) -> Tuple[Dict[str, List[Dict]], Dict[str, List[str]]]:
+    """apply_delta, also returning the fingerprints of the result"""
+    state, fingerprints = {}, {}
+    for section in SNAPSHOT_SECTIONS:
+        items = previous.get(section) or []
+        change = delta.get(section) or {}
+        remove = Counter(change.get('remove') or [])
+        added = list(change.get('add') or [])
+
+        kept, kept_fingerprints = [], []
+        for item in items:
+            fingerprint = item_fingerprint(item)
+            if remove[fingerprint] > 0:
+                remove[fingerprint] -= 1
+            else:
+                kept.append(item)
+                kept_fingerprints.append(fingerprint)
+        if +remove:
+            raise ValueError(f"Delta removes {sum(remove.values())} unknown {section} items")
+
+        state[section] = kept + added
+        fingerprints[section] = kept_fingerprints + [item_fingerprint(item) for item in added]
+    return state, fingerprints
+
+
+def check_delta(delta) -> Dict[str, Dict]:
+    """
+    Validate the shape of a pushed delta
+
+    Raises:
+        ValueError: If it is not {section: {"remove": [str], "add": [...]}}
+    """
+    if not isinstance(delta, dict):
+        raise ValueError("delta must be an object")
+    for section, change in delta.items():
+        if section not in SNAPSHOT_SECTIONS:
+            raise ValueError(f"Unknown delta section '{section}'")
+        if not isinstance(change, dict):
+            raise ValueError(f"delta.{section} must be an object")
+        remove = change.get('remove') or []
+        if not isinstance(remove, list) or not all(isinstance(fingerprint, str) for fingerprint in remove):
+            raise ValueError(f"delta.{section}.remove must be a list of fingerprints")
+        if not isinstance(change.get('add') or [], list):
+            raise ValueError(f"delta.{section}.add must be a list")
+    return delta
+
+
+def check_state(state: Dict[str, List[Dict]]):
+    """
+    Validate every item of a snapshot before it is analyzed
+
+    Raises:
+        ValueError: For a non-object item, or one missing a field the
+            analyzer reads (or holding it with the wrong type)
+    """
+    for section in SNAPSHOT_SECTIONS:
+        for index, item in enumerate(state[section]):
+            if not isinstance(item, dict):
+                raise ValueError(f"{section}[{index}] must be an object")
+            fields = REQUIRED_FIELDS[section]
+            if item.get('risk_level') in ('medium', 'high') or item.get('status') in ('modified', 'missing'):
+                fields += ALERT_FIELDS[section]
+            for field in fields:
+                if field not in item:
+                    raise ValueError(f"{section}[{index}] is missing '{field}'")
+                expected = FIELD_TYPES.get(field)
+                value = item[field]
+                if expected and (not isinstance(value, expected) or isinstance(value, bool)):
+                    raise ValueError(f"{section}[{index}].{field} has an invalid value {value!r}")
+
+
+def encode_payload(payload: Dict) -> bytes:
+    """Compact JSON, gzip-compressed (sent with Content-Encoding: gzip)"""
+    body = json.dumps(payload, separators=(',', ':'), default=str).encode('utf-8')
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(body) + compressor.flush()
+
+
+def decode_payload(body: bytes, encoding: Optional[str] = None, max_bytes: int = MAX_PAYLOAD_BYTES) -> Dict:
+    """
+    Parse a pushed payload, refusing anything that inflates beyond max_bytes
+
+    Args:
+        body: Request body
+        encoding: Content-Encoding header ('gzip' or None)
+        max_bytes: Largest decompressed size accepted
+
+    Raises:
+        ValueError: For oversized, corrupt or non-object payloads
+    """
+    if encoding == 'gzip':
+        try:
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            body = decompressor.decompress(body, max_bytes + 1)
+        except zlib.error as e:
+            raise ValueError(f"Invalid gzip body: {e}")
+        if decompressor.unconsumed_tail or len(body) > max_bytes:
+            raise ValueError(f"Payload exceeds {max_bytes} bytes")
+    elif encoding not in (None, '', 'identity'):
+        raise ValueError(f"Unsupported Content-Encoding '{encoding}'")
+    elif len(body) > max_bytes:
+        raise ValueError(f"Payload exceeds {max_bytes} bytes")
+
+    try:
+        payload = json.loads(body)
+    except ValueError as e:
+        raise ValueError(f"Invalid JSON payload: {e}")
+    if not isinstance(payload, dict):
+        raise ValueError("Payload must be a JSON object")
+    return payload
+
+
+def check_token(authorization: Optional[str], token: str = None) -> bool:
+    """True if the Bearer token matches FLEET_TOKEN (never when none is configured)"""
+    token = TOKEN if token is None else token
+    if not token:
+        return False
+    scheme, _, value = (authorization or '').partition(' ')
+    return scheme.lower() == 'bearer' and hmac.compare_digest(value.strip(), token)
+
+
+def _pack(data) -> bytes:
+    return zlib.compress(json.dumps(data, separators=(',', ':'), default=str).encode('utf-8'), 6)
+
+
+def _unpack(blob: bytes):
+    return json.loads(zlib.decompress(blob))
+
+
+# ==================== SERVER STORAGE ====================
+
+class FleetStore:
+    """
+    SQLite storage of pushed snapshots and the current state of every host
+
+    - fleet_hosts: one row per host with its latest metrics, alerts and
+      compressed current state (the base for the next delta)
+    - fleet_snapshots: history; 'full' keyframes and 'delta' rows that
+      are replayed on top of the previous keyframe
+    - fleet_ports: current sockets of every host, indexed by port
+    - fleet_terms/fleet_postings: inverted index (see fleet_index.py)
+    """
+
+    def __init__(self, db_path: str = "data/fleet.db", keyframe_interval: int = 20, retention_days: int = 30):
+        """
+        Args:
+            db_path: SQLite database path
+            keyframe_interval: Store a full snapshot at least every N pushes per host
+            retention_days: History older than this is dropped (0 keeps everything)
+        """
+        self.db_path = db_path
+        self.keyframe_interval = max(keyframe_interval, 1)
+        self.retention_days = retention_days
+
+        self._initialized = False
+        self._init_lock = threading.Lock()
+        # Pushes are serialized: a delta must apply to the state left by the previous one
+        self._write_lock = threading.Lock()
+        self._last_retention = 0.0
+        self.index = FleetIndex()
+
+    @classmethod
+    def from_env(cls) -> 'FleetStore':
+        """Build a store configured from FLEET_* environment variables"""
+        return cls(
+            db_path=os.environ.get('FLEET_DB', 'data/fleet.db'),
+            keyframe_interval=int(os.environ.get('FLEET_KEYFRAME_INTERVAL', 20)),
+            retention_days=int(os.environ.get('FLEET_RETENTION_DAYS', 30)),
+        )
+
+    def ensure_database(self):
+        """Create the directory and tables on first use"""
+        if self._initialized:
+            return
+        with self._init_lock:
+            if not self._initialized:
+                self._init_database()
+                self._initialized = True
+
+    def _connect(self) -> sqlite3.Connection:
+        self.ensure_database()
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_database(self):
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS fleet_hosts (
+                    host_id TEXT PRIMARY KEY,
+                    hostname TEXT,
+                    platform TEXT,
+                    first_seen REAL,
+                    last_seen REAL,
+                    last_seq INTEGER,
+                    last_snapshot_id INTEGER,
+                    since_keyframe INTEGER DEFAULT 0,
+                    security_score INTEGER,
+                    alerts_count INTEGER,
+                    metrics TEXT,
+                    alerts TEXT,
+                    state BLOB
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS fleet_snapshots (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    host_id TEXT NOT NULL,
+                    seq INTEGER,
+                    received_at REAL,
+                    scanned_at INTEGER,
+                    kind TEXT,
+                    payload BLOB,
+                    wire_bytes INTEGER,
+                    security_score INTEGER,
+                    alerts_count INTEGER,
+                    metrics TEXT
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS fleet_ports (
+                    host_id TEXT NOT NULL,
+                    protocol TEXT,
+                    local_address TEXT,
+                    local_port INTEGER,
+                    remote_address TEXT,
+                    remote_port INTEGER,
+                    status TEXT,
+                    process_name TEXT,
+                    pid INTEGER,
+                    risk_level TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_fleet_snapshots_host ON fleet_snapshots (host_id, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_fleet_snapshots_time ON fleet_snapshots (received_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_fleet_ports_port ON fleet_ports (local_port, status)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_fleet_ports_host ON fleet_ports (host_id)")
+            FleetIndex.create_schema(conn)
+            conn.commit()
+
+            # Databases from before the index: build it from the stored history
+            if 'fleet_snapshots' in existing and 'fleet_postings' not in existing:
+                self._rebuild_index(conn)
+                conn.commit()
+
+    @instrument('fleet.ingest')
+    def ingest(self, payload: Dict, wire_bytes: int = 0) -> Dict:
+        """
+        Store one pushed snapshot (full or delta)
+
+        Args:
+            payload: Decoded payload (see module docstring)
+            wire_bytes: Size of the request body, kept for statistics
+
+        Returns:
+            Dictionary with snapshot_id, seq, kind, security_score and alerts_count
+
+        Raises:
+            DeltaMismatch: If the delta's base is not the host's last snapshot
+            ValueError: For malformed payloads
+        """
+        if payload.get('version') != PROTOCOL_VERSION:
+            raise ValueError(f"Unsupported protocol version {payload.get('version')!r}")
+        host_id = payload.get('host_id')
+        if not isinstance(host_id, str) or not 0 < len(host_id) <= 255:
+            raise ValueError("host_id must be a non-empty string")
+        seq = payload.get('seq')
+        if not isinstance(seq, int):
+            raise ValueError("seq must be an integer")
+
+        now = time.time()
+        with self._write_lock:
+            with self._connect() as conn:
+                host = conn.execute(
+                    "SELECT last_seq, last_snapshot_id, since_keyframe, first_seen, state FROM fleet_hosts WHERE host_id = ?",
+                    (host_id,)
+                ).fetchone()
+
+                if 'sections' in payload:
+                    sections = payload['sections'] or {}
+                    if not isinstance(sections, dict):
+                        raise ValueError("sections must be an object")
+                    if not all(isinstance(sections.get(section) or [], list) for section in SNAPSHOT_SECTIONS):
+                        raise ValueError("Each section must be a list of items")
+                    state = {section: list(sections.get(section) or []) for section in SNAPSHOT_SECTIONS}
+                    fingerprints = None
+                    delta = None
+                elif 'delta' in payload:
+                    if host is None or host['state'] is None or payload.get('base_seq') != host['last_seq']:
+                        raise DeltaMismatch(
+                            f"Delta base {payload.get('base_seq')} does not match the last snapshot of {host_id}",
+                            host['last_seq'] if host else None
+                        )
+                    delta = check_delta(payload['delta'] or {})
+                    try:
+                        state, fingerprints = _apply_delta(_unpack(host['state']), delta)
+                    except ValueError as e:
+                        raise DeltaMismatch(str(e), host['last_seq'])
+                else:
+                    raise ValueError("Payload needs either 'sections' or 'delta'")
+
+                if payload.get('digest') and state_digest(state, fingerprints) != payload['digest']:
+                    if delta is None:
+                        raise ValueError("State digest does not match the snapshot")
+                    raise DeltaMismatch(f"State digest mismatch for {host_id}", host['last_seq'])
+
+                check_state(state)
+                metrics = generate_metrics(*(state[section] for section in SNAPSHOT_SECTIONS))
+                alerts = generate_alerts(*(state[section] for section in SNAPSHOT_SECTIONS))
+                score = calculate_security_score(metrics)
+
+                since_keyframe = (host['since_keyframe'] + 1) if host and delta is not None else 0
+                if since_keyframe >= self.keyframe_interval:
+                    since_keyframe = 0
+                kind = 'full' if since_keyframe == 0 else 'delta'
+
+                cursor = conn.execute("""
+                    INSERT INTO fleet_snapshots
+                    (host_id, seq, received_at, scanned_at, kind, payload, wire_bytes, security_score, alerts_count, metrics)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    host_id, seq, now, payload.get('timestamp'), kind,
+                    _pack(state if kind == 'full' else delta),
+                    wire_bytes, score, len(alerts), json.dumps(metrics)
+                ))
+                snapshot_id = cursor.lastrowid
+
+                conn.execute("""
+                    INSERT OR REPLACE INTO fleet_hosts
+                    (host_id, hostname, platform, first_seen, last_seen, last_seq, last_snapshot_id,
+                     since_keyframe, security_score, alerts_count, metrics, alerts, state)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    host_id, payload.get('hostname') or host_id, payload.get('platform'),
+                    host['first_seen'] if host else now, now, seq, snapshot_id, since_keyframe,
+                    score, len(alerts), json.dumps(metrics), json.dumps(alerts), _pack(state)
+                ))
+
+                self.index.update(
+                    conn, host_id, snapshot_id, host['last_snapshot_id'] if host else None,
+                    snapshot_terms(state), now
+                )
+
+                if delta is None or 'ports' in delta:
+                    conn.execute("DELETE FROM fleet_ports WHERE host_id = ?", (host_id,))
+                    conn.executemany("""
+                        INSERT INTO fleet_ports
+                        (host_id, protocol, local_address, local_port, remote_address, remote_port,
+                         status, process_name, pid, risk_level)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """, [
+                        (host_id, port.get('protocol'), port.get('local_address'), port.get('local_port'),
+                         port.get('remote_address'), port.get('remote_port'), port.get('status'),
+                         port.get('process_name'), port.get('pid'), port.get('risk_level'))
+                        for port in state['ports']
+                    ])
+                conn.commit()
+
+        if self.retention_days and now - self._last_retention > 3600:
+            self._last_retention = now
+            self.apply_retention(now)
+
+        return {
+            'host_id': host_id,
+            'snapshot_id': snapshot_id,
+            'seq': seq,
+            'kind': kind,
+            'security_score': score,
+            'alerts_count': len(alerts),
+        }
+
+    def list_hosts(self) -> List[Dict]:
+        """All hosts with their latest score and alert count, worst first"""
+        with self._connect() as conn:
+            rows = conn.execute("""
+                SELECT host_id, hostname, platform, first_seen, last_seen, last_seq,
+                       last_snapshot_id, security_score, alerts_count
+                FROM fleet_hosts
+                ORDER BY security_score ASC, host_id ASC
+            """).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_host(self, host_id: str) -> Optional[Dict]:
+        """Latest metrics and alerts of a host, or None if it never pushed"""
+        with self._connect() as conn:
+            row = conn.execute("""
+                SELECT host_id, hostname, platform, first_seen, last_seen, last_seq,
+                       last_snapshot_id, security_score, alerts_count, metrics, alerts
+                FROM fleet_hosts WHERE host_id = ?
+            """, (host_id,)).fetchone()
+        if row is None:
+            return None
+        host = dict(row)
+        host['metrics'] = json.loads(host['metrics'] or '{}')
+        host['alerts'] = json.loads(host['alerts'] or '[]')
+        return host
+
+    def list_snapshots(self, host_id: str, limit: int = 50) -> List[Dict]:
+        """Snapshot history of a host, newest first (without the data)"""
+        with self._connect() as conn:
+            rows = conn.execute("""
+                SELECT id, seq, received_at, scanned_at, kind, wire_bytes, security_score, alerts_count
+                FROM fleet_snapshots WHERE host_id = ?
+                ORDER BY id DESC LIMIT ?
+            """, (host_id, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    @instrument('sqlite.fleet_snapshot')
+    def get_snapshot(self, snapshot_id: int) -> Optional[Dict]:
+        """
+        Rebuild a stored snapshot by replaying deltas on its keyframe
+
+        Returns:
+            Snapshot metadata plus processes/ports/startup_items/file_integrity,
+            or None if it does not exist (or its keyframe was pruned)
+        """
+        with self._connect() as conn:
+            target = conn.execute(
+                "SELECT host_id, seq, received_at, scanned_at, kind, security_score, alerts_count, metrics "
+                "FROM fleet_snapshots WHERE id = ?",
+                (snapshot_id,)
+            ).fetchone()
+            if target is None:
+                return None
+            rows = conn.execute("""
+                SELECT kind, payload FROM fleet_snapshots
+                WHERE host_id = ? AND id <= ? AND id >= (
+                    SELECT MAX(id) FROM fleet_snapshots WHERE host_id = ? AND id <= ? AND kind = 'full'
+                )
+                ORDER BY id
+            """, (target['host_id'], snapshot_id, target['host_id'], snapshot_id)).fetchall()
+
+        if not rows:
+            return None
+        state = {}
+        for row in rows:
+            data = _unpack(row['payload'])
+            state = data if row['kind'] == 'full' else apply_delta(state, data)
+
+        snapshot = dict(target)
+        snapshot['id'] = snapshot_id
+        snapshot['metrics'] = json.loads(snapshot['metrics'] or '{}')
+        snapshot.update(state)
+        return snapshot
+
+    def iter_snapshots(
+        self,
+        host_id: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        page_size: int = 200
+    ) -> Iterator[Tuple[Dict, Dict[str, List[Dict]]]]:
+        """
+        Every stored snapshot in order, rebuilt incrementally
+
+        Each host's deltas are replayed once from the keyframe before
+        `since`, so a long history costs one pass and only one state per
+        host is held in memory. Rows are read a page at a time on short
+        connections (safe to consume from different threads).
+
+        Args:
+            host_id: Only this host (default: all hosts, by host id)
+            since: Only snapshots received at or after this time
+            until: Only snapshots received at or before this time
+            page_size: Snapshot rows read per query
+
+        Yields:
+            (metadata: id, host_id, seq, received_at, scanned_at, kind; sections)
+        """
+        if host_id is None:
+            with self._connect() as conn:
+                host_ids = [row[0] for row in conn.execute("SELECT host_id FROM fleet_hosts ORDER BY host_id")]
+        else:
+            host_ids = [host_id]
+
+        for host in host_ids:
+            with self._connect() as conn:
+                first = conn.execute(
+                    "SELECT MIN(id) FROM fleet_snapshots WHERE host_id = ? AND received_at >= ?",
+                    (host, since or 0)
+                ).fetchone()[0]
+                if first is None:
+                    continue
+                start = conn.execute(
+                    "SELECT MAX(id) FROM fleet_snapshots WHERE host_id = ? AND id <= ? AND kind = 'full'",
+                    (host, first)
+                ).fetchone()[0]
+            if start is None:
+                continue
+
+            state: Dict[str, List[Dict]] = {}
+            last_id = start - 1
+            done = False
+            while not done:
+                with self._connect() as conn:
+                    rows = conn.execute("""
+                        SELECT id, seq, received_at, scanned_at, kind, payload FROM fleet_snapshots
+                        WHERE host_id = ? AND id > ? ORDER BY id LIMIT ?
+                    """, (host, last_id, page_size)).fetchall()
+                done = len(rows) < page_size
+
+                for row in rows:
+                    if until is not None and row['received_at'] > until:
+                        done = True
+                        break
+                    data = _unpack(row['payload'])
+                    state = data if row['kind'] == 'full' else apply_delta(state, data)
+                    if row['id'] >= first:
+                        meta = {key: row[key] for key in ('id', 'seq', 'received_at', 'scanned_at', 'kind')}
+                        meta['host_id'] = host
+                        yield meta, state
+                    last_id = row['id']
+
+    @instrument('sqlite.fleet_ports')
+    def hosts_with_port(self, port: int, status: Optional[str] = 'LISTEN') -> List[Dict]:
+        """
+        Hosts whose current state has a socket on a local port
+
+        Args:
+            port: Local port number
+            status: Socket status to match (None matches any)
+
+        Returns:
+            One entry per host with the matching sockets
+        """
+        query = """
+            SELECT host_id, protocol, local_address, local_port, remote_address, remote_port,
+                   status, process_name, pid, risk_level
+            FROM fleet_ports WHERE local_port = ?
+        """
+        params: Tuple = (port,)
+        if status:
+            query += " AND status = ?"
+            params += (status,)
+
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY host_id", params).fetchall()
+
+        hosts: Dict[str, Dict] = {}
+        for row in rows:
+            socket = dict(row)
+            host_id = socket.pop('host_id')
+            hosts.setdefault(host_id, {'host_id': host_id, 'sockets': []})['sockets'].append(socket)
+        return list(hosts.values())
+
+    def fleet_alerts(self, severity: Optional[str] = None, limit: int = 500) -> List[Dict]:
+        """
+        Current alerts of every host, most severe first
+
+        Args:
+            severity: Minimum severity ('low', 'medium' or 'high')
+            limit: Maximum alerts returned
+        """
+        minimum = SEVERITY_ORDER.get(severity, 0)
+        with self._connect() as conn:
+            rows = conn.execute("SELECT host_id, alerts FROM fleet_hosts WHERE alerts_count > 0").fetchall()
+
+        alerts = [
+            {**alert, 'host_id': row['host_id']}
+            for row in rows
+            for alert in json.loads(row['alerts'] or '[]')
+            if SEVERITY_ORDER.get(alert.get('severity'), 0) >= minimum
+        ]
+        alerts.sort(key=lambda alert: (-SEVERITY_ORDER.get(alert.get('severity'), 0), alert['host_id']))
+        return alerts[:limit]
+
+    def search(self, kind: str, value: str, history: bool = False, prefix: bool = False, limit: int = 1000) -> List[Dict]:
+        """
+        Hosts where a process name, hash, port, remote address or startup path is present
+
+        Args:
+            kind: 'process', 'hash', 'port', 'remote' or 'startup'
+            value: Term to look up
+            history: Also return hosts where it was present in the past
+            prefix: Match every term starting with value
+            limit: Maximum postings returned
+
+        Raises:
+            ValueError: For an unknown kind
+        """
+        with self._connect() as conn:
+            return self.index.search(conn, kind, value, history=history, prefix=prefix, limit=limit)
+
+    def rebuild_index(self) -> Dict[str, int]:
+        """Recreate the inverted index from the stored snapshot history"""
+        with self._write_lock:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM fleet_postings")
+                conn.execute("DELETE FROM fleet_terms")
+                self._rebuild_index(conn)
+                stats = self.index.stats(conn)
+                conn.commit()
+        return stats
+
+    def _rebuild_index(self, conn: sqlite3.Connection):
+        """Replay every host's keyframes and deltas through the index"""
+        hosts = [row[0] for row in conn.execute("SELECT DISTINCT host_id FROM fleet_snapshots")]
+        for host_id in hosts:
+            state, previous_id = None, None
+            rows = conn.execute(
+                "SELECT id, kind, payload, received_at FROM fleet_snapshots WHERE host_id = ? ORDER BY id",
+                (host_id,)
+            )
+            for snapshot_id, kind, payload, received_at in rows:
+                data = _unpack(payload)
+                if kind == 'full':
+                    state = data
+                elif state is None:
+                    continue
+                else:
+                    state = apply_delta(state, data)
+                self.index.update(conn, host_id, snapshot_id, previous_id, snapshot_terms(state), received_at)
+                previous_id = snapshot_id
+
+    def summary(self) -> Dict:
+        """Host, snapshot, storage and index counts for the whole fleet"""
+        with self._connect() as conn:
+            hosts, alerts, average = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(alerts_count), 0), AVG(security_score) FROM fleet_hosts"
+            ).fetchone()
+            snapshots, keyframes, wire_bytes, stored_bytes = conn.execute("""
+                SELECT COUNT(*), COALESCE(SUM(kind = 'full'), 0),
+                       COALESCE(SUM(wire_bytes), 0), COALESCE(SUM(LENGTH(payload)), 0)
+                FROM fleet_snapshots
+            """).fetchone()
+            index = self.index.stats(conn)
+        return {
+            'hosts': hosts,
+            'alerts': alerts,
+            'average_security_score': round(average, 1) if average is not None else None,
+            'snapshots': snapshots,
+            'keyframes': keyframes,
+            'wire_bytes': wire_bytes,
+            'stored_bytes': stored_bytes,
+            'index': index,
+        }
+
+    @instrument('sqlite.fleet_retention')
+    def apply_retention(self, now: float = None) -> Dict[str, int]:
+        """
+        Drop history older than retention_days
+
+        A host's chain is only cut at a keyframe, so every remaining
+        snapshot can still be rebuilt. Index postings that ended before
+        a host's oldest remaining snapshot go with it.
+
+        Returns:
+            Dictionary with the number of deleted snapshots and postings
+        """
+        if not self.retention_days:
+            return {'deleted': 0, 'postings_deleted': 0}
+        cutoff = (now or time.time()) - self.retention_days * 86400
+
+        with self._connect() as conn:
+            cursor = conn.execute("""
+                DELETE FROM fleet_snapshots
+                WHERE id < (
+                    SELECT MAX(k.id) FROM fleet_snapshots k
+                    WHERE k.host_id = fleet_snapshots.host_id AND k.kind = 'full' AND k.received_at < ?
+                )
+            """, (cutoff,))
+            postings = self.index.prune(conn)
+            conn.commit()
+        return {'deleted': cursor.rowcount, 'postings_deleted': postings}
+
+
+# ==================== AGENT SIDE ====================
+
+def _urllib_post(url: str, body: bytes, headers: Dict[str, str], timeout: float) -> Tuple[int, Dict]:
+    """POST with the standard library so agents need no HTTP client package"""
+    request = urllib.request.Request(url, data=body, headers=headers, method='POST')
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, json.loads(response.read() or b'{}')
+    except urllib.error.HTTPError as e:
+        try:
+            detail = json.loads(e.read() or b'{}')
+        except ValueError:
+            detail = {}
+        return e.code, detail
+
+
+class FleetClient:
+    """
+    Pushes scan results to a fleet server, as deltas whenever possible
+
+    The client remembers the last snapshot the server acknowledged; if
+    the server rejects a delta (restart, lost push, pruned state) the
+    same scan is resent in full.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        host_id: str,
+        token: str = None,
+        timeout: float = 30.0,
+        transport: Callable[[str, bytes, Dict[str, str], float], Tuple[int, Dict]] = None
+    ):
+        """
+        Args:
+            url: Server base URL (e.g. http://fleet:8000)
+            host_id: Identity of this host in the fleet
+            token: FLEET_TOKEN of the server, if it requires one
+            timeout: Request timeout in seconds
+            transport: Function posting (url, body, headers, timeout) -> (status, json)
+        """
+        self.url = url.rstrip('/') + '/api/fleet/ingest'
+        self.host_id = host_id
+        self.token = token
+        self.timeout = timeout
+        self.transport = transport or _urllib_post
+
+        self.state: Optional[Dict[str, List[Dict]]] = None
+        self.fingerprints: Optional[Dict[str, List[str]]] = None
+        self.seq = 0
+        self.bytes_sent = 0
+
+    def push(self, result: Dict) -> Dict:
+        """
+        Send one scan result
+
+        Args:
+            result: Scan result (agent run_scan output or /api/scan/full response)
+
+        Returns:
+            Server acknowledgement plus wire_bytes and whether a delta was sent
+
+        Raises:
+            RuntimeError: If the server refuses the snapshot
+        """
+        current = normalize_snapshot(result)
+        fingerprints = section_fingerprints(current)
+        payload = {
+            'version': PROTOCOL_VERSION,
+            'host_id': self.host_id,
+            'hostname': result.get('host') or self.host_id,
+            'platform': result.get('platform') or platform.system(),
+            'timestamp': result.get('timestamp'),
+            'seq': self.seq + 1,
+            'digest': state_digest(current, fingerprints),
+        }
+
+        if self.state is not None:
+            status, response, size = self._send({
+                **payload,
+                'base_seq': self.seq,
+                'delta': make_delta(self.state, current, self.fingerprints, fingerprints),
+            })
+            if status == 409:
+                # Server lost track of us; start a new chain
+                status, response, size = self._send({**payload, 'sections': current})
+                delta = False
+            else:
+                delta = True
+        else:
+            status, response, size = self._send({**payload, 'sections': current})
+            delta = False
+
+        if status != 200:
+            raise RuntimeError(f"Fleet server refused snapshot (HTTP {status}): {response.get('detail', response)}")
+
+        self.state = current
+        self.fingerprints = fingerprints
+        self.seq += 1
+        return {**response, 'wire_bytes': size, 'delta': delta}
+
+    def _send(self, payload: Dict) -> Tuple[int, Dict, int]:
+        body = encode_payload(payload)
+        headers = {'Content-Type': 'application/json', 'Content-Encoding': 'gzip'}
+        if self.token:
+            headers['Authorization'] = f"Bearer {self.token}"
+        status, response = self.transport(self.url, body, headers, self.timeout)
+        self.bytes_sent += len(body)
+        return status, response, len(body)
+
+
+if __name__ == "__main__":
+    # Size of a full push versus a delta for this host's processes and ports
+    from .processes import scan_processes
+    from .ports import scan_open_ports
+
+    first = normalize_snapshot({'processes': scan_processes(), 'ports': scan_open_ports()})
+    time.sleep(2)
+    second = normalize_snapshot({'processes': scan_processes(), 'ports': scan_open_ports()})
+
+    full = encode_payload({'sections': second})
+    delta = make_delta(first, second)
+    changed = encode_payload({'delta': delta})
+
+    print(f"Full snapshot: {len(full)} bytes gzipped")
+    print(f"Delta:         {len(changed)} bytes gzipped "
+          f"({sum(len(change['add']) for change in delta.values())} added, "
+          f"{sum(len(change['remove']) for change in delta.values())} removed)")
+    assert state_digest(apply_delta(first, delta)) == state_digest(second)
@@ -0,0 +1,255 @@
+"""
+Fleet Index Module
+Inverted index from process names, hashes, ports, remote addresses and startup paths to hosts
+
+Each posting is an interval: term T was present on host H from snapshot
+`first_snapshot` up to `last_snapshot` (NULL while it still is). When a
+snapshot arrives only the terms that appeared or disappeared on that host
+are written, so the index grows with change, not with pushes. Postings
+are clustered by term, so a lookup is one range scan whatever the size
+of the fleet.
+"""
+
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .instrumentation import instrument
+
+
+# kind -> what the term is made of
+TERM_KINDS = {
+    'process': "Process name (case-insensitive)",
+    'hash': "SHA-256 of a process executable or startup item",
+    'port': "Local port a socket listens on",
+    'remote': "Remote address of a connection",
+    'startup': "Startup item path",
+}
+
+Term = Tuple[str, str]
+
+
+def normalize_term(kind: str, value) -> str:
+    """
+    Canonical form of a term value, shared by indexing and queries
+
+    Raises:
+        ValueError: For an unknown kind
+    """
+    if kind not in TERM_KINDS:
+        raise ValueError(f"Unknown term kind '{kind}' (expected one of {', '.join(TERM_KINDS)})")
+    value = str(value).strip()
+    if kind == 'process':
+        return value.lower()
+    if kind == 'hash':
+        value = value.lower()
+        return value if value.startswith('sha256:') else f"sha256:{value}"
+    return value
+
+
+def snapshot_terms(state: Dict[str, List[Dict]]) -> Set[Term]:
+    """
+    Terms present in a snapshot
+
+    Args:
+        state: Dictionary of section -> items
+
+    Returns:
+        Set of (kind, normalized value)
+    """
+    terms = set()
+    for proc in state.get('processes') or []:
+        if proc.get('name'):
+            terms.add(('process', normalize_term('process', proc['name'])))
+        if proc.get('exe_hash'):
+            terms.add(('hash', normalize_term('hash', proc['exe_hash'])))
+
+    for port in state.get('ports') or []:
+        listening = port.get('status') == 'LISTEN' or (port.get('protocol') == 'udp' and not port.get('remote_address'))
+        if listening and port.get('local_port') is not None:
+            terms.add(('port', str(port['local_port'])))
+        if port.get('remote_address'):
+            terms.add(('remote', normalize_term('remote', port['remote_address'])))
+
+    for item in state.get('startup_items') or []:
+        if item.get('path'):
+            terms.add(('startup', normalize_term('startup', item['path'])))
+        if item.get('executable_hash'):
+            terms.add(('hash', normalize_term('hash', item['executable_hash'])))
+
+    return terms
+
+
+class FleetIndex:
+    """
+    Term dictionary and postings, stored in the fleet database
+
+    Methods take the caller's connection so the index is updated in the
+    same transaction as the snapshot it describes.
+    """
+
+    @staticmethod
+    def create_schema(conn: sqlite3.Connection):
+        """Create the index tables if needed"""
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS fleet_terms (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                value TEXT NOT NULL,
+                UNIQUE (kind, value)
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS fleet_postings (
+                term_id INTEGER NOT NULL,
+                host_id TEXT NOT NULL,
+                first_snapshot INTEGER NOT NULL,
+                last_snapshot INTEGER,
+                first_seen REAL,
+                last_seen REAL,
+                PRIMARY KEY (term_id, host_id, first_snapshot)
+            ) WITHOUT ROWID
+        """)
+        # Open postings of one host, read on every push from that host
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_fleet_postings_open
+            ON fleet_postings (host_id, term_id) WHERE last_snapshot IS NULL
+        """)
+
+    @instrument('fleet.index_update')
+    def update(
+        self,
+        conn: sqlite3.Connection,
+        host_id: str,
+        snapshot_id: int,
+        previous_snapshot_id: Optional[int],
+        terms: Set[Term],
+        now: float
+    ) -> Dict[str, int]:
+        """
+        Open postings for new terms and close those that disappeared
+
+        Args:
+            conn: Open connection (caller commits)
+            host_id: Host that pushed
+            snapshot_id: Id of the new snapshot
+            previous_snapshot_id: Host's previous snapshot (last one a closed term was seen in)
+            terms: snapshot_terms() of the new snapshot
+            now: Receive time
+
+        Returns:
+            Dictionary with the number of opened and closed postings
+        """
+        open_terms = dict(conn.execute("""
+            SELECT t.kind || char(0) || t.value, p.term_id
+            FROM fleet_postings p JOIN fleet_terms t ON t.id = p.term_id
+            WHERE p.host_id = ? AND p.last_snapshot IS NULL
+        """, (host_id,)).fetchall())
+
+        current = {f"{kind}\0{value}": (kind, value) for kind, value in terms}
+        closed = [term_id for key, term_id in open_terms.items() if key not in current]
+        opened = [term for key, term in current.items() if key not in open_terms]
+
+        if closed:
+            conn.executemany("""
+                UPDATE fleet_postings SET last_snapshot = ?, last_seen = ?
+                WHERE term_id = ? AND host_id = ? AND last_snapshot IS NULL
+            """, [(previous_snapshot_id or snapshot_id, now, term_id, host_id) for term_id in closed])
+
+        if opened:
+            term_ids = self._term_ids(conn, opened)
+            conn.executemany("""
+                INSERT OR IGNORE INTO fleet_postings (term_id, host_id, first_snapshot, last_snapshot, first_seen, last_seen)
+                VALUES (?, ?, ?, NULL, ?, ?)
+            """, [(term_ids[term], host_id, snapshot_id, now, now) for term in opened])
+
+        return {'opened': len(opened), 'closed': len(closed)}
+
+    def _term_ids(self, conn: sqlite3.Connection, terms: Iterable[Term]) -> Dict[Term, int]:
+        """Ids of terms, adding the ones not in the dictionary yet"""
+        terms = list(terms)
+        conn.executemany("INSERT OR IGNORE INTO fleet_terms (kind, value) VALUES (?, ?)", terms)
+        return {
+            term: conn.execute("SELECT id FROM fleet_terms WHERE kind = ? AND value = ?", term).fetchone()[0]
+            for term in terms
+        }
+
+    @instrument('sqlite.fleet_search')
+    def search(
+        self,
+        conn: sqlite3.Connection,
+        kind: str,
+        value: str,
+        history: bool = False,
+        prefix: bool = False,
+        limit: int = 1000
+    ) -> List[Dict]:
+        """
+        Hosts where a term is (or was) present
+
+        Args:
+            conn: Open connection
+            kind: One of TERM_KINDS
+            value: Term value (normalized like indexed values)
+            history: Include postings that have been closed
+            prefix: Match every term starting with value
+            limit: Maximum postings returned
+
+        Returns:
+            Postings: host_id, term, first/last snapshot and time, active
+            (last_snapshot is None and last_seen the host's last push
+            while the term is still present)
+        """
+        value = normalize_term(kind, value)
+        if prefix:
+            term_filter = "t.kind = ? AND t.value >= ? AND t.value < ?"
+            params: Tuple = (kind, value, value + '\U0010ffff')
+        else:
+            term_filter = "t.kind = ? AND t.value = ?"
+            params = (kind, value)
+
+        rows = conn.execute(f"""
+            SELECT p.host_id, t.value, p.first_snapshot, p.last_snapshot, p.first_seen,
+                   CASE WHEN p.last_snapshot IS NULL THEN COALESCE(h.last_seen, p.last_seen) ELSE p.last_seen END
+            FROM fleet_terms t
+            JOIN fleet_postings p ON p.term_id = t.id
+            LEFT JOIN fleet_hosts h ON h.host_id = p.host_id
+            WHERE {term_filter} {'' if history else 'AND p.last_snapshot IS NULL'}
+            ORDER BY p.host_id, p.first_snapshot
+            LIMIT ?
+        """, params + (limit,)).fetchall()
+
+        return [
+            {
+                'host_id': host_id,
+                'term': term,
+                'first_snapshot': first_snapshot,
+                'last_snapshot': last_snapshot,
+                'first_seen': first_seen,
+                'last_seen': last_seen,
+                'active': last_snapshot is None,
+            }
+            for host_id, term, first_snapshot, last_snapshot, first_seen, last_seen in rows
+        ]
+
+    def stats(self, conn: sqlite3.Connection) -> Dict[str, int]:
+        """Term and posting counts"""
+        terms = conn.execute("SELECT COUNT(*) FROM fleet_terms").fetchone()[0]
+        postings, active = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(last_snapshot IS NULL), 0) FROM fleet_postings"
+        ).fetchone()
+        return {'terms': terms, 'postings': postings, 'active_postings': active}
+
+    def prune(self, conn: sqlite3.Connection) -> int:
+        """
+        Drop closed postings that end before a host's oldest remaining snapshot
+
+        Returns:
+            Number of deleted postings
+        """
+        cursor = conn.execute("""
+            DELETE FROM fleet_postings
+            WHERE last_snapshot IS NOT NULL AND last_snapshot < COALESCE(
+                (SELECT MIN(s.id) FROM fleet_snapshots s WHERE s.host_id = fleet_postings.host_id), 0
+            )
+        """)
+        return cursor.rowcount
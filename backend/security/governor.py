@@ -0,0 +1,218 @@
+"""
+Resource Governor Module
+Global limits on hashing IO and per-tick inspection work for all scanners
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Iterable, Iterator, Optional, TypeVar
+
+import psutil
+
+
+T = TypeVar('T')
+
+
+class TokenBucket:
+    """
+    Token bucket allowing `rate` units per second with bursts of `burst`
+
+    A request larger than the bucket is allowed to go into debt, so a
+    single large file is not refused; the caller then waits until the
+    debt has been paid back at the current rate.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, amount: float, rate: Optional[float] = None) -> float:
+        """
+        Take `amount` tokens and return how long the caller must wait
+
+        Args:
+            amount: Units to consume
+            rate: Refill rate to use (defaults to the configured rate)
+
+        Returns:
+            Seconds to sleep before proceeding (0 if within budget)
+        """
+        rate = rate or self.rate
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * rate)
+            self.updated = now
+            self.tokens -= amount
+            return -self.tokens / rate if self.tokens < 0 else 0.0
+
+
+class ResourceGovernor:
+    """
+    Budgets shared by every scanner so a scan never hurts a busy host
+
+    - Hashing: a token bucket on bytes read per second.
+    - Inspection: loops over processes/sockets yield the GIL after every
+      batch_size items and pause batch_pause seconds.
+    - Backoff: when the 1-minute load average per CPU exceeds
+      load_threshold, the hash rate is divided and pauses multiplied by
+      load / threshold (capped at max_backoff).
+
+    A zero limit disables that limit; all limits are off by default.
+    """
+
+    def __init__(
+        self,
+        hash_bytes_per_sec: float = 0,
+        hash_burst_bytes: Optional[float] = None,
+        batch_size: int = 0,
+        batch_pause: float = 0.0,
+        load_threshold: float = 0.0,
+        max_backoff: float = 4.0
+    ):
+        """
+        Args:
+            hash_bytes_per_sec: Bytes hashed per second (0 = unlimited)
+            hash_burst_bytes: Bucket size (defaults to one second of rate)
+            batch_size: Items inspected per tick before yielding (0 = no batching)
+            batch_pause: Seconds to pause between batches
+            load_threshold: Load average per CPU that triggers backoff (0 = never)
+            max_backoff: Largest backoff multiplier
+        """
+        self.hash_bytes_per_sec = hash_bytes_per_sec
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.load_threshold = load_threshold
+        self.max_backoff = max_backoff
+
+        self._bucket = TokenBucket(hash_bytes_per_sec, hash_burst_bytes or hash_bytes_per_sec) if hash_bytes_per_sec > 0 else None
+        self._load = (0.0, 1.0)  # (checked at, backoff factor)
+        self._load_per_cpu = None
+        self._lock = threading.Lock()
+        self._stats = {'bytes_hashed': 0, 'hash_wait': 0.0, 'batches': 0, 'batch_wait': 0.0}
+
+    @classmethod
+    def from_env(cls) -> 'ResourceGovernor':
+        """Build a governor configured from GOVERNOR_* environment variables"""
+        return cls(
+            hash_bytes_per_sec=float(os.environ.get('GOVERNOR_HASH_BYTES_PER_SEC', 0)),
+            hash_burst_bytes=float(os.environ.get('GOVERNOR_HASH_BURST_BYTES', 0)) or None,
+            batch_size=int(os.environ.get('GOVERNOR_BATCH_SIZE', 0)),
+            batch_pause=float(os.environ.get('GOVERNOR_BATCH_PAUSE', 0)),
+            load_threshold=float(os.environ.get('GOVERNOR_LOAD_THRESHOLD', 0)),
+            max_backoff=float(os.environ.get('GOVERNOR_MAX_BACKOFF', 4)),
+        )
+
+    def set_hash_rate(self, hash_bytes_per_sec: float, hash_burst_bytes: Optional[float] = None):
+        """
+        Change the hashing budget (worker processes take a share of the parent's)
+
+        Args:
+            hash_bytes_per_sec: Bytes hashed per second (0 = unlimited)
+            hash_burst_bytes: Bucket size (defaults to one second of rate)
+        """
+        self.hash_bytes_per_sec = hash_bytes_per_sec
+        self._bucket = TokenBucket(hash_bytes_per_sec, hash_burst_bytes or hash_bytes_per_sec) if hash_bytes_per_sec > 0 else None
+
+    def backoff_factor(self) -> float:
+        """Current backoff multiplier (1.0 = none), refreshed at most once a second"""
+        if self.load_threshold <= 0:
+            return 1.0
+
+        checked_at, factor = self._load
+        now = time.monotonic()
+        if now - checked_at < 1.0:
+            return factor
+
+        try:
+            load_per_cpu = psutil.getloadavg()[0] / (psutil.cpu_count() or 1)
+        except (OSError, AttributeError):
+            load_per_cpu = 0.0
+
+        factor = min(self.max_backoff, max(1.0, load_per_cpu / self.load_threshold))
+        self._load = (now, factor)
+        self._load_per_cpu = round(load_per_cpu, 2)
+        return factor
+
+    def throttle_bytes(self, size: int):
+        """
+        Account for `size` bytes about to be hashed, sleeping if over budget
+
+        Args:
+            size: File size in bytes
+        """
+        wait = 0.0
+        if self._bucket is not None and size > 0:
+            wait = self._bucket.consume(size, self.hash_bytes_per_sec / self.backoff_factor())
+            if wait > 0:
+                time.sleep(wait)
+
+        with self._lock:
+            self._stats['bytes_hashed'] += size
+            self._stats['hash_wait'] += wait
+
+    def batches(self, items: Iterable[T]) -> Iterator[T]:
+        """
+        Iterate over items, yielding to other work between batches
+
+        Args:
+            items: Processes, connections... (consumed lazily)
+
+        Yields:
+            The same items
+        """
+        if self.batch_size <= 0:
+            yield from items
+            return
+
+        count = 0
+        for item in items:
+            yield item
+            count += 1
+            if count % self.batch_size == 0:
+                pause = self.batch_pause * self.backoff_factor()
+                # sleep(0) still releases the GIL to the API and other threads
+                time.sleep(pause)
+                with self._lock:
+                    self._stats['batches'] += 1
+                    self._stats['batch_wait'] += pause
+
+    def snapshot(self) -> Dict:
+        """Counters to pass to report(since=...) to get one scan's usage"""
+        with self._lock:
+            return dict(self._stats)
+
+    def report(self, since: Optional[Dict] = None) -> Dict:
+        """
+        Configured and effective budget, plus usage since a snapshot
+
+        Args:
+            since: Earlier snapshot() (default: usage since start)
+
+        Returns:
+            Dictionary suitable for scan results
+        """
+        factor = self.backoff_factor()
+        current = self.snapshot()
+        since = since or {key: 0 for key in current}
+
+        return {
+            'hash_bytes_per_sec': self.hash_bytes_per_sec or None,
+            'effective_hash_bytes_per_sec': int(self.hash_bytes_per_sec / factor) if self.hash_bytes_per_sec else None,
+            'batch_size': self.batch_size or None,
+            'batch_pause': self.batch_pause,
+            'load_threshold': self.load_threshold or None,
+            'load_per_cpu': self._load_per_cpu,
+            'backoff_factor': round(factor, 2),
+            'bytes_hashed': current['bytes_hashed'] - since['bytes_hashed'],
+            'hash_wait_ms': int((current['hash_wait'] - since['hash_wait']) * 1000),
+            'batches': current['batches'] - since['batches'],
+            'batch_wait_ms': int((current['batch_wait'] - since['batch_wait']) * 1000),
+        }
+
+
+# Shared by all scanners
+governor = ResourceGovernor.from_env()
@@ -0,0 +1,246 @@
+"""
+Instrumentation Module
+Stage timers, counters and histograms rendered in Prometheus text format
+"""
+
+import functools
+import os
+import threading
+from bisect import bisect_left
+from time import perf_counter
+from typing import Callable, Dict, Iterable, List, Tuple
+
+
+# Read once at import: when disabled, @instrument returns functions
+# unchanged and timer() hands out a shared no-op, so there is no overhead
+ENABLED = os.environ.get('INSTRUMENTATION', 'true').lower() in ('1', 'true', 'yes')
+
+# Histogram buckets in seconds (scanner stages range from µs to seconds)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    """Escape a label value (backslash, double quote, newline)"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple, extra: str = '') -> str:
+    """Render {name="value",...}, with an optional pre-rendered extra pair"""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    """Integers without a trailing .0, floats in repr form"""
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1):
+        """Add amount to the series identified by the label values"""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        """Exposition lines for every series"""
+        with self._lock:
+            values = dict(self._values)
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(values.items())
+        ]
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+
+    kind = 'gauge'
+
+    def set(self, value: float, *labels):
+        """Set the series identified by the label values"""
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram:
+    """Bucketed distribution with optional labels"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [count per bucket (non-cumulative, last is +Inf), sum]
+        self._series: Dict[Tuple, List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        """Record one observation"""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        """Exposition lines: cumulative buckets, _sum and _count per series"""
+        with self._lock:
+            snapshot = {labels: (list(counts), total) for labels, (counts, total) in self._series.items()}
+
+        lines = []
+        for labels, (counts, total) in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = 'le="%s"' % ('+Inf' if bound == float('inf') else _format_value(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together"""
+
+    def __init__(self):
+        self.metrics: List = []
+
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Iterable[str] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        """All metrics in Prometheus text exposition format (0.0.4)"""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def _register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.histogram(
+    'babypluto_stage_duration_seconds', 'Time spent in each instrumented stage', ('stage',)
+)
+STAGE_ERRORS = registry.counter(
+    'babypluto_stage_errors_total', 'Exceptions raised by each instrumented stage', ('stage',)
+)
+STAGE_ITEMS = registry.counter(
+    'babypluto_stage_items_total', 'Items returned by stages that return lists', ('stage',)
+)
+HTTP_REQUESTS = registry.counter(
+    'babypluto_http_requests_total', 'API requests by route and status code', ('method', 'route', 'status')
+)
+HTTP_SECONDS = registry.histogram(
+    'babypluto_http_request_duration_seconds', 'API request latency by route', ('method', 'route')
+)
+
+
+def instrument(stage: str) -> Callable:
+    """
+    Decorator timing every call of a function as `stage`
+
+    Records duration, exceptions and, for list results, the item count.
+    Returns the function untouched when instrumentation is disabled.
+
+    Args:
+        stage: Stage label (e.g. 'scanner.processes')
+    """
+    def decorator(func: Callable) -> Callable:
+        if not ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                STAGE_ERRORS.inc(stage)
+                raise
+            finally:
+                STAGE_SECONDS.observe(perf_counter() - start, stage)
+            if isinstance(result, list):
+                STAGE_ITEMS.inc(stage, amount=len(result))
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+class _Timer:
+    """Context manager timing a block as a stage"""
+
+    __slots__ = ('stage', 'start')
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        STAGE_SECONDS.observe(perf_counter() - self.start, self.stage)
+        if exc_type is not None:
+            STAGE_ERRORS.inc(self.stage)
+        return False
+
+
+class _NullTimer:
+    """Shared no-op used when instrumentation is disabled"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(stage: str):
+    """
+    Time a block of code as `stage`
+
+        with timer('serialization.json'):
+            body = json.dumps(content)
+    """
+    return _Timer(stage) if ENABLED else _NULL_TIMER
+
+
+def render() -> str:
+    """Prometheus text exposition of the global registry"""
+    return registry.render()
@@ -5,27 +5,65 @@ Verifies file integrity using SHA-256 hashing
 
 import hashlib
 import os
-from typing import List, Dict
+import struct
+import threading
+from collections import OrderedDict
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterable, List, Dict, Optional, Tuple
 
+from .governor import governor
+from .instrumentation import instrument
+from .workers import HEADER_SIZE, ScanCancelled, attach_results, is_cancelled, worker_pool
 
-def scan_file_integrity(file_paths: List[str], baseline: Dict[str, str] = None) -> List[Dict]:
+
+# Hashes shared by every scanner: path -> (stat signature, 'sha256:...')
+# The signature includes ctime, which cannot be set back like mtime can
+HASH_CACHE_SIZE = 20000
+_hash_cache: "OrderedDict[str, Tuple[Tuple[int, int, int, int], str]]" = OrderedDict()
+_hash_cache_lock = threading.Lock()
+
+# Record written by pool workers per file: status, stat signature, raw digest
+HASH_RECORD = struct.Struct('<B7xqqqq32s')
+HASH_OK = 1          # Hashed, file unchanged while it was read
+HASH_UNSTABLE = 2    # Hashed, but the file changed meanwhile (not cached)
+HASH_FAILED = 3      # Missing or unreadable
+
+
+@instrument('scanner.integrity')
+def scan_file_integrity(
+    file_paths: List[str],
+    baseline: Dict[str, str] = None,
+    cancel: Optional[threading.Event] = None
+) -> List[Dict]:
     """
     Verify the integrity of specified files
     
+    Large lists are hashed in the worker pool first (SCAN_WORKERS), which
+    fills the shared cache the checks below read from.
+    
     Args:
         file_paths: List of file paths to check
         baseline: Optional dict of {filepath: expected_hash}
+        cancel: Set to stop the scan early
         
     Returns:
         List of file integrity check results
+        
+    Raises:
+        ScanCancelled: If cancel was set before the scan finished
     """
     results = []
     
+    if worker_pool.should_dispatch(len(file_paths)):
+        hash_files(file_paths, cancel)
+    
     for filepath in file_paths:
+        if cancel is not None and cancel.is_set():
+            raise ScanCancelled("File integrity scan cancelled")
         try:
             if os.path.exists(filepath):
-                # Calculate current hash
-                current_hash = calculate_sha256(filepath)
+                # Calculate current hash (reused if the file is unchanged)
+                current_hash = cached_sha256(filepath)
                 last_modified = os.path.getmtime(filepath)
                 
                 # Compare with baseline if available
@@ -95,6 +133,184 @@ def calculate_sha256(filepath: str, chunk_size: int = 8192) -> str:
         raise Exception(f"Failed to hash file {filepath}: {str(e)}")
 
 
+def file_signature(st: os.stat_result) -> Tuple[int, int, int, int]:
+    """
+    Identity of a file's content as far as stat can tell
+    
+    Args:
+        st: Result of os.stat
+        
+    Returns:
+        (inode, size, mtime_ns, ctime_ns)
+    """
+    return (st.st_ino, st.st_size, st.st_mtime_ns, st.st_ctime_ns)
+
+
+def cached_sha256(filepath: str) -> str:
+    """
+    SHA-256 of a file, reusing the shared cache while the file is unchanged
+    
+    Every scanner hashes through this function, so a binary referenced by
+    several startup items, processes or integrity checks is read once.
+    
+    Args:
+        filepath: Path to the file
+        
+    Returns:
+        SHA-256 hash string with 'sha256:' prefix
+    """
+    signature = file_signature(os.stat(filepath))
+    
+    with _hash_cache_lock:
+        cached = _hash_cache.get(filepath)
+        if cached and cached[0] == signature:
+            _hash_cache.move_to_end(filepath)
+            return cached[1]
+    
+    # Only reads count against the hashing budget, cache hits are free
+    governor.throttle_bytes(signature[1])
+    digest = calculate_sha256(filepath)
+    
+    # Only cache if the file did not change while it was being read
+    if file_signature(os.stat(filepath)) == signature:
+        _remember_hash(filepath, signature, digest)
+    
+    return digest
+
+
+def _remember_hash(filepath: str, signature: Tuple[int, int, int, int], digest: str):
+    """Store a hash in the shared cache, evicting the least recently used"""
+    with _hash_cache_lock:
+        _hash_cache[filepath] = (signature, digest)
+        _hash_cache.move_to_end(filepath)
+        while len(_hash_cache) > HASH_CACHE_SIZE:
+            _hash_cache.popitem(last=False)
+
+
+def hash_files(file_paths: Iterable[str], cancel: Optional[threading.Event] = None) -> Dict[str, str]:
+    """
+    SHA-256 of many files through the shared cache
+    
+    Cache misses are hashed in the worker pool when there are enough of
+    them (see workers.py), otherwise in this process; either way the
+    results land in the shared cache.
+    
+    Args:
+        file_paths: Paths to hash (duplicates are hashed once)
+        cancel: Set to stop early
+        
+    Returns:
+        Dictionary of path -> 'sha256:...' for every readable file
+        
+    Raises:
+        ScanCancelled: If cancel was set before hashing finished
+    """
+    digests = {}
+    misses = []
+    
+    for filepath in dict.fromkeys(file_paths):
+        try:
+            signature = file_signature(os.stat(filepath))
+        except (OSError, ValueError):
+            continue
+        with _hash_cache_lock:
+            cached = _hash_cache.get(filepath)
+        if cached and cached[0] == signature:
+            digests[filepath] = cached[1]
+        else:
+            misses.append((filepath, signature))
+    
+    if worker_pool.should_dispatch(len(misses)):
+        try:
+            records, _ = worker_pool.run(_hash_chunk, [filepath for filepath, _ in misses], HASH_RECORD.size, cancel)
+        except BrokenProcessPool:
+            # Recorded in worker_pool.status(); hash in-process instead
+            pass
+        except ScanCancelled as e:
+            # Keep what the workers finished so a rerun does not redo it
+            _read_hash_records(e.partial[0], misses, digests)
+            raise
+        else:
+            _read_hash_records(records, misses, digests)
+            return digests
+    
+    for filepath, _ in misses:
+        if cancel is not None and cancel.is_set():
+            raise ScanCancelled("Hashing cancelled")
+        digest = try_cached_sha256(filepath)
+        if digest:
+            digests[filepath] = digest
+    
+    return digests
+
+
+def _read_hash_records(records: bytes, files: List[Tuple[str, Tuple[int, int, int, int]]], digests: Dict[str, str]):
+    """Collect hashes from worker records into digests and the shared cache"""
+    for index, (filepath, signature) in enumerate(files):
+        status, inode, size, mtime_ns, ctime_ns, raw = HASH_RECORD.unpack_from(records, index * HASH_RECORD.size)
+        if status not in (HASH_OK, HASH_UNSTABLE):
+            continue
+        digest = f"sha256:{raw.hex()}"
+        digests[filepath] = digest
+        if status == HASH_OK and (inode, size, mtime_ns, ctime_ns) == signature:
+            _remember_hash(filepath, signature, digest)
+
+
+def _hash_chunk(block_name: str, start: int, file_paths: List[str]) -> Dict[int, str]:
+    """
+    Worker side of hash_files: hash a chunk into the job's shared records
+    
+    Returns:
+        {index: error message} for files that could not be hashed
+    """
+    errors = {}
+    with attach_results(block_name) as buf:
+        for index, filepath in enumerate(file_paths, start):
+            if is_cancelled(buf):
+                break
+            offset = HEADER_SIZE + index * HASH_RECORD.size
+            try:
+                before = os.stat(filepath)
+                governor.throttle_bytes(before.st_size)
+                digest = calculate_sha256(filepath, chunk_size=1 << 20)
+                after = os.stat(filepath)
+            except Exception as e:
+                HASH_RECORD.pack_into(buf, offset, HASH_FAILED, 0, 0, 0, 0, b'')
+                errors[index] = str(e)
+                continue
+            status = HASH_OK if file_signature(before) == file_signature(after) else HASH_UNSTABLE
+            HASH_RECORD.pack_into(
+                buf, offset, status,
+                after.st_ino, after.st_size, after.st_mtime_ns, after.st_ctime_ns,
+                bytes.fromhex(digest[len('sha256:'):])
+            )
+    return errors
+
+
+def try_cached_sha256(filepath: Optional[str]) -> Optional[str]:
+    """
+    Like cached_sha256, but returns None for missing/unreadable files
+    
+    Args:
+        filepath: Path to the file (None is allowed)
+        
+    Returns:
+        SHA-256 hash string or None
+    """
+    if not filepath:
+        return None
+    try:
+        return cached_sha256(filepath)
+    except Exception:
+        return None
+
+
+def clear_hash_cache():
+    """Forget every cached hash"""
+    with _hash_cache_lock:
+        _hash_cache.clear()
+
+
 def calculate_md5(filepath: str, chunk_size: int = 8192) -> str:
     """
     Calculate MD5 hash of a file (legacy support)
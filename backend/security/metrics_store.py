@@ -0,0 +1,368 @@
+"""
+Metrics Store Module
+In-memory ring buffers of process/port/host metrics with downsampled
+history in SQLite
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .instrumentation import instrument
+
+
+# Metrics recorded for each kind of series, in storage order
+SERIES_METRICS = {
+    'host': ('cpu_percent', 'memory_percent', 'processes', 'connections'),
+    'process': ('cpu_percent', 'memory_percent'),
+    'port': ('connections',),
+}
+
+
+class RingBuffer:
+    """
+    Fixed-size circular buffer of timestamped metric rows
+
+    Values are stored in flat float arrays (4 bytes per value) so that
+    thousands of series stay compact.
+    """
+
+    __slots__ = ('size', 'width', 'times', 'values', 'head', 'count')
+
+    def __init__(self, size: int, width: int):
+        self.size = size
+        self.width = width
+        self.times = array('d', bytes(8 * size))
+        self.values = array('f', bytes(4 * size * width))
+        self.head = 0
+        self.count = 0
+
+    def append(self, timestamp: float, values: Tuple[float, ...]):
+        """Add a row, overwriting the oldest one when full"""
+        self.times[self.head] = timestamp
+        offset = self.head * self.width
+        self.values[offset:offset + self.width] = array('f', values)
+        self.head = (self.head + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+    def rows(self, start: float = 0.0, end: float = float('inf')) -> List[Tuple[float, Tuple[float, ...]]]:
+        """Rows with start <= timestamp <= end, oldest first"""
+        first = (self.head - self.count) % self.size
+        result = []
+        for i in range(self.count):
+            index = (first + i) % self.size
+            timestamp = self.times[index]
+            if start <= timestamp <= end:
+                offset = index * self.width
+                result.append((timestamp, tuple(self.values[offset:offset + self.width])))
+        return result
+
+    @property
+    def last_timestamp(self) -> float:
+        """Timestamp of the newest row (0 if empty)"""
+        return self.times[(self.head - 1) % self.size] if self.count else 0.0
+
+
+class MetricsStore:
+    """
+    Time-series store fed by the background sampler
+
+    Recent samples stay in per-series ring buffers; every flush_interval
+    they are averaged into `resolution`-second buckets (avg and max per
+    metric) and written to SQLite, where history is kept for
+    retention_days.
+
+    Only the host series and the persist_top busiest process and port
+    series of each flush are stored, and a bucket equal to the previous
+    stored bucket of its series is skipped: a gap between two stored
+    points means the series held the earlier value.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "data/metrics.db",
+        ring_size: int = 120,
+        resolution: int = 60,
+        flush_interval: int = 300,
+        retention_days: int = 7,
+        persist_top: int = 20
+    ):
+        """
+        Args:
+            db_path: SQLite file for downsampled history
+            ring_size: Raw samples kept in memory per series
+            resolution: Bucket size in seconds for stored history
+            flush_interval: Seconds between flushes to SQLite
+            retention_days: Days of stored history to keep
+            persist_top: Process and port series stored per flush (each
+                kind ranked by peak values; 0 stores only the host)
+        """
+        self.db_path = db_path
+        self.ring_size = ring_size
+        self.resolution = resolution
+        self.flush_interval = flush_interval
+        self.retention_days = retention_days
+        self.persist_top = persist_top
+
+        # series key -> (kind, label, ring buffer)
+        self._series: Dict[str, Tuple[str, str, RingBuffer]] = {}
+        # series key -> timestamp up to which rows were flushed
+        self._flushed_until: Dict[str, float] = {}
+        # series key -> (avg, max) values of its last stored bucket
+        self._last_stored: Dict[str, Tuple[float, ...]] = {}
+        self._last_flush = time.time()
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    @classmethod
+    def from_env(cls) -> 'MetricsStore':
+        """Build a store configured from METRICS_* environment variables"""
+        return cls(
+            db_path=os.environ.get('METRICS_DB', 'data/metrics.db'),
+            ring_size=int(os.environ.get('METRICS_RING_SIZE', 120)),
+            resolution=int(os.environ.get('METRICS_RESOLUTION', 60)),
+            flush_interval=int(os.environ.get('METRICS_FLUSH_INTERVAL', 300)),
+            retention_days=int(os.environ.get('METRICS_RETENTION_DAYS', 7)),
+            persist_top=int(os.environ.get('METRICS_PERSIST_TOP', 20)),
+        )
+
+    def record(self, key: str, kind: str, label: str, timestamp: float, values: Tuple[float, ...]):
+        """
+        Append one sample to a series
+
+        Args:
+            key: Series key (e.g. 'process:1234:1700000000')
+            kind: 'host', 'process' or 'port'
+            label: Human-readable name (process name, port...)
+            timestamp: Unix time of the sample
+            values: One value per metric in SERIES_METRICS[kind]
+        """
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = (kind, label, RingBuffer(self.ring_size, len(SERIES_METRICS[kind])))
+                self._series[key] = series
+            series[2].append(timestamp, values)
+
+    def record_snapshot(
+        self,
+        timestamp: float,
+        host: Tuple[float, ...],
+        processes: Dict[int, Dict],
+        port_connections: Dict[int, int]
+    ):
+        """
+        Record a full sampler snapshot and flush if due
+
+        Args:
+            timestamp: Unix time of the snapshot
+            host: Values for SERIES_METRICS['host']
+            processes: pid -> {'name', 'create_time', 'cpu_percent', 'memory_percent'}
+            port_connections: local port -> number of connections
+        """
+        self.record('host', 'host', 'host', timestamp, host)
+
+        for pid, usage in processes.items():
+            # create_time in the key keeps reused PIDs apart
+            key = f"process:{pid}:{int(usage.get('create_time') or 0)}"
+            self.record(key, 'process', f"{usage.get('name')} ({pid})", timestamp,
+                        (usage['cpu_percent'], usage['memory_percent']))
+
+        for port, count in port_connections.items():
+            self.record(f"port:{port}", 'port', str(port), timestamp, (count,))
+
+        if timestamp - self._last_flush >= self.flush_interval:
+            self.flush(timestamp)
+
+    def list_series(self, kind: Optional[str] = None) -> List[Dict]:
+        """
+        Series currently held in memory
+
+        Args:
+            kind: Only series of this kind
+
+        Returns:
+            List of {key, kind, label, metrics, last_timestamp}
+        """
+        with self._lock:
+            return [
+                {
+                    'key': key,
+                    'kind': series_kind,
+                    'label': label,
+                    'metrics': list(SERIES_METRICS[series_kind]),
+                    'last_timestamp': ring.last_timestamp,
+                }
+                for key, (series_kind, label, ring) in self._series.items()
+                if kind is None or series_kind == kind
+            ]
+
+    @instrument('sqlite.metrics_history')
+    def history(self, key: str, start: float = 0.0, end: Optional[float] = None) -> Dict:
+        """
+        Stored buckets plus in-memory raw samples of a series
+
+        Args:
+            key: Series key
+            start: Unix time range start (inclusive)
+            end: Unix time range end (inclusive, default now)
+
+        Returns:
+            {key, kind, label, metrics, points} with points oldest first;
+            stored points carry '<metric>_max' fields and 'samples'
+        """
+        end = end if end is not None else time.time()
+        points = []
+        kind = label = None
+
+        rows = []
+        # Nothing stored yet: do not create the database on a read
+        if self._initialized or os.path.exists(self.db_path):
+            with self._connect() as conn:
+                rows = conn.execute("""
+                    SELECT kind, label, bucket, metric, avg, max, samples FROM metric_history
+                    WHERE series = ? AND bucket >= ? AND bucket <= ?
+                    ORDER BY bucket
+                """, (key, int(start) - int(start) % self.resolution, int(end))).fetchall()
+
+        buckets: Dict[int, Dict] = {}
+        for row_kind, row_label, bucket, metric, avg, peak, samples in rows:
+            kind, label = row_kind, row_label
+            point = buckets.setdefault(bucket, {'timestamp': bucket, 'samples': samples})
+            point[metric] = avg
+            point[f"{metric}_max"] = peak
+        points.extend(buckets.values())
+
+        with self._lock:
+            series = self._series.get(key)
+            if series:
+                kind, label, ring = series
+                # Raw samples not yet covered by stored buckets
+                raw_start = max(start, self._flushed_until.get(key, 0.0))
+                metrics = SERIES_METRICS[kind]
+                for timestamp, values in ring.rows(raw_start, end):
+                    points.append({
+                        'timestamp': timestamp,
+                        **{metric: round(value, 2) for metric, value in zip(metrics, values)}
+                    })
+
+        return {
+            'key': key,
+            'kind': kind,
+            'label': label,
+            'metrics': list(SERIES_METRICS[kind]) if kind else [],
+            'points': points,
+        }
+
+    @instrument('sqlite.metrics_flush')
+    def flush(self, now: Optional[float] = None) -> int:
+        """
+        Downsample complete buckets to SQLite and drop stale series
+
+        Args:
+            now: Current Unix time (default time.time())
+
+        Returns:
+            Number of rows written
+        """
+        now = now if now is not None else time.time()
+        # Only flush buckets that can no longer receive samples
+        cutoff = now - now % self.resolution
+        # (peak, key, kind, label, buckets) of each series with new samples
+        pending = []
+
+        with self._lock:
+            for key, (kind, label, ring) in list(self._series.items()):
+                flushed = self._flushed_until.get(key, 0.0)
+                buckets: Dict[int, List[Tuple[float, ...]]] = {}
+                for timestamp, values in ring.rows(flushed, cutoff):
+                    if flushed <= timestamp < cutoff:
+                        buckets.setdefault(int(timestamp) - int(timestamp) % self.resolution, []).append(values)
+
+                if buckets:
+                    peak = max(sum(sample) for samples in buckets.values() for sample in samples)
+                    pending.append((peak, key, kind, label, buckets))
+
+                self._flushed_until[key] = cutoff
+
+                # Forget series (e.g. exited processes) with no recent samples
+                if ring.last_timestamp < now - 2 * self.flush_interval:
+                    del self._series[key]
+                    self._flushed_until.pop(key, None)
+                    self._last_stored.pop(key, None)
+
+            rows = self._stored_rows(pending)
+            self._last_flush = now
+
+        with self._connect() as conn:
+            conn.executemany("""
+                INSERT OR REPLACE INTO metric_history
+                (series, kind, label, bucket, metric, avg, max, samples)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            conn.execute("DELETE FROM metric_history WHERE bucket < ?",
+                         (int(now - self.retention_days * 86400),))
+            conn.commit()
+
+        return len(rows)
+
+    def _stored_rows(self, pending: List[tuple]) -> List[tuple]:
+        """metric_history rows of the series and buckets worth storing"""
+        ranked = {'process': [], 'port': []}
+        selected = []
+        for entry in pending:
+            if entry[2] in ranked:
+                ranked[entry[2]].append(entry)
+            else:
+                selected.append(entry)
+        for entries in ranked.values():
+            entries.sort(key=lambda entry: entry[0], reverse=True)
+            selected.extend(entries[:self.persist_top])
+            # A series that drops out starts afresh when it is stored again
+            for entry in entries[self.persist_top:]:
+                self._last_stored.pop(entry[1], None)
+
+        rows = []
+        for _, key, kind, label, buckets in selected:
+            for bucket in sorted(buckets):
+                samples = buckets[bucket]
+                summary = []
+                for i in range(len(SERIES_METRICS[kind])):
+                    column = [sample[i] for sample in samples]
+                    summary.append((round(sum(column) / len(column), 2), round(max(column), 2)))
+                values = tuple(summary)
+                if self._last_stored.get(key) == values:
+                    continue
+                self._last_stored[key] = values
+                rows.extend(
+                    (key, kind, label, bucket, metric, avg, peak, len(samples))
+                    for metric, (avg, peak) in zip(SERIES_METRICS[kind], summary)
+                )
+        return rows
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection, creating the schema on first use"""
+        if not self._initialized:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS metric_history (
+                        series TEXT NOT NULL,
+                        kind TEXT NOT NULL,
+                        label TEXT,
+                        bucket INTEGER NOT NULL,
+                        metric TEXT NOT NULL,
+                        avg REAL,
+                        max REAL,
+                        samples INTEGER,
+                        PRIMARY KEY (series, bucket, metric)
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_metric_history_bucket ON metric_history (bucket)")
+                conn.commit()
+            self._initialized = True
+        return sqlite3.connect(self.db_path)
@@ -6,7 +6,11 @@ Scans open ports and network connections using psutil
 import psutil
 from typing import List, Dict
 
+from .governor import governor
+from .instrumentation import instrument
 
+
+@instrument('scanner.ports')
 def scan_open_ports() -> List[Dict]:
     """
     Scan all open ports and active network connections
@@ -16,7 +20,7 @@ def scan_open_ports() -> List[Dict]:
     """
     ports = []
     
-    for conn in psutil.net_connections(kind='inet'):
+    for conn in governor.batches(psutil.net_connections(kind='inet')):
         try:
             # Get process info if available
             process_name = None
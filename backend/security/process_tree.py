@@ -0,0 +1,255 @@
+"""
+Process Tree Module
+Parent/child model of a process snapshot with lineage-based risk rules
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from .instrumentation import instrument
+
+
+# Process names by role (lowercase, without .exe)
+WEB_SERVERS = {
+    'nginx', 'apache', 'apache2', 'httpd', 'lighttpd', 'caddy', 'w3wp',
+    'tomcat', 'php-fpm', 'php-cgi', 'gunicorn', 'uwsgi', 'iisexpress',
+}
+DOCUMENT_APPS = {
+    'winword', 'excel', 'powerpnt', 'outlook', 'acrord32', 'acrobat',
+    'soffice', 'soffice.bin', 'libreoffice', 'evince', 'okular',
+}
+DATABASES = {'mysqld', 'mariadbd', 'postgres', 'sqlservr', 'mongod', 'redis-server'}
+SHELLS = {
+    'sh', 'bash', 'dash', 'zsh', 'ksh', 'csh', 'tcsh', 'fish', 'busybox',
+    'cmd', 'powershell', 'pwsh', 'wscript', 'cscript', 'mshta',
+    'nc', 'ncat', 'netcat', 'socat',
+}
+
+# A process named in 'child' with any ancestor named in 'ancestor'
+LINEAGE_RULES = [
+    {
+        'id': 'web_server_shell',
+        'ancestor': WEB_SERVERS,
+        'child': SHELLS,
+        'severity': 'high',
+        'title': 'Shell spawned by a web server',
+    },
+    {
+        'id': 'document_shell',
+        'ancestor': DOCUMENT_APPS,
+        'child': SHELLS,
+        'severity': 'high',
+        'title': 'Shell spawned by a document viewer/editor',
+    },
+    {
+        'id': 'database_shell',
+        'ancestor': DATABASES,
+        'child': SHELLS,
+        'severity': 'high',
+        'title': 'Shell spawned by a database server',
+    },
+]
+
+RISK_ORDER = {'safe': 0, 'low': 1, 'medium': 2, 'high': 3}
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """Lowercase process name without a Windows .exe suffix"""
+    name = (name or '').lower()
+    return name[:-4] if name.endswith('.exe') else name
+
+
+class ProcessTree:
+    """
+    Parent/child index over one process snapshot
+
+    Built once in O(n); ancestry lookups are memoized so repeated
+    queries for processes sharing ancestors reuse earlier work.
+    """
+
+    def __init__(self, processes: List[Dict]):
+        """
+        Args:
+            processes: Process dictionaries with 'pid' and 'ppid'
+        """
+        self.by_pid: Dict[int, Dict] = {p['pid']: p for p in processes}
+        self.children: Dict[int, List[int]] = {}
+        self.roots: List[int] = []
+        self._ancestry: Dict[int, Tuple[int, ...]] = {}
+
+        for process in processes:
+            pid = process['pid']
+            ppid = process.get('ppid')
+            if ppid in self.by_pid and ppid != pid:
+                self.children.setdefault(ppid, []).append(pid)
+            else:
+                self.roots.append(pid)
+
+        # PID reuse can create parent cycles unreachable from any root
+        reachable: set = set()
+        for pid in self.roots:
+            self._mark_subtree(pid, reachable)
+        for pid in self.by_pid:
+            if pid not in reachable:
+                self.roots.append(pid)
+                self._mark_subtree(pid, reachable)
+
+    def _mark_subtree(self, pid: int, marked: set):
+        """Add pid and all its descendants to marked"""
+        stack = [pid]
+        while stack:
+            current = stack.pop()
+            if current not in marked:
+                marked.add(current)
+                stack.extend(self.children.get(current, []))
+
+    def parent(self, pid: int) -> Optional[Dict]:
+        """Parent process of pid, if it is in the snapshot"""
+        process = self.by_pid.get(pid)
+        if not process:
+            return None
+        ppid = process.get('ppid')
+        return self.by_pid.get(ppid) if ppid != pid else None
+
+    def ancestry_pids(self, pid: int) -> Tuple[int, ...]:
+        """
+        PIDs of all ancestors of pid, nearest first
+
+        Args:
+            pid: Process ID
+
+        Returns:
+            Tuple of ancestor PIDs (empty for roots and unknown PIDs)
+        """
+        if pid in self._ancestry:
+            return self._ancestry[pid]
+
+        # Walk up until a memoized or root process, then fill the memo back down
+        chain = []
+        seen = {pid}
+        current = pid
+        while True:
+            parent = self.parent(current)
+            if parent is None or parent['pid'] in seen:
+                tail: Tuple[int, ...] = ()
+                break
+            chain.append(parent['pid'])
+            seen.add(parent['pid'])
+            if parent['pid'] in self._ancestry:
+                tail = self._ancestry[parent['pid']]
+                break
+            current = parent['pid']
+
+        lineage = tuple(chain) + tail
+        for i, member in enumerate([pid] + chain):
+            self._ancestry[member] = lineage[i:]
+
+        return lineage
+
+    def ancestry(self, pid: int) -> List[Dict]:
+        """Ancestor process dictionaries of pid, nearest first"""
+        return [self.by_pid[ancestor] for ancestor in self.ancestry_pids(pid)]
+
+    def to_nested(self, fields: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Nested tree of process dictionaries with 'children' lists
+
+        Args:
+            fields: Process fields to keep (None = all)
+
+        Returns:
+            List of root nodes
+        """
+        def node(pid: int) -> Dict:
+            process = self.by_pid[pid]
+            data = {f: process.get(f) for f in fields} if fields else dict(process)
+            data['children'] = []
+            return data
+
+        nodes = {}
+        roots = []
+        stack = [(pid, None) for pid in reversed(self.roots)]
+        while stack:
+            pid, parent_node = stack.pop()
+            if pid in nodes:
+                continue
+            nodes[pid] = current = node(pid)
+            (parent_node['children'] if parent_node is not None else roots).append(current)
+            for child in reversed(self.children.get(pid, [])):
+                stack.append((child, current))
+
+        return roots
+
+    def evaluate_lineage_rules(self, rules: List[Dict] = LINEAGE_RULES) -> List[Dict]:
+        """
+        Evaluate lineage rules in one depth-first traversal
+
+        The traversal carries, for each rule, the nearest ancestor that
+        matched the rule's ancestor set, so no per-process parent walk
+        is needed.
+
+        Args:
+            rules: Lineage rules (see LINEAGE_RULES)
+
+        Returns:
+            List of findings {rule, severity, title, pid, name, ancestor_pid, ancestor_name}
+        """
+        findings = []
+        visited = set()
+        stack = [(pid, {}) for pid in self.roots]
+
+        while stack:
+            pid, context = stack.pop()
+            if pid in visited:
+                continue
+            visited.add(pid)
+
+            process = self.by_pid[pid]
+            name = normalize_name(process.get('name'))
+            child_context = context
+
+            for rule in rules:
+                ancestor_pid = context.get(rule['id'])
+                if ancestor_pid is not None and name in rule['child']:
+                    findings.append({
+                        'rule': rule['id'],
+                        'severity': rule['severity'],
+                        'title': rule['title'],
+                        'pid': pid,
+                        'name': process.get('name'),
+                        'ancestor_pid': ancestor_pid,
+                        'ancestor_name': self.by_pid[ancestor_pid].get('name'),
+                    })
+                if name in rule['ancestor']:
+                    if child_context is context:
+                        child_context = dict(context)
+                    child_context[rule['id']] = pid
+
+            for child in self.children.get(pid, []):
+                stack.append((child, child_context))
+
+        return findings
+
+
+@instrument('risk.lineage')
+def apply_lineage_rules(processes: List[Dict]) -> List[Dict]:
+    """
+    Tag processes matching lineage rules and raise their risk level
+
+    Adds a 'lineage_alerts' list to each matching process.
+
+    Args:
+        processes: Process dictionaries with 'pid' and 'ppid' (modified in place)
+
+    Returns:
+        List of findings
+    """
+    tree = ProcessTree(processes)
+    findings = tree.evaluate_lineage_rules()
+
+    for finding in findings:
+        process = tree.by_pid[finding['pid']]
+        process.setdefault('lineage_alerts', []).append(finding)
+        if RISK_ORDER[finding['severity']] > RISK_ORDER.get(process.get('risk_level'), 0):
+            process['risk_level'] = finding['severity']
+
+    return findings
@@ -3,32 +3,69 @@ Process Monitoring Module
 Scans and analyzes running system processes using psutil
 """
 
+import os
 import psutil
-from typing import List, Dict
+from typing import List, Dict, Optional
 
+from . import procfs
+from .governor import governor
+from .integrity import hash_files, try_cached_sha256
+from .instrumentation import instrument
+from .process_tree import apply_lineage_rules
+from .reputation import hash_reputation, KNOWN_BAD
 
-def scan_processes() -> List[Dict]:
+
+# Process reader: 'psutil' (cross-platform) or 'procfs' (Linux /proc reader)
+PROCESS_SCANNER = os.environ.get('PROCESS_SCANNER', 'psutil')
+
+PROCESS_ATTRS = [
+    'pid', 'name', 'username', 'cpu_percent',
+    'memory_percent', 'status', 'create_time', 'cmdline', 'exe', 'ppid'
+]
+
+
+def iter_process_info(engine: str = None):
+    """
+    Yield raw process info dictionaries from the configured reader
+    
+    Args:
+        engine: 'psutil' or 'procfs' (defaults to PROCESS_SCANNER); procfs
+            falls back to psutil where /proc is not available
+    
+    Yields:
+        Dictionaries with the PROCESS_ATTRS keys
+    """
+    if (engine or PROCESS_SCANNER) == 'procfs' and procfs.is_available():
+        yield from procfs.iter_process_info()
+        return
+    
+    for proc in psutil.process_iter(PROCESS_ATTRS):
+        yield proc.info
+
+
+@instrument('scanner.processes')
+def scan_processes(include_hashes: bool = False, engine: str = None) -> List[Dict]:
     """
     Scan all running processes on the system
     
+    Args:
+        include_hashes: Also hash each executable and look the hash up
+            in the local reputation lists
+        engine: Process reader override ('psutil' or 'procfs')
+    
     Returns:
         List of process dictionaries with security analysis
     """
     processes = []
     
-    for proc in psutil.process_iter([
-        'pid', 'name', 'username', 'cpu_percent', 
-        'memory_percent', 'status', 'create_time', 'cmdline'
-    ]):
+    for info in governor.batches(iter_process_info(engine)):
         try:
-            # Get process info
-            info = proc.info
-            
             # Analyze risk level
             risk_level = analyze_process_risk(info)
             
             processes.append({
                 'pid': info['pid'],
+                'ppid': info['ppid'],
                 'name': info['name'],
                 'username': info['username'] or 'SYSTEM',
                 'cpu_percent': info['cpu_percent'] or 0.0,
@@ -36,6 +73,7 @@ def scan_processes() -> List[Dict]:
                 'status': info['status'],
                 'create_time': int(info['create_time']),
                 'cmdline': info['cmdline'] or [],
+                'exe': info['exe'] or None,
                 'risk_level': risk_level
             })
             
@@ -43,6 +81,52 @@ def scan_processes() -> List[Dict]:
             # Skip processes we can't access
             continue
     
+    if include_hashes:
+        attach_executable_hashes(processes)
+        for process in processes:
+            if process['reputation'] == KNOWN_BAD:
+                process['risk_level'] = 'high'
+    
+    # Parent/child rules (e.g. a shell spawned by a web server)
+    apply_lineage_rules(processes)
+    
+    return processes
+
+
+@instrument('risk.process_hashes')
+def attach_executable_hashes(processes: List[Dict]) -> List[Dict]:
+    """
+    Add 'exe_hash' and 'reputation' to each process
+    
+    Each distinct executable is hashed once per scan, and hashes persist
+    across scans in the shared cache while the file's inode, size and
+    times are unchanged. Executables deleted from disk are hashed through
+    /proc/<pid>/exe on Linux.
+    
+    Args:
+        processes: Process dictionaries with 'exe' to enrich in place
+        
+    Returns:
+        The same list
+    """
+    # Distinct executables in one batch, so misses can go to the worker pool
+    hashes = hash_files(process['exe'] for process in processes if process.get('exe'))
+    
+    for process in processes:
+        exe = process.get('exe')
+        if not exe:
+            process['exe_hash'] = None
+            process['reputation'] = None
+            continue
+        
+        digest = hashes.get(exe)
+        
+        if digest is None and os.path.exists(f"/proc/{process['pid']}/exe"):
+            digest = try_cached_sha256(f"/proc/{process['pid']}/exe")
+        
+        process['exe_hash'] = digest
+        process['reputation'] = hash_reputation.lookup(digest)
+    
     return processes
 
 
@@ -71,6 +155,10 @@ def analyze_process_risk(proc_info: Dict) -> str:
         'unknown', 'suspicious', 'temp', 'tmp'
     ]
     
+    # Executable hash on the local deny list
+    if proc_info.get('reputation') == KNOWN_BAD:
+        return 'high'
+    
     # Check for high-risk indicators
     if any(keyword in name for keyword in high_risk_keywords):
         return 'high'
@@ -92,33 +180,60 @@ def analyze_process_risk(proc_info: Dict) -> str:
     return 'safe'
 
 
-def get_process_by_pid(pid: int) -> Dict:
+def get_process_by_pid(
+    pid: int,
+    usage: Optional[Dict] = None,
+    connections: Optional[int] = None,
+    include: tuple = ()
+) -> Optional[Dict]:
     """
     Get detailed information about a specific process
     
+    Never sleeps: CPU usage comes from the caller's sampled data (or is
+    None), and expensive details are only read when requested.
+    
     Args:
         pid: Process ID
+        usage: Sampled {'cpu_percent', 'memory_percent'} for the process
+        connections: Socket count from a shared snapshot
+        include: Extra details to read: 'open_files', 'memory_maps'
         
     Returns:
-        Dictionary with detailed process information
+        Dictionary with detailed process information, or None
     """
     try:
         proc = psutil.Process(pid)
         
-        return {
-            'pid': proc.pid,
-            'name': proc.name(),
-            'username': proc.username(),
-            'status': proc.status(),
-            'cpu_percent': proc.cpu_percent(interval=0.1),
-            'memory_percent': proc.memory_percent(),
-            'memory_info': proc.memory_info()._asdict(),
-            'create_time': int(proc.create_time()),
-            'cmdline': proc.cmdline(),
-            'cwd': proc.cwd(),
-            'num_threads': proc.num_threads(),
-            'connections': len(proc.connections())
-        }
+        with proc.oneshot():
+            details = {
+                'pid': proc.pid,
+                'ppid': proc.ppid(),
+                'name': proc.name(),
+                'username': proc.username(),
+                'status': proc.status(),
+                'cpu_percent': usage['cpu_percent'] if usage else None,
+                'memory_percent': proc.memory_percent(),
+                'memory_info': proc.memory_info()._asdict(),
+                'create_time': int(proc.create_time()),
+                'cmdline': proc.cmdline(),
+                'num_threads': proc.num_threads(),
+                'connections': connections
+            }
+        
+        # These can fail for other users' processes without hiding the rest
+        for field, getter in (('exe', proc.exe), ('cwd', proc.cwd)):
+            try:
+                details[field] = getter()
+            except (psutil.AccessDenied, psutil.ZombieProcess):
+                details[field] = None
+        
+        if 'open_files' in include:
+            details['open_files'] = [f._asdict() for f in proc.open_files()]
+        if 'memory_maps' in include:
+            details['memory_maps'] = [m._asdict() for m in proc.memory_maps(grouped=True)]
+        
+        details['risk_level'] = analyze_process_risk({**details, 'cpu_percent': details['cpu_percent'] or 0})
+        return details
     except (psutil.NoSuchProcess, psutil.AccessDenied):
         return None
 
@@ -0,0 +1,203 @@
+"""
+Procfs Process Reader (Linux)
+Reads process information straight from /proc with minimal syscalls
+
+Produces the same fields as psutil.process_iter() for the attributes
+scan_processes() uses, but per process only reads /proc/<pid>/stat and
+/proc/<pid>/cmdline, stats /proc/<pid> for the owner uid and readlinks
+/proc/<pid>/exe. Usernames are resolved once per uid.
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Iterator, Optional, Tuple
+
+try:
+    import pwd
+except ImportError:  # Windows
+    pwd = None
+
+
+PROC = '/proc'
+
+# Same names psutil uses for /proc/<pid>/stat state letters
+STATUS_NAMES = {
+    'R': 'running',
+    'S': 'sleeping',
+    'D': 'disk-sleep',
+    'T': 'stopped',
+    't': 'tracing-stop',
+    'Z': 'zombie',
+    'X': 'dead',
+    'x': 'dead',
+    'K': 'wake-kill',
+    'W': 'waking',
+    'I': 'idle',
+    'P': 'parked',
+}
+
+# Kernel limit on the comm name in /proc/<pid>/stat
+COMM_MAX_LENGTH = 15
+
+# Bytes requested per read of a /proc file
+READ_SIZE = 64 * 1024
+
+_usernames: Dict[int, str] = {}
+# (pid, starttime ticks) -> (cpu ticks, monotonic time) from the latest scan.
+# The sampler, drift checks and API requests scan concurrently, so it is
+# only read and written under the lock.
+_cpu_samples: Dict[Tuple[int, int], Tuple[int, float]] = {}
+_cpu_samples_lock = threading.Lock()
+
+
+def is_available() -> bool:
+    """True if /proc looks like a Linux procfs"""
+    return os.path.exists(os.path.join(PROC, 'self', 'stat'))
+
+
+def _read(path: str) -> bytes:
+    """
+    Read a small /proc file (safe to call from several threads)
+
+    Args:
+        path: File to read
+
+    Returns:
+        File contents
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        # Some /proc files return at most a page per read: read until EOF
+        chunks = []
+        while True:
+            data = os.read(fd, READ_SIZE)
+            if not data:
+                break
+            chunks.append(data)
+        return chunks[0] if len(chunks) == 1 else b''.join(chunks)
+    finally:
+        os.close(fd)
+
+
+def username(uid: int) -> str:
+    """
+    Username for a uid, cached for the life of the process
+
+    Args:
+        uid: User ID
+
+    Returns:
+        Username, or the uid as a string if it has no passwd entry
+    """
+    name = _usernames.get(uid)
+    if name is None:
+        try:
+            name = pwd.getpwuid(uid).pw_name if pwd else str(uid)
+        except KeyError:
+            name = str(uid)
+        _usernames[uid] = name
+    return name
+
+
+def _system_info() -> Tuple[float, int, int, int]:
+    """Boot time, clock ticks per second, page size and total memory (bytes)"""
+    boot_time = 0.0
+    for line in _read(os.path.join(PROC, 'stat')).splitlines():
+        if line.startswith(b'btime'):
+            boot_time = float(line.split()[1])
+            break
+
+    total_memory = 0
+    for line in _read(os.path.join(PROC, 'meminfo')).splitlines():
+        if line.startswith(b'MemTotal:'):
+            total_memory = int(line.split()[1]) * 1024
+            break
+
+    return boot_time, os.sysconf('SC_CLK_TCK'), os.sysconf('SC_PAGE_SIZE'), total_memory
+
+
+def iter_process_info() -> Iterator[Dict]:
+    """
+    Yield one info dictionary per process, like psutil's proc.info
+
+    Keys: pid, ppid, name, username, cpu_percent, memory_percent, status,
+    create_time, cmdline, exe. Processes that exit while being read are
+    skipped. cpu_percent is measured against the previous call and is
+    0.0 the first time a process is seen, as with psutil.
+    """
+    boot_time, clock_ticks, page_size, total_memory = _system_info()
+    now = time.monotonic()
+    with _cpu_samples_lock:
+        previous_samples = dict(_cpu_samples)
+    seen_samples = {}
+
+    for entry in os.listdir(PROC):
+        if not entry.isdigit():
+            continue
+
+        pid = int(entry)
+        base = os.path.join(PROC, entry)
+
+        try:
+            uid = os.stat(base).st_uid
+            stat = _read(os.path.join(base, 'stat'))
+            cmdline_raw = _read(os.path.join(base, 'cmdline'))
+        except (FileNotFoundError, ProcessLookupError, PermissionError):
+            continue
+
+        # comm may contain spaces and parentheses: split on the last ')'
+        open_paren = stat.find(b'(')
+        close_paren = stat.rfind(b')')
+        comm = stat[open_paren + 1:close_paren].decode('utf-8', 'replace')
+        fields = stat[close_paren + 2:].split()
+
+        state = fields[0].decode()
+        ppid = int(fields[1])
+        cpu_ticks = int(fields[11]) + int(fields[12])
+        start_ticks = int(fields[19])
+        rss = int(fields[21]) * page_size
+
+        cmdline = [arg.decode('utf-8', 'replace') for arg in cmdline_raw.rstrip(b'\0').split(b'\0')] if cmdline_raw else []
+
+        # The kernel truncates comm; recover the full name from argv[0]
+        name = comm
+        if len(comm) >= COMM_MAX_LENGTH and cmdline:
+            candidate = os.path.basename(cmdline[0])
+            if candidate.startswith(comm):
+                name = candidate
+
+        try:
+            exe = os.readlink(os.path.join(base, 'exe'))
+        except OSError:
+            exe = None
+
+        key = (pid, start_ticks)
+        previous = previous_samples.get(key)
+        cpu_percent = 0.0
+        if previous and now > previous[1]:
+            cpu_percent = round((cpu_ticks - previous[0]) / clock_ticks / (now - previous[1]) * 100, 1)
+        seen_samples[key] = (cpu_ticks, now)
+
+        yield {
+            'pid': pid,
+            'ppid': ppid,
+            'name': name,
+            'username': username(uid),
+            'cpu_percent': cpu_percent,
+            'memory_percent': rss / total_memory * 100 if total_memory else 0.0,
+            'status': STATUS_NAMES.get(state, state),
+            'create_time': boot_time + start_ticks / clock_ticks,
+            'cmdline': cmdline,
+            'exe': exe,
+        }
+
+    with _cpu_samples_lock:
+        # Keep the newest sample when scans overlap, and forget processes
+        # that exited (not seen by this scan nor stored by a later one)
+        for key, sample in seen_samples.items():
+            stored = _cpu_samples.get(key)
+            if stored is None or stored[1] < sample[1]:
+                _cpu_samples[key] = sample
+        for key in [key for key, sample in _cpu_samples.items() if key not in seen_samples and sample[1] < now]:
+            del _cpu_samples[key]
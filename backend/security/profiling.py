@@ -0,0 +1,247 @@
+"""
+Profiling Module
+On-demand cProfile or stack-sampling profiles of scans, stored as artifacts
+
+Offline use, profiling a scanner's __main__ demo:
+
+    python -m security.profiling security.processes
+    python -m security.profiling security.startup --mode sample --output startup.collapsed
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+# Live-request profiling is opt-in: PROFILING=true allows ?profile=1
+ENABLED = os.environ.get('PROFILING', 'false').lower() in ('1', 'true', 'yes')
+PROFILE_DIR = os.environ.get('PROFILE_DIR', 'data/profiles')
+PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', 20))
+SAMPLE_INTERVAL = float(os.environ.get('PROFILE_SAMPLE_INTERVAL', 0.005))
+
+MODES = ('cprofile', 'sample')
+
+# cProfile cannot run two profilers at once; one profiled request at a time
+_profile_lock = threading.Lock()
+
+
+class ProfilerBusy(RuntimeError):
+    """Another request is already being profiled"""
+
+
+class StackSampler:
+    """
+    Samples the stack of one thread at a fixed interval
+
+    Produces collapsed stacks ("outer;inner;leaf count" per line), the
+    input format of flamegraph.pl and speedscope. Unlike cProfile it
+    does not slow down the profiled code.
+    """
+
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL):
+        """
+        Args:
+            thread_id: threading.get_ident() of the thread to sample
+            interval: Seconds between samples
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def collapsed(self) -> str:
+        """Collapsed stack lines, most frequent first"""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top_functions(self, limit: int = 20) -> List[Dict]:
+        """Leaf functions by share of samples (self time)"""
+        leaves: Counter = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        return [
+            {'function': function, 'samples': count, 'percent': round(count * 100 / max(self.samples, 1), 1)}
+            for function, count in leaves.most_common(limit)
+        ]
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(names))] += 1
+            self.samples += 1
+
+
+def profile_call(
+    func: Callable[[], Any],
+    name: str,
+    mode: str = 'cprofile',
+    directory: str = None,
+    keep: int = PROFILE_KEEP
+) -> Tuple[Any, Dict]:
+    """
+    Run func under a profiler and store the artifact
+
+    Args:
+        func: Callable to profile (runs in the calling thread)
+        name: Label used in the artifact file name
+        mode: 'cprofile' (.prof pstats dump) or 'sample' (.collapsed stacks)
+        directory: Artifact directory (default PROFILE_DIR)
+        keep: Artifacts kept in the directory afterwards (0 keeps all)
+
+    Returns:
+        (func result, report) where report has mode, artifact path,
+        duration_ms and the top functions
+
+    Raises:
+        ProfilerBusy: If another profile is running
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown profile mode '{mode}' (expected one of {', '.join(MODES)})")
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusy("Another request is being profiled")
+
+    try:
+        directory = directory or PROFILE_DIR
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{datetime.now():%Y%m%d-%H%M%S-%f}-{name}.{'prof' if mode == 'cprofile' else 'collapsed'}")
+
+        start = time.perf_counter()
+        if mode == 'cprofile':
+            profiler = cProfile.Profile()
+            try:
+                result = profiler.runcall(func)
+            finally:
+                duration = time.perf_counter() - start
+                profiler.dump_stats(path)
+            top = top_cprofile_functions(profiler)
+        else:
+            sampler = StackSampler(threading.get_ident())
+            sampler.start()
+            try:
+                result = func()
+            finally:
+                sampler.stop()
+                duration = time.perf_counter() - start
+                with open(path, 'w') as f:
+                    f.write(sampler.collapsed())
+            top = sampler.top_functions()
+    finally:
+        _profile_lock.release()
+
+    if keep:
+        prune_profiles(directory, keep)
+
+    return result, {
+        'mode': mode,
+        'artifact': os.path.basename(path),
+        'path': path,
+        'duration_ms': round(duration * 1000, 1),
+        'top': top,
+    }
+
+
+def top_cprofile_functions(profiler: cProfile.Profile, limit: int = 20) -> List[Dict]:
+    """
+    Functions with the highest cumulative time in a cProfile run
+
+    Returns:
+        List of {function, calls, total_ms, cumulative_ms}
+    """
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [
+        {
+            'function': f"{os.path.basename(filename)}:{line}({function})",
+            'calls': calls,
+            'total_ms': round(total * 1000, 2),
+            'cumulative_ms': round(cumulative * 1000, 2),
+        }
+        for (filename, line, function), (_, calls, total, cumulative, _) in rows
+    ]
+
+
+def list_profiles(directory: str = None) -> List[Dict]:
+    """Stored artifacts, newest first"""
+    directory = directory or PROFILE_DIR
+    if not os.path.isdir(directory):
+        return []
+    entries = []
+    for entry in os.scandir(directory):
+        if entry.is_file() and entry.name.endswith(('.prof', '.collapsed')):
+            st = entry.stat()
+            entries.append({'artifact': entry.name, 'size': st.st_size, 'created': int(st.st_mtime)})
+    return sorted(entries, key=lambda entry: entry['created'], reverse=True)
+
+
+def profile_path(artifact: str, directory: str = None) -> Optional[str]:
+    """Path of a stored artifact, or None if the name is not one of ours"""
+    directory = directory or PROFILE_DIR
+    if artifact != os.path.basename(artifact) or not artifact.endswith(('.prof', '.collapsed')):
+        return None
+    path = os.path.join(directory, artifact)
+    return path if os.path.isfile(path) else None
+
+
+def prune_profiles(directory: str = None, keep: int = PROFILE_KEEP):
+    """Delete all but the newest `keep` artifacts"""
+    directory = directory or PROFILE_DIR
+    for entry in list_profiles(directory)[keep:]:
+        try:
+            os.remove(os.path.join(directory, entry['artifact']))
+        except OSError:
+            pass
+
+
+if __name__ == "__main__":
+    import argparse
+    import runpy
+
+    parser = argparse.ArgumentParser(description="Profile a scanner module's __main__ block")
+    parser.add_argument('module', help="Module to run, e.g. security.processes")
+    parser.add_argument('--mode', choices=MODES, default='cprofile')
+    parser.add_argument('--output', help="Artifact path (default: PROFILE_DIR/<timestamp>-<module>.<ext>)")
+    parser.add_argument('--top', type=int, default=25, help="Functions to print")
+    args = parser.parse_args()
+
+    directory = os.path.dirname(args.output) if args.output else PROFILE_DIR
+    _, report = profile_call(
+        lambda: runpy.run_module(args.module, run_name='__main__', alter_sys=True),
+        args.module.replace('.', '_'),
+        mode=args.mode,
+        directory=directory or '.',
+        keep=0
+    )
+    if args.output:
+        os.replace(report['path'], args.output)
+        report['path'] = args.output
+
+    print(f"\nProfiled {args.module} in {report['duration_ms']:.0f}ms -> {report['path']}")
+    for row in report['top'][:args.top]:
+        if args.mode == 'cprofile':
+            print(f"  {row['cumulative_ms']:>10.1f}ms cum {row['total_ms']:>10.1f}ms self {row['calls']:>8}  {row['function']}")
+        else:
+            print(f"  {row['percent']:>5.1f}% {row['samples']:>6}  {row['function']}")
@@ -0,0 +1,139 @@
+"""
+Hash Reputation Module
+Checks SHA-256 hashes against local allow/deny lists
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Optional, Set, Tuple
+
+
+KNOWN_GOOD = 'known_good'
+KNOWN_BAD = 'known_bad'
+UNKNOWN = 'unknown'
+
+
+def normalize_hash(value: str) -> Optional[str]:
+    """
+    Normalize a hash to 64 lowercase hex characters
+
+    Args:
+        value: Hash with or without the 'sha256:' prefix
+
+    Returns:
+        Normalized hash, or None if it is not a SHA-256 hex digest
+    """
+    value = value.strip().lower()
+    if value.startswith('sha256:'):
+        value = value[7:]
+    if len(value) != 64 or any(c not in '0123456789abcdef' for c in value):
+        return None
+    return value
+
+
+def load_hash_list(path: str) -> Set[str]:
+    """
+    Load a hash list file
+
+    One hash per line; anything after the first whitespace and lines
+    starting with '#' are ignored.
+
+    Args:
+        path: Path to the list file
+
+    Returns:
+        Set of normalized hashes (empty if the file does not exist)
+    """
+    hashes = set()
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                digest = normalize_hash(line.split()[0])
+                if digest:
+                    hashes.add(digest)
+    except FileNotFoundError:
+        pass
+    return hashes
+
+
+class HashReputation:
+    """
+    Allow/deny lists held in memory as sets, reloaded when a file changes
+
+    Lookups are O(1); the list files are only re-read when their
+    mtime or size changes, checked at most once per check_interval.
+    """
+
+    def __init__(self, allowlist_path: str, denylist_path: str, check_interval: float = 30.0):
+        self.paths = {KNOWN_GOOD: allowlist_path, KNOWN_BAD: denylist_path}
+        self.check_interval = check_interval
+
+        self._lists: Dict[str, Set[str]] = {KNOWN_GOOD: set(), KNOWN_BAD: set()}
+        self._signatures: Dict[str, Optional[Tuple[int, int]]] = {KNOWN_GOOD: None, KNOWN_BAD: None}
+        self._last_check = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> 'HashReputation':
+        """Build from HASH_ALLOWLIST / HASH_DENYLIST (defaults under data/hashes)"""
+        return cls(
+            os.environ.get('HASH_ALLOWLIST', 'data/hashes/allowlist.txt'),
+            os.environ.get('HASH_DENYLIST', 'data/hashes/denylist.txt'),
+        )
+
+    def lookup(self, digest: Optional[str]) -> Optional[str]:
+        """
+        Reputation of a hash
+
+        Args:
+            digest: SHA-256 hash (with or without prefix), or None
+
+        Returns:
+            'known_bad', 'known_good', 'unknown', or None without a hash
+        """
+        if not digest:
+            return None
+
+        self._reload_if_changed()
+        digest = normalize_hash(digest)
+
+        if digest in self._lists[KNOWN_BAD]:
+            return KNOWN_BAD
+        if digest in self._lists[KNOWN_GOOD]:
+            return KNOWN_GOOD
+        return UNKNOWN
+
+    def stats(self) -> Dict:
+        """Number of hashes loaded per list"""
+        self._reload_if_changed()
+        return {
+            'allowlist': len(self._lists[KNOWN_GOOD]),
+            'denylist': len(self._lists[KNOWN_BAD]),
+        }
+
+    def _reload_if_changed(self):
+        """Re-read list files whose stat changed since the last load"""
+        now = time.monotonic()
+        if self._last_check is not None and now - self._last_check < self.check_interval:
+            return
+
+        with self._lock:
+            self._last_check = now
+            for kind, path in self.paths.items():
+                try:
+                    st = os.stat(path)
+                    signature = (st.st_mtime_ns, st.st_size)
+                except OSError:
+                    signature = None
+
+                if signature != self._signatures[kind]:
+                    self._lists[kind] = load_hash_list(path) if signature else set()
+                    self._signatures[kind] = signature
+
+
+# Global instance (list files are read on the first lookup)
+hash_reputation = HashReputation.from_env()
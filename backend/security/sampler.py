@@ -0,0 +1,207 @@
+"""
+Process Sampler Module
+Background sampling of per-process CPU/memory and socket ownership
+"""
+
+import os
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+import psutil
+
+from .anomaly import AnomalyDetector
+from .metrics_store import MetricsStore, SERIES_METRICS
+
+
+class ProcessSampler:
+    """
+    Periodically samples every process so request handlers never sleep
+
+    Each sample stores the CPU/memory usage of every process (measured
+    since the previous sample) and a pid -> socket count index built
+    from a single psutil.net_connections() call. Samples are also fed to
+    the optional MetricsStore (history) and AnomalyDetector (scoring).
+    """
+
+    def __init__(
+        self,
+        interval: float = 10.0,
+        store: Optional[MetricsStore] = None,
+        detector: Optional[AnomalyDetector] = None
+    ):
+        """
+        Args:
+            interval: Seconds between samples (0 disables the thread;
+                socket snapshots are then taken on demand)
+            store: Optional time-series store fed with each sample
+            detector: Optional anomaly detector fed with each sample
+        """
+        self.interval = interval
+        self.store = store
+        self.detector = detector
+        self.sampled_at: Optional[float] = None
+        self.sockets_at: Optional[float] = None
+        self.last_run: Optional[Dict] = None
+        self.last_error: Optional[Dict] = None
+
+        self._usage: Dict[int, Dict] = {}
+        self._connections: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(
+        cls,
+        store: Optional[MetricsStore] = None,
+        detector: Optional[AnomalyDetector] = None
+    ) -> 'ProcessSampler':
+        """Build a sampler configured from PROCESS_SAMPLE_INTERVAL"""
+        return cls(
+            interval=float(os.environ.get('PROCESS_SAMPLE_INTERVAL', 10)),
+            store=store,
+            detector=detector
+        )
+
+    def start(self):
+        """Start the background thread (no-op if disabled or running)"""
+        if self.interval <= 0 or (self._thread and self._thread.is_alive()):
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='process-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the background thread"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def sample(self):
+        """Take one process usage sample and one socket snapshot"""
+        from .processes import iter_process_info
+
+        usage = {}
+        names = {}
+        for info in iter_process_info():
+            usage[info['pid']] = {
+                'cpu_percent': info['cpu_percent'] or 0.0,
+                'memory_percent': info['memory_percent'] or 0.0,
+            }
+            names[info['pid']] = (info.get('name'), info.get('create_time'))
+
+        with self._lock:
+            self._usage = usage
+            self.sampled_at = time.time()
+
+        connections = self.refresh_sockets()
+
+        if self.store is not None or self.detector is not None:
+            self._publish(usage, names, connections)
+
+    def refresh_sockets(self) -> list:
+        """
+        Rebuild the pid -> socket count index
+
+        Returns:
+            The psutil connections the index was built from
+        """
+        try:
+            connections = psutil.net_connections(kind='inet')
+        except (psutil.AccessDenied, OSError):
+            connections = []
+
+        counts = Counter(conn.pid for conn in connections if conn.pid)
+
+        with self._lock:
+            self._connections = dict(counts)
+            self.sockets_at = time.time()
+
+        return connections
+
+    def _publish(self, usage: Dict[int, Dict], names: Dict[int, tuple], connections: list):
+        """Feed one sample to the metrics store and anomaly detector"""
+        processes = {
+            pid: {**values, 'name': names[pid][0], 'create_time': names[pid][1]}
+            for pid, values in usage.items()
+        }
+        host = {
+            'cpu_percent': psutil.cpu_percent(interval=None),
+            'memory_percent': psutil.virtual_memory().percent,
+            'processes': len(usage),
+            'connections': len(connections),
+        }
+
+        if self.store is not None:
+            ports = Counter(conn.laddr.port for conn in connections if conn.laddr)
+            self.store.record_snapshot(
+                self.sampled_at,
+                tuple(host[metric] for metric in SERIES_METRICS['host']),
+                processes,
+                dict(ports)
+            )
+
+        if self.detector is not None:
+            with self._lock:
+                per_pid = dict(self._connections)
+            self.detector.observe(self.sampled_at, processes, per_pid, host)
+
+    def usage(self, pid: int) -> Optional[Dict]:
+        """
+        Last sampled CPU/memory usage of a process
+
+        Args:
+            pid: Process ID
+
+        Returns:
+            {'cpu_percent', 'memory_percent'} or None if not sampled yet
+        """
+        with self._lock:
+            return self._usage.get(pid)
+
+    def connection_count(self, pid: int) -> int:
+        """
+        Number of inet sockets owned by a process
+
+        Uses the shared snapshot, refreshing it first if it is older
+        than the sampling interval (or 10 seconds when disabled).
+
+        Args:
+            pid: Process ID
+
+        Returns:
+            Socket count (0 if the process owns none)
+        """
+        max_age = self.interval if self.interval > 0 else 10.0
+        if self.sockets_at is None or time.time() - self.sockets_at > max_age:
+            self.refresh_sockets()
+
+        with self._lock:
+            return self._connections.get(pid, 0)
+
+    def status(self) -> Dict:
+        """Sampler configuration, last run and last error"""
+        return {
+            'enabled': self.interval > 0,
+            'running': bool(self._thread and self._thread.is_alive()),
+            'interval': self.interval,
+            'sampled_at': self.sampled_at,
+            'last_run': self.last_run,
+            'last_error': self.last_error
+        }
+
+    def _run(self):
+        """Thread loop: sample immediately, then every interval"""
+        while True:
+            try:
+                self.sample()
+                self.last_run = {'status': 'ok', 'ran_at': int(time.time())}
+            except Exception as e:
+                self.last_error = {'ran_at': int(time.time()), 'error': f"{type(e).__name__}: {e}"}
+                self.last_run = {'status': 'error', **self.last_error}
+            if self._stop.wait(self.interval):
+                break
@@ -0,0 +1,558 @@
+"""
+Scan Jobs Module
+Long-running file integrity walks that checkpoint to SQLite, can be cancelled and resume after restarts
+
+A job walks its roots in a fixed order (entries sorted by name, depth
+first), so the position of any file is given by its path alone. Files are
+hashed in batches; each batch's hashes are committed together with the
+last path walked, which is all a job needs to continue where it stopped:
+on resume the walk skips every directory that sorts before the cursor
+without listing it.
+"""
+
+import json
+import os
+import platform
+import sqlite3
+import stat
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .integrity import hash_files
+from .workers import ScanCancelled
+
+
+if platform.system() == 'Windows':
+    DEFAULT_ROOTS = ["C:\\Windows\\System32"]
+    DEFAULT_EXCLUDE: List[str] = []
+else:
+    DEFAULT_ROOTS = ["/etc", "/bin", "/sbin", "/usr/bin", "/usr/sbin", "/usr/local/bin"]
+    DEFAULT_EXCLUDE = ["/proc", "/sys", "/dev", "/run"]
+
+# queued -> running -> completed | failed | cancelled | interrupted
+# (interrupted: the server stopped mid-walk; such jobs are queued again on start)
+FINISHED_STATUSES = ('completed', 'failed', 'cancelled', 'interrupted')
+RESUMABLE_STATUSES = ('failed', 'cancelled', 'interrupted')
+
+JOB_COLUMNS = ("id, status, roots, created_at, started_at, finished_at, updated_at, runs, "
+               "files_done, files_failed, bytes_hashed, cursor_root, cursor, error")
+
+# Walk position: (root index, path components below the root)
+Cursor = Tuple[int, Tuple[str, ...]]
+
+
+def walk_files(
+    roots: Sequence[str],
+    exclude: Sequence[str] = (),
+    after: Optional[Cursor] = None
+) -> Iterator[Tuple[int, str, os.stat_result]]:
+    """
+    Regular files under roots, in a stable order
+
+    Symlinks are not followed and unreadable directories are skipped.
+
+    Args:
+        roots: Files or directories, walked in order
+        exclude: Paths whose subtrees are skipped
+        after: Start after this position (from cursor_for)
+
+    Yields:
+        (root index, path, lstat result)
+    """
+    exclude = {os.path.normpath(path) for path in exclude}
+    for index, root in enumerate(roots):
+        if after is not None and index < after[0]:
+            continue
+        skip_to = after[1] if after is not None and index == after[0] else None
+
+        try:
+            st = os.lstat(root)
+        except OSError:
+            continue
+        if stat.S_ISDIR(st.st_mode):
+            yield from _walk_dir(index, root, (), skip_to, exclude)
+        elif stat.S_ISREG(st.st_mode) and skip_to is None:
+            yield index, root, st
+
+
+def _walk_dir(index: int, path: str, parts: Tuple[str, ...], after: Optional[Tuple[str, ...]], exclude) -> Iterator:
+    """Depth-first walk with entries sorted by name, starting after `after`"""
+    try:
+        with os.scandir(path) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+    except OSError:
+        return
+
+    for entry in entries:
+        child = parts + (entry.name,)
+        child_after = None
+        if after is not None:
+            if after[:len(child)] == child:
+                # On the way to the cursor: the cursor itself is done,
+                # a directory containing it is entered part way
+                if len(child) == len(after):
+                    after = None
+                    continue
+                child_after, after = after, None
+            elif child < after:
+                continue
+            else:
+                after = None
+
+        if entry.path in exclude:
+            continue
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _walk_dir(index, entry.path, child, child_after, exclude)
+            elif entry.is_file(follow_symlinks=False):
+                yield index, entry.path, entry.stat(follow_symlinks=False)
+        except OSError:
+            continue
+
+
+def cursor_for(roots: Sequence[str], root_index: int, path: str) -> Cursor:
+    """Walk position of a path yielded by walk_files"""
+    relative = os.path.relpath(path, roots[root_index])
+    return root_index, () if relative == os.curdir else tuple(relative.split(os.sep))
+
+
+class ScanJobManager:
+    """
+    Persistent queue of integrity walks, run one at a time in a background thread
+
+    Progress (counters, last path walked and every hash computed) is
+    written at each checkpoint, so cancelling or restarting the server
+    loses at most one batch of work.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "data/scan_jobs.db",
+        roots: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None,
+        checkpoint_files: int = 1000,
+        auto_resume: bool = True,
+        keep_jobs: int = 20
+    ):
+        """
+        Args:
+            db_path: SQLite file for jobs, checkpoints and results
+            roots: Default roots walked by new jobs
+            exclude: Paths never walked
+            checkpoint_files: Files hashed between checkpoints
+            auto_resume: Queue interrupted jobs again when the server starts
+            keep_jobs: Finished jobs kept (older ones and their results are deleted)
+        """
+        self.db_path = db_path
+        self.roots = roots or DEFAULT_ROOTS
+        self.exclude = DEFAULT_EXCLUDE if exclude is None else exclude
+        self.checkpoint_files = max(checkpoint_files, 1)
+        self.auto_resume = auto_resume
+        self.keep_jobs = keep_jobs
+
+        self._initialized = False
+        self._init_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # Job being walked, its cancel event and the status it ends in when cancelled
+        self._lock = threading.Lock()
+        self._current: Optional[int] = None
+        self._cancel = threading.Event()
+        self._cancel_status = 'cancelled'
+
+    @classmethod
+    def from_env(cls) -> 'ScanJobManager':
+        """Build a manager configured from SCAN_JOB* environment variables"""
+        def paths(name: str) -> Optional[List[str]]:
+            value = os.environ.get(name)
+            return None if value is None else [part for part in value.split(os.pathsep) if part]
+
+        return cls(
+            db_path=os.environ.get('SCAN_JOBS_DB', 'data/scan_jobs.db'),
+            roots=paths('SCAN_JOB_ROOTS'),
+            exclude=paths('SCAN_JOB_EXCLUDE'),
+            checkpoint_files=int(os.environ.get('SCAN_JOB_CHECKPOINT_FILES', 1000)),
+            auto_resume=os.environ.get('SCAN_JOB_AUTO_RESUME', 'true').lower() == 'true',
+            keep_jobs=int(os.environ.get('SCAN_JOB_KEEP', 20)),
+        )
+
+    def ensure_database(self):
+        """Create the directory and tables on first use"""
+        if self._initialized:
+            return
+        with self._init_lock:
+            if not self._initialized:
+                self._init_database()
+                self._initialized = True
+
+    def _connect(self) -> sqlite3.Connection:
+        self.ensure_database()
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_database(self):
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS scan_jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    status TEXT NOT NULL,
+                    roots TEXT NOT NULL,
+                    exclude TEXT,
+                    created_at REAL,
+                    started_at REAL,
+                    finished_at REAL,
+                    updated_at REAL,
+                    runs INTEGER DEFAULT 0,
+                    files_done INTEGER DEFAULT 0,
+                    files_failed INTEGER DEFAULT 0,
+                    bytes_hashed INTEGER DEFAULT 0,
+                    cursor_root INTEGER,
+                    cursor TEXT,
+                    error TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_scan_jobs_status ON scan_jobs (status, id)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS scan_job_files (
+                    job_id INTEGER NOT NULL,
+                    path TEXT NOT NULL,
+                    hash TEXT,
+                    size INTEGER,
+                    last_modified INTEGER,
+                    status TEXT NOT NULL,
+                    PRIMARY KEY (job_id, path)
+                ) WITHOUT ROWID
+            """)
+
+    # ----- lifecycle -----
+
+    def start(self):
+        """Recover jobs left running by a previous server and start the runner thread"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        with self._connect() as conn:
+            # A cancel that was still in progress when the server stopped stands
+            conn.execute("UPDATE scan_jobs SET status = 'cancelled', finished_at = ? WHERE status = 'cancelling'",
+                         (time.time(),))
+            # Jobs stopped by a shutdown (interrupted) or a crash (still running)
+            if self.auto_resume:
+                conn.execute("UPDATE scan_jobs SET status = 'queued', finished_at = NULL "
+                             "WHERE status IN ('running', 'interrupted')")
+            else:
+                conn.execute("UPDATE scan_jobs SET status = 'interrupted' WHERE status = 'running'")
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='scan-jobs', daemon=True)
+        self._thread.start()
+        self._wake.set()
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the runner; a job being walked keeps its checkpoint and is marked interrupted"""
+        self._stop.set()
+        with self._lock:
+            self._cancel_status = 'interrupted'
+            self._cancel.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    # ----- API -----
+
+    def submit(self, roots: Optional[List[str]] = None) -> Dict:
+        """
+        Queue a new integrity walk
+
+        Args:
+            roots: Absolute paths to walk (defaults to the configured roots)
+
+        Returns:
+            The new job
+
+        Raises:
+            ValueError: If a root is not an absolute path
+        """
+        roots = [os.path.normpath(root) for root in (roots or self.roots)]
+        for root in roots:
+            if not os.path.isabs(root):
+                raise ValueError(f"Scan roots must be absolute paths: {root}")
+
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO scan_jobs (status, roots, exclude, created_at, updated_at) VALUES ('queued', ?, ?, ?, ?)",
+                (json.dumps(roots), json.dumps(self.exclude), now, now)
+            )
+            job_id = cursor.lastrowid
+
+        self._wake.set()
+        return self.get_job(job_id)
+
+    def cancel(self, job_id: int) -> Optional[Dict]:
+        """
+        Cancel a queued or running job (a running one stops at its next file)
+
+        Returns:
+            The job, or None if it does not exist
+
+        Raises:
+            ValueError: If the job already finished
+        """
+        with self._lock:
+            if self._current == job_id:
+                self._cancel_status = 'cancelled'
+                self._cancel.set()
+
+        with self._connect() as conn:
+            conn.execute("""
+                UPDATE scan_jobs SET status = CASE status WHEN 'running' THEN 'cancelling' ELSE 'cancelled' END,
+                    finished_at = CASE status WHEN 'running' THEN finished_at ELSE ? END
+                WHERE id = ? AND status IN ('queued', 'running', 'interrupted')
+            """, (time.time(), job_id))
+
+        job = self.get_job(job_id)
+        if job and job['status'] in ('completed', 'failed'):
+            raise ValueError(f"Scan job {job_id} already {job['status']}")
+        return job
+
+    def resume(self, job_id: int) -> Optional[Dict]:
+        """
+        Queue a cancelled, failed or interrupted job again from its last checkpoint
+
+        Returns:
+            The job, or None if it does not exist
+
+        Raises:
+            ValueError: If the job is not resumable
+        """
+        job = self.get_job(job_id)
+        if job is None:
+            return None
+        if job['status'] not in RESUMABLE_STATUSES:
+            raise ValueError(f"Scan job {job_id} is {job['status']}, only {', '.join(RESUMABLE_STATUSES)} jobs can be resumed")
+
+        with self._connect() as conn:
+            conn.execute("UPDATE scan_jobs SET status = 'queued', error = NULL, finished_at = NULL WHERE id = ?",
+                         (job_id,))
+
+        self._wake.set()
+        return self.get_job(job_id)
+
+    def delete(self, job_id: int) -> bool:
+        """
+        Delete a job and its results
+
+        Raises:
+            ValueError: If the job is running
+        """
+        job = self.get_job(job_id)
+        if job is None:
+            return False
+        if job['status'] in ('running', 'cancelling'):
+            raise ValueError(f"Scan job {job_id} is running, cancel it first")
+
+        with self._connect() as conn:
+            conn.execute("DELETE FROM scan_job_files WHERE job_id = ?", (job_id,))
+            conn.execute("DELETE FROM scan_jobs WHERE id = ?", (job_id,))
+        return True
+
+    def get_job(self, job_id: int) -> Optional[Dict]:
+        """Job status and progress (None if it does not exist)"""
+        with self._connect() as conn:
+            row = conn.execute(f"SELECT {JOB_COLUMNS} FROM scan_jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job_dict(row) if row else None
+
+    def list_jobs(self, limit: int = 50) -> List[Dict]:
+        """Most recent jobs first"""
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT {JOB_COLUMNS} FROM scan_jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [self._job_dict(row) for row in rows]
+
+    def list_files(self, job_id: int, status: Optional[str] = None, offset: int = 0, limit: int = 1000) -> List[Dict]:
+        """
+        Files recorded by a job, sorted by path
+
+        Args:
+            job_id: Job id
+            status: Only 'ok' or 'error' files
+            offset: Rows to skip
+            limit: Maximum rows returned
+        """
+        query = "SELECT path, hash, size, last_modified, status FROM scan_job_files WHERE job_id = ?"
+        params: Tuple = (job_id,)
+        if status:
+            query += " AND status = ?"
+            params += (status,)
+
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY path LIMIT ? OFFSET ?", params + (limit, offset)).fetchall()
+        return [dict(row) for row in rows]
+
+    def iter_files(self, job_id: int, page_size: int = 5000) -> Iterator[Dict]:
+        """
+        Every file recorded by a job, sorted by path
+
+        Reads a page per query on short connections, so it can be
+        consumed lazily (e.g. by a streaming export) from any thread.
+        """
+        last_path = ''
+        while True:
+            with self._connect() as conn:
+                rows = conn.execute("""
+                    SELECT path, hash, size, last_modified, status FROM scan_job_files
+                    WHERE job_id = ? AND path > ? ORDER BY path LIMIT ?
+                """, (job_id, last_path, page_size)).fetchall()
+            for row in rows:
+                yield dict(row)
+            if len(rows) < page_size:
+                return
+            last_path = rows[-1]['path']
+
+    def status(self) -> Dict:
+        """Runner state and configuration"""
+        with self._lock:
+            current = self._current
+        return {
+            'running': bool(self._thread and self._thread.is_alive()),
+            'current_job': current,
+            'roots': self.roots,
+            'exclude': self.exclude,
+            'checkpoint_files': self.checkpoint_files,
+            'auto_resume': self.auto_resume,
+        }
+
+    # ----- runner -----
+
+    def _run(self):
+        """Thread loop: run queued jobs oldest first, then wait for new ones"""
+        while not self._stop.is_set():
+            self._wake.clear()
+            job = self._claim_next()
+            if job is None:
+                self._wake.wait()
+                continue
+            self._execute(job)
+
+    def _claim_next(self) -> Optional[sqlite3.Row]:
+        """Mark the oldest queued job as running (None if there is none)"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT id FROM scan_jobs WHERE status = 'queued' ORDER BY id LIMIT 1").fetchone()
+            if row is None:
+                return None
+
+            with self._lock:
+                self._current = row['id']
+                self._cancel.clear()
+                self._cancel_status = 'cancelled'
+
+            now = time.time()
+            claimed = conn.execute("""
+                UPDATE scan_jobs SET status = 'running', runs = runs + 1, updated_at = ?,
+                    started_at = COALESCE(started_at, ?)
+                WHERE id = ? AND status = 'queued'
+            """, (now, now, row['id'])).rowcount
+            job = conn.execute("SELECT * FROM scan_jobs WHERE id = ?", (row['id'],)).fetchone()
+
+        if not claimed:
+            # Cancelled between the two statements
+            with self._lock:
+                self._current = None
+            return None
+        return job
+
+    def _execute(self, job: sqlite3.Row):
+        """Walk a job from its checkpoint to the end (or until cancelled)"""
+        job_id = job['id']
+        roots = json.loads(job['roots'])
+        exclude = json.loads(job['exclude'] or '[]')
+        after = cursor_for(roots, job['cursor_root'], job['cursor']) if job['cursor'] is not None else None
+
+        status, error = 'completed', None
+        try:
+            batch = []
+            for item in walk_files(roots, exclude, after):
+                if self._cancel.is_set():
+                    raise ScanCancelled("Scan job cancelled")
+                batch.append(item)
+                if len(batch) >= self.checkpoint_files:
+                    self._checkpoint(job_id, batch)
+                    batch = []
+            if batch:
+                self._checkpoint(job_id, batch)
+        except ScanCancelled:
+            with self._lock:
+                status = self._cancel_status
+        except Exception as e:
+            status, error = 'failed', str(e)
+
+        with self._lock:
+            self._current = None
+
+        with self._connect() as conn:
+            now = time.time()
+            conn.execute("UPDATE scan_jobs SET status = ?, error = ?, finished_at = ?, updated_at = ? WHERE id = ?",
+                         (status, error, now, now, job_id))
+
+        if status == 'completed':
+            self._apply_retention()
+
+    def _checkpoint(self, job_id: int, batch: List[Tuple[int, str, os.stat_result]]):
+        """Hash a batch and commit the results together with the new cursor"""
+        digests = hash_files((path for _, path, _ in batch), self._cancel)
+
+        rows = []
+        failed = hashed = 0
+        for _, path, st in batch:
+            digest = digests.get(path)
+            if digest is None:
+                failed += 1
+            else:
+                hashed += st.st_size
+            rows.append((job_id, path, digest, st.st_size, int(st.st_mtime), 'ok' if digest else 'error'))
+
+        root_index, last_path, _ = batch[-1]
+        with self._connect() as conn:
+            conn.executemany("""
+                INSERT OR REPLACE INTO scan_job_files (job_id, path, hash, size, last_modified, status)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, rows)
+            conn.execute("""
+                UPDATE scan_jobs SET files_done = files_done + ?, files_failed = files_failed + ?,
+                    bytes_hashed = bytes_hashed + ?, cursor_root = ?, cursor = ?, updated_at = ?
+                WHERE id = ?
+            """, (len(batch), failed, hashed, root_index, last_path, time.time(), job_id))
+
+    def _apply_retention(self):
+        """Delete finished jobs beyond keep_jobs, oldest first"""
+        if self.keep_jobs <= 0:
+            return
+        placeholders = ', '.join('?' for _ in FINISHED_STATUSES)
+        with self._connect() as conn:
+            stale = [row[0] for row in conn.execute(f"""
+                SELECT id FROM scan_jobs WHERE status IN ({placeholders})
+                ORDER BY id DESC LIMIT -1 OFFSET ?
+            """, FINISHED_STATUSES + (self.keep_jobs,))]
+            for job_id in stale:
+                conn.execute("DELETE FROM scan_job_files WHERE job_id = ?", (job_id,))
+                conn.execute("DELETE FROM scan_jobs WHERE id = ?", (job_id,))
+
+    @staticmethod
+    def _job_dict(row: sqlite3.Row) -> Dict:
+        job = dict(row)
+        job['roots'] = json.loads(job['roots'])
+        end = job['finished_at'] or time.time()
+        job['elapsed'] = round(end - job['started_at'], 1) if job['started_at'] else None
+        return job
+
+
+# Shared by the API
+scan_job_manager = ScanJobManager.from_env()
@@ -0,0 +1,216 @@
+"""
+Drift Scheduler Module
+Runs periodic baseline comparisons in the background and raises alerts
+"""
+
+import os
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Dict, List, Optional
+
+
+# Held by user-triggered heavy scans so background checks never overlap them
+scan_lock = threading.Lock()
+
+SCAN_SECTIONS = ('processes', 'ports', 'startup_items')
+
+
+def scan_section(section: str) -> List[Dict]:
+    """
+    Run the scanner for one section (imported on first use)
+
+    Args:
+        section: 'processes', 'ports' or 'startup_items'
+
+    Returns:
+        Scan results for that section
+    """
+    if section == 'processes':
+        from .processes import scan_processes
+        return scan_processes()
+    if section == 'ports':
+        from .ports import scan_open_ports
+        return scan_open_ports()
+    if section == 'startup_items':
+        from .startup import scan_startup_items
+        return scan_startup_items()
+    raise ValueError(f"Unknown scan section: {section}")
+
+
+class DriftScheduler:
+    """
+    Periodically compares the system against the active baseline
+
+    Scan results recorded by the API (quick/full scans) are reused while
+    they are fresher than cache_ttl, so a check usually costs only the
+    comparison itself.
+    """
+
+    def __init__(
+        self,
+        manager,
+        interval: int = 600,
+        jitter: int = 60,
+        alert_threshold: float = 40.0,
+        cache_ttl: int = 300,
+        max_alerts: int = 100
+    ):
+        """
+        Args:
+            manager: BaselineManager used to run and store comparisons
+            interval: Seconds between checks (0 disables the scheduler)
+            jitter: Maximum random offset added to each interval (seconds)
+            alert_threshold: risk_score that triggers an alert when crossed
+            cache_ttl: Maximum age of recorded scan data reused by a check
+            max_alerts: Number of drift alerts kept in memory
+        """
+        self.manager = manager
+        self.interval = interval
+        self.jitter = jitter
+        self.alert_threshold = alert_threshold
+        self.cache_ttl = cache_ttl
+
+        self.alerts = deque(maxlen=max_alerts)
+        self.last_check: Optional[Dict] = None
+        self.last_risk_score = 0.0
+
+        self._cache: Dict[str, tuple] = {}
+        self._cache_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls, manager) -> 'DriftScheduler':
+        """Build a scheduler configured from DRIFT_* environment variables"""
+        return cls(
+            manager,
+            interval=int(os.environ.get('DRIFT_CHECK_INTERVAL', 600)),
+            jitter=int(os.environ.get('DRIFT_CHECK_JITTER', 60)),
+            alert_threshold=float(os.environ.get('DRIFT_ALERT_THRESHOLD', 40)),
+            cache_ttl=int(os.environ.get('DRIFT_CACHE_TTL', 300)),
+        )
+
+    def start(self):
+        """Start the background thread (no-op if disabled or running)"""
+        if self.interval <= 0 or (self._thread and self._thread.is_alive()):
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='drift-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the background thread"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def record_scan(self, **sections: List[Dict]):
+        """
+        Record fresh scan results for reuse by the next check
+
+        Args:
+            sections: Any of processes=, ports=, startup_items=
+        """
+        now = time.monotonic()
+        with self._cache_lock:
+            for section, items in sections.items():
+                if section in SCAN_SECTIONS and items is not None:
+                    self._cache[section] = (now, items)
+
+    def run_check(self, blocking: bool = False) -> Optional[Dict]:
+        """
+        Compare the current state with the active baseline
+
+        Args:
+            blocking: Wait for a running user scan instead of skipping
+
+        Returns:
+            Check result, or None if skipped because a scan was running
+        """
+        if not scan_lock.acquire(blocking=blocking):
+            return None
+
+        try:
+            current = self._current_state()
+            try:
+                comparison = self.manager.compare_with_baseline(current=current)
+            except ValueError:
+                # No active baseline yet
+                self.last_check = {'status': 'no_baseline', 'checked_at': int(time.time())}
+                return self.last_check
+        finally:
+            scan_lock.release()
+
+        summary = comparison['differences']['summary']
+        risk_score = summary['risk_score']
+
+        if risk_score >= self.alert_threshold > self.last_risk_score:
+            self.alerts.appendleft(self._build_alert(comparison))
+        self.last_risk_score = risk_score
+
+        self.last_check = {
+            'status': 'ok',
+            'checked_at': int(time.time()),
+            'baseline': comparison['baseline'],
+            'summary': summary
+        }
+        return self.last_check
+
+    def status(self) -> Dict:
+        """Scheduler configuration, last check and recent alerts"""
+        return {
+            'enabled': self.interval > 0,
+            'running': bool(self._thread and self._thread.is_alive()),
+            'interval': self.interval,
+            'jitter': self.jitter,
+            'alert_threshold': self.alert_threshold,
+            'last_check': self.last_check,
+            'alerts': list(self.alerts)
+        }
+
+    def _run(self):
+        """Thread loop: wait a jittered interval, then check"""
+        while not self._stop.wait(self.interval + random.uniform(0, self.jitter)):
+            try:
+                self.run_check()
+            except Exception as e:
+                self.last_check = {'status': 'error', 'checked_at': int(time.time()), 'error': str(e)}
+
+    def _current_state(self) -> Dict[str, List[Dict]]:
+        """Cached scan data when fresh enough, new scans otherwise"""
+        now = time.monotonic()
+        current = {}
+
+        for section in SCAN_SECTIONS:
+            with self._cache_lock:
+                cached = self._cache.get(section)
+
+            if cached and now - cached[0] <= self.cache_ttl:
+                current[section] = cached[1]
+            else:
+                current[section] = scan_section(section)
+                self.record_scan(**{section: current[section]})
+
+        return current
+
+    def _build_alert(self, comparison: Dict) -> Dict:
+        """Alert in the same format as analyzer.generate_alerts"""
+        summary = comparison['differences']['summary']
+        baseline = comparison['baseline']
+
+        return {
+            'id': str(uuid.uuid4()),
+            'type': 'baseline',
+            'severity': 'high' if summary['risk_level'] == 'high' else 'medium',
+            'title': f"Baseline Drift Detected: {baseline['name']}",
+            'description': f"Risk score {summary['risk_score']:.0f} exceeds {self.alert_threshold:.0f}. "
+                           f"{summary['new_processes']} new processes, {summary['new_ports']} new ports, "
+                           f"{summary['new_startup']} new startup items since the baseline.",
+            'timestamp': int(time.time()),
+            'resolved': False
+        }
@@ -5,7 +5,15 @@ Scans autostart/startup programs on Windows and Linux
 
 import platform
 import os
-from typing import List, Dict
+import re
+import shlex
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Optional, Set, Tuple
+
+from .integrity import try_cached_sha256
+from .instrumentation import instrument
 
 # Windows-specific imports
 if platform.system() == 'Windows':
@@ -14,7 +22,43 @@ if platform.system() == 'Windows':
     except ImportError:
         winreg = None
 
+# Incremental scan caches, valid while the directory/file stat is unchanged
+# (directory, suffix) -> (mtime_ns, matching filenames)
+_dir_cache: Dict[Tuple[str, str], Tuple[int, List[str]]] = {}
+# file path -> ((mtime_ns, size, inode), startup items)
+_item_cache: Dict[str, Tuple[Tuple[int, int, int], List[Dict]]] = {}
+
+# Linux persistence collectors, in report order (see startup_collector)
+LINUX_COLLECTORS: Dict[str, Callable[[], List[Dict]]] = {}
+
+# Timing, item count and error of each collector in the last Linux scan
+last_collector_stats: Dict[str, Dict] = {}
+
+# Unit directories in precedence order (highest first)
+SYSTEMD_UNIT_DIRS = {
+    'user': lambda: [
+        os.path.expanduser("~/.config/systemd/user"),
+        "/etc/systemd/user",
+        "/usr/lib/systemd/user",
+    ],
+    'system': lambda: [
+        "/etc/systemd/system",
+        "/run/systemd/system",
+        "/lib/systemd/system",
+        "/usr/lib/systemd/system",
+    ],
+}
+
+SYSTEMD_VENDOR_DIRS = ('/lib/', '/usr/lib/')
+
+# Directories where nothing should be started from, matched as whole path segments
+TEMP_DIRECTORIES = ('/tmp/', '/var/tmp/', '/dev/shm/', '/temp/')
 
+CRON_ENV_PATTERN = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*\s*=')
+UDEV_RUN_PATTERN = re.compile(r'RUN(?:\{\w+\})?\+?=\s*"([^"]*)"')
+
+
+@instrument('scanner.startup')
 def scan_startup_items() -> List[Dict]:
     """
     Scan startup items based on the operating system
@@ -25,11 +69,77 @@ def scan_startup_items() -> List[Dict]:
     system = platform.system()
     
     if system == 'Windows':
-        return scan_windows_startup()
+        startup_items = scan_windows_startup()
     elif system == 'Linux':
-        return scan_linux_startup()
+        startup_items = scan_linux_startup()
     else:
         return []
+    
+    return hash_startup_executables(startup_items)
+
+
+@instrument('risk.startup_hashes')
+def hash_startup_executables(startup_items: List[Dict]) -> List[Dict]:
+    """
+    Resolve and hash the executable behind each startup item
+    
+    Adds 'executable' and 'executable_hash' (None when unresolvable).
+    Hashes come from the cache shared with security.integrity.
+    
+    Args:
+        startup_items: Startup items to enrich in place
+        
+    Returns:
+        The same list
+    """
+    for item in startup_items:
+        executable = resolve_executable(item.get('command') or item.get('path'))
+        item['executable'] = executable
+        item['executable_hash'] = try_cached_sha256(executable)
+    
+    return startup_items
+
+
+def resolve_executable(command: Optional[str]) -> Optional[str]:
+    """
+    Find the file a startup command runs
+    
+    Skips `env` and VAR=value prefixes and systemd Exec prefixes
+    (-, @, +, !), and looks bare program names up in PATH.
+    
+    Args:
+        command: Command line or file path
+        
+    Returns:
+        Absolute path of an existing file, or None
+    """
+    if not command:
+        return None
+    
+    # Plain paths, including unquoted Windows paths with spaces
+    if os.path.isfile(command):
+        return command
+    
+    try:
+        tokens = shlex.split(command, posix=platform.system() != 'Windows')
+    except ValueError:
+        tokens = command.split()
+    
+    program = None
+    for token in tokens:
+        token = token.strip('"\'')
+        if token == 'env' or CRON_ENV_PATTERN.match(token):
+            continue
+        program = token.lstrip('-@+!:')
+        break
+    
+    if not program:
+        return None
+    
+    if not os.path.isabs(program):
+        program = shutil.which(program)
+    
+    return program if program and os.path.isfile(program) else None
 
 
 def scan_windows_startup() -> List[Dict]:
@@ -133,16 +243,93 @@ def scan_windows_startup_folder() -> List[Dict]:
     return startup_items
 
 
+def startup_collector(name: str):
+    """
+    Register a function as a Linux persistence collector
+    
+    Collectors take no arguments and return a list of startup items.
+    They run concurrently, so they must not depend on each other.
+    
+    Args:
+        name: Collector name, reported as each item's 'source'
+    """
+    def register(func: Callable[[], List[Dict]]):
+        LINUX_COLLECTORS[name] = func
+        return func
+    return register
+
+
 def scan_linux_startup() -> List[Dict]:
     """
-    Scan Linux autostart files and systemd services
+    Scan Linux persistence locations with every registered collector
+    
+    Per-collector timings are kept in last_collector_stats.
     
     Returns:
         List of Linux startup items
     """
+    startup_items, stats = run_collectors(LINUX_COLLECTORS)
+    
+    last_collector_stats.clear()
+    last_collector_stats.update(stats)
+    
+    return startup_items
+
+
+def run_collectors(
+    collectors: Dict[str, Callable[[], List[Dict]]],
+    max_workers: int = 8
+) -> Tuple[List[Dict], Dict[str, Dict]]:
+    """
+    Run collectors concurrently on a thread pool
+    
+    Args:
+        collectors: Mapping of collector name to collector function
+        max_workers: Maximum number of threads
+        
+    Returns:
+        Tuple of (items in collector order, {name: timing/count/error})
+    """
+    if not collectors:
+        return [], {}
+    
+    def timed(func):
+        start = time.perf_counter()
+        try:
+            return func(), None, time.perf_counter() - start
+        except Exception as e:
+            return [], str(e), time.perf_counter() - start
+    
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(collectors))) as pool:
+        futures = {name: pool.submit(timed, func) for name, func in collectors.items()}
+    
+    startup_items = []
+    stats = {}
+    for name, future in futures.items():
+        items, error, elapsed = future.result()
+        for item in items:
+            item.setdefault('source', name)
+        startup_items.extend(items)
+        
+        stats[name] = {
+            'duration_ms': round(elapsed * 1000, 2),
+            'items': len(items),
+            'error': error
+        }
+    
+    return startup_items, stats
+
+
+@startup_collector('xdg_autostart')
+def scan_xdg_autostart() -> List[Dict]:
+    """
+    Scan XDG autostart .desktop files
+    
+    Returns:
+        List of autostart items
+    """
     startup_items = []
     
-    # XDG Autostart directories
     autostart_dirs = [
         os.path.expanduser("~/.config/autostart"),
         "/etc/xdg/autostart",
@@ -150,89 +337,474 @@ def scan_linux_startup() -> List[Dict]:
     ]
     
     for directory in autostart_dirs:
-        if os.path.exists(directory):
-            try:
-                for filename in os.listdir(directory):
-                    if filename.endswith('.desktop'):
-                        filepath = os.path.join(directory, filename)
-                        
-                        # Parse .desktop file
-                        exec_line = parse_desktop_file(filepath)
-                        risk_level = analyze_startup_risk(filename, exec_line)
-                        
-                        startup_items.append({
-                            'name': filename.replace('.desktop', ''),
-                            'path': exec_line or filepath,
-                            'location': directory,
-                            'enabled': is_desktop_file_enabled(filepath),
-                            'publisher': None,
-                            'risk_level': risk_level
-                        })
-            except Exception:
-                continue
-    
-    # Systemd user services
-    systemd_items = scan_systemd_services()
-    startup_items.extend(systemd_items)
+        for filename in list_startup_directory(directory, '.desktop'):
+            filepath = os.path.join(directory, filename)
+            startup_items.extend(
+                _get_cached_items(filepath, lambda path: [build_desktop_item(path, directory)])
+            )
     
     return startup_items
 
 
-def scan_systemd_services() -> List[Dict]:
+@startup_collector('systemd_user')
+def scan_systemd_user_services() -> List[Dict]:
+    """Scan systemd user units"""
+    return scan_systemd_services('user')
+
+
+@startup_collector('systemd_system')
+def scan_systemd_system_services() -> List[Dict]:
+    """Scan systemd system units"""
+    return scan_systemd_services('system')
+
+
+def scan_systemd_services(scope: str = 'user') -> List[Dict]:
     """
-    Scan systemd services (basic implementation)
+    Scan systemd service units of a scope
     
+    Directories are read in precedence order, so a unit overridden in
+    /etc is reported once. Only enabled units are reported: those in the
+    *.wants and *.requires symlinks of the same scope (resolved in one
+    pass) and alias symlinks outside the vendor directories. Disabled,
+    static and masked units never start on their own.
+    
+    Args:
+        scope: 'user' or 'system'
+        
     Returns:
         List of systemd service items
     """
     startup_items = []
+    systemd_dirs = SYSTEMD_UNIT_DIRS[scope]()
+    enabled_units = get_enabled_systemd_units(systemd_dirs)
+    seen = set()
     
-    systemd_dirs = [
-        os.path.expanduser("~/.config/systemd/user"),
-        "/etc/systemd/user",
-        "/usr/lib/systemd/user"
-    ]
+    for directory in systemd_dirs:
+        for filename in list_startup_directory(directory, '.service'):
+            if filename in seen:
+                continue
+            seen.add(filename)
+            
+            filepath = os.path.join(directory, filename)
+            if os.path.realpath(filepath) == os.devnull:
+                continue
+            # Symlinks in /etc and ~/.config are aliases created by `systemctl enable`;
+            # vendor directories ship aliases for units that may be disabled
+            alias = os.path.islink(filepath) and not directory.startswith(SYSTEMD_VENDOR_DIRS)
+            if _unit_key(filename) not in enabled_units and not alias:
+                continue
+            
+            startup_items.extend(_get_cached_items(filepath, lambda path: [build_unit_item(path, directory)]))
+    
+    return startup_items
+
+
+def build_unit_item(filepath: str, directory: str) -> Dict:
+    """
+    Build a startup item from a systemd unit file
+    
+    Args:
+        filepath: Path to the unit file
+        directory: Unit directory containing it
+        
+    Returns:
+        Startup item dictionary ('command' holds the first ExecStart)
+    """
+    filename = os.path.basename(filepath)
+    command = next(
+        (line.split('=', 1)[1].strip() for line in _read_lines(filepath) if line.startswith('ExecStart=')),
+        None
+    )
+    
+    return {
+        'name': filename,
+        'path': filepath,
+        'location': directory,
+        'enabled': True,
+        'publisher': None,
+        'command': command,
+        'risk_level': analyze_startup_risk(filename, command or filepath)
+    }
+
+
+def get_enabled_systemd_units(systemd_dirs: List[str]) -> Set[str]:
+    """
+    Collect the names of units wanted/required by any target
+    
+    Args:
+        systemd_dirs: Unit directories to search for *.wants/*.requires
+        
+    Returns:
+        Set of enabled unit names (template instances also add the template)
+    """
+    enabled = set()
     
     for directory in systemd_dirs:
-        if os.path.exists(directory):
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        
+        for entry in entries:
+            if not entry.name.endswith(('.wants', '.requires')) or not entry.is_dir():
+                continue
             try:
-                for filename in os.listdir(directory):
-                    if filename.endswith('.service'):
-                        filepath = os.path.join(directory, filename)
-                        risk_level = analyze_startup_risk(filename, filepath)
-                        
-                        startup_items.append({
-                            'name': filename,
-                            'path': filepath,
-                            'location': directory,
-                            'enabled': True,  # Simplified
-                            'publisher': None,
-                            'risk_level': risk_level
-                        })
-            except Exception:
+                enabled.update(_unit_key(unit) for unit in os.listdir(entry.path))
+            except OSError:
                 continue
     
+    return enabled
+
+
+def _unit_key(unit: str) -> str:
+    """Map template instances (getty@tty1.service) to their template"""
+    if '@' in unit:
+        prefix, rest = unit.split('@', 1)
+        return f"{prefix}@.{rest.rsplit('.', 1)[-1]}"
+    return unit
+
+
+@startup_collector('cron')
+def scan_cron_jobs() -> List[Dict]:
+    """
+    Scan system and user crontabs and the cron.* script directories
+    
+    Returns:
+        List of cron job items
+    """
+    startup_items = []
+    
+    # System crontabs include a user column
+    system_crontabs = ['/etc/crontab'] + [
+        os.path.join('/etc/cron.d', f) for f in list_startup_directory('/etc/cron.d', '')
+    ]
+    for filepath in system_crontabs:
+        startup_items.extend(_get_cached_items(filepath, lambda path: parse_crontab(path, True)))
+    
+    for directory in ('/var/spool/cron/crontabs', '/var/spool/cron'):
+        for filename in list_startup_directory(directory, ''):
+            filepath = os.path.join(directory, filename)
+            startup_items.extend(_get_cached_items(filepath, lambda path: parse_crontab(path, False)))
+    
+    for period in ('hourly', 'daily', 'weekly', 'monthly'):
+        directory = f'/etc/cron.{period}'
+        for filename in list_startup_directory(directory, ''):
+            filepath = os.path.join(directory, filename)
+            startup_items.extend(
+                _get_cached_items(filepath, lambda path: [_file_item(path, schedule=f'@{period}')])
+            )
+    
     return startup_items
 
 
-def parse_desktop_file(filepath: str) -> str:
+def parse_crontab(filepath: str, system: bool) -> List[Dict]:
     """
-    Parse a .desktop file to extract the Exec line
+    Parse a crontab file into one item per job
+    
+    Args:
+        filepath: Path to the crontab
+        system: True for /etc/crontab style files with a user column
+        
+    Returns:
+        List of cron job items
+    """
+    items = []
+    name = os.path.basename(filepath)
+    
+    for line in _read_lines(filepath):
+        if CRON_ENV_PATTERN.match(line):
+            continue
+        
+        fields = 1 if line.startswith('@') else 5
+        if system:
+            fields += 1
+        parts = line.split(None, fields)
+        if len(parts) <= fields:
+            continue
+        
+        command = parts[fields]
+        items.append({
+            'name': name,
+            'path': command,
+            'location': filepath,
+            'enabled': True,
+            'publisher': None,
+            'schedule': ' '.join(parts[:1 if line.startswith('@') else 5]),
+            'user': parts[fields - 1] if system else name,
+            'risk_level': analyze_startup_risk(name, command)
+        })
+    
+    return items
+
+
+@startup_collector('rc_local')
+def scan_rc_local() -> List[Dict]:
+    """
+    Scan commands in /etc/rc.local
+    
+    Returns:
+        List of rc.local command items
+    """
+    def build(path: str) -> List[Dict]:
+        enabled = os.access(path, os.X_OK)
+        return [
+            {
+                'name': 'rc.local',
+                'path': line,
+                'location': path,
+                'enabled': enabled,
+                'publisher': None,
+                'risk_level': analyze_startup_risk('rc.local', line)
+            }
+            for line in _read_lines(path)
+            if line != 'exit 0'
+        ]
+    
+    return _get_cached_items('/etc/rc.local', build)
+
+
+@startup_collector('shell_profiles')
+def scan_shell_profiles() -> List[Dict]:
+    """
+    Scan login/interactive shell startup files
+    
+    Returns:
+        List of shell profile items (one per existing file)
+    """
+    startup_items = []
+    
+    profile_files = [
+        '/etc/profile',
+        '/etc/bash.bashrc',
+        '/etc/zsh/zshrc',
+    ] + [os.path.expanduser(f) for f in ('~/.profile', '~/.bash_profile', '~/.bash_login', '~/.bashrc', '~/.zshrc')]
+    profile_files += [
+        os.path.join('/etc/profile.d', f) for f in list_startup_directory('/etc/profile.d', '.sh')
+    ]
+    
+    for filepath in profile_files:
+        startup_items.extend(_get_cached_items(filepath, lambda path: [_file_item(path)]))
+    
+    return startup_items
+
+
+@startup_collector('ld_preload')
+def scan_ld_preload() -> List[Dict]:
+    """
+    Scan libraries forced into every process by /etc/ld.so.preload
+    
+    Returns:
+        List of preloaded library items (always at least medium risk)
+    """
+    def build(path: str) -> List[Dict]:
+        items = []
+        for library in _read_lines(path):
+            risk_level = analyze_startup_risk(os.path.basename(library), library)
+            items.append({
+                'name': os.path.basename(library),
+                'path': library,
+                'location': path,
+                'enabled': True,
+                'publisher': None,
+                # Preloading is a classic userland rootkit technique
+                'risk_level': 'high' if risk_level == 'high' else 'medium'
+            })
+        return items
+    
+    return _get_cached_items('/etc/ld.so.preload', build)
+
+
+@startup_collector('udev_rules')
+def scan_udev_rules() -> List[Dict]:
+    """
+    Scan local udev rules for RUN commands
+    
+    Returns:
+        List of udev RUN command items
+    """
+    startup_items = []
+    directory = '/etc/udev/rules.d'
+    
+    def build(path: str) -> List[Dict]:
+        name = os.path.basename(path)
+        return [
+            {
+                'name': name,
+                'path': command,
+                'location': path,
+                'enabled': True,
+                'publisher': None,
+                'risk_level': analyze_startup_risk(name, command)
+            }
+            for line in _read_lines(path)
+            for command in UDEV_RUN_PATTERN.findall(line)
+        ]
+    
+    for filename in list_startup_directory(directory, '.rules'):
+        startup_items.extend(_get_cached_items(os.path.join(directory, filename), build))
+    
+    return startup_items
+
+
+def _file_item(filepath: str, **extra) -> Dict:
+    """Startup item describing a whole file (profile, cron script...)"""
+    name = os.path.basename(filepath)
+    return {
+        'name': name,
+        'path': filepath,
+        'location': os.path.dirname(filepath),
+        'enabled': True,
+        'publisher': None,
+        **extra,
+        'risk_level': analyze_startup_risk(name, filepath)
+    }
+
+
+def _read_lines(filepath: str) -> List[str]:
+    """Non-empty, non-comment stripped lines of a text file"""
+    try:
+        with open(filepath, 'r', encoding='utf-8', errors='replace') as f:
+            return [
+                line.strip() for line in f
+                if line.strip() and not line.lstrip().startswith('#')
+            ]
+    except OSError:
+        return []
+
+
+def list_startup_directory(directory: str, suffix: str) -> List[str]:
+    """
+    List files with a suffix in a startup directory, reusing the previous
+    listing while the directory mtime is unchanged
+    
+    Args:
+        directory: Directory to list
+        suffix: File suffix to keep (e.g. '.desktop', '' for all files)
+        
+    Returns:
+        Sorted matching filenames (empty if the directory is unreadable)
+    """
+    try:
+        mtime_ns = os.stat(directory).st_mtime_ns
+    except OSError:
+        return []
+    
+    key = (directory, suffix)
+    cached = _dir_cache.get(key)
+    if cached and cached[0] == mtime_ns:
+        return cached[1]
+    
+    try:
+        filenames = sorted(
+            f for f in os.listdir(directory)
+            if f.endswith(suffix) and not f.startswith('.')
+        )
+    except OSError:
+        return []
+    
+    # Forget cached items for files that disappeared from the directory
+    if cached:
+        for removed in set(cached[1]) - set(filenames):
+            _item_cache.pop(os.path.join(directory, removed), None)
+    
+    _dir_cache[key] = (mtime_ns, filenames)
+    return filenames
+
+
+def _get_cached_items(filepath: str, build: Callable[[str], List[Dict]]) -> List[Dict]:
+    """
+    Return the startup items backed by a file, rebuilding them only when
+    the file's (mtime_ns, size, inode) signature changed
+    
+    Args:
+        filepath: File backing the startup items
+        build: Callable creating the items from the file path
+        
+    Returns:
+        Copies of the startup items (empty if the file is gone)
+    """
+    try:
+        st = os.stat(filepath)
+    except OSError:
+        _item_cache.pop(filepath, None)
+        return []
+    
+    signature = (st.st_mtime_ns, st.st_size, st.st_ino)
+    cached = _item_cache.get(filepath)
+    if not cached or cached[0] != signature:
+        cached = (signature, build(filepath))
+        _item_cache[filepath] = cached
+    
+    return [dict(item) for item in cached[1]]
+
+
+def clear_startup_cache():
+    """Forget cached directory listings and items (forces a full rescan)"""
+    _dir_cache.clear()
+    _item_cache.clear()
+
+
+def build_desktop_item(filepath: str, directory: str) -> Dict:
+    """
+    Build a startup item from an XDG autostart .desktop file
     
     Args:
         filepath: Path to .desktop file
+        directory: Autostart directory containing it
         
     Returns:
-        Exec command or empty string
+        Startup item dictionary
+    """
+    filename = os.path.basename(filepath)
+    entry = parse_desktop_entry(filepath)
+    exec_line = entry['exec']
+    
+    return {
+        'name': filename.replace('.desktop', ''),
+        'path': exec_line or filepath,
+        'location': directory,
+        'enabled': not entry['hidden'],
+        'publisher': None,
+        'risk_level': analyze_startup_risk(filename, exec_line)
+    }
+
+
+def parse_desktop_entry(filepath: str) -> Dict:
+    """
+    Read a .desktop file once, extracting the Exec line and Hidden flag
+    
+    Args:
+        filepath: Path to .desktop file
+        
+    Returns:
+        Dictionary with 'exec' (command or empty string) and 'hidden'
     """
+    entry = {'exec': "", 'hidden': False}
+    
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
             for line in f:
-                if line.startswith('Exec='):
-                    return line.split('=', 1)[1].strip()
+                if not entry['exec'] and line.startswith('Exec='):
+                    entry['exec'] = line.split('=', 1)[1].strip()
+                elif line.strip().lower() == 'hidden=true':
+                    entry['hidden'] = True
     except Exception:
         pass
-    return ""
+    
+    return entry
+
+
+def parse_desktop_file(filepath: str) -> str:
+    """
+    Parse a .desktop file to extract the Exec line
+    
+    Args:
+        filepath: Path to .desktop file
+        
+    Returns:
+        Exec command or empty string
+    """
+    return parse_desktop_entry(filepath)['exec']
 
 
 def is_desktop_file_enabled(filepath: str) -> bool:
@@ -245,14 +817,7 @@ def is_desktop_file_enabled(filepath: str) -> bool:
     Returns:
         True if enabled, False otherwise
     """
-    try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            for line in f:
-                if line.strip().lower() == 'hidden=true':
-                    return False
-    except Exception:
-        pass
-    return True
+    return not parse_desktop_entry(filepath)['hidden']
 
 
 def analyze_startup_risk(name: str, path: str) -> str:
@@ -272,7 +837,7 @@ def analyze_startup_risk(name: str, path: str) -> str:
     # High-risk keywords
     high_risk_keywords = [
         'miner', 'crypto', 'unknown', 'suspicious',
-        'temp', 'tmp', 'backdoor', 'trojan'
+        'backdoor', 'trojan'
     ]
     
     # Check for high-risk indicators
@@ -282,9 +847,10 @@ def analyze_startup_risk(name: str, path: str) -> str:
     if any(keyword in path_lower for keyword in high_risk_keywords):
         return 'high'
     
-    # Items in temp directories
-    if 'temp' in path_lower or 'tmp' in path_lower:
-        return 'medium'
+    # Items started from temp directories (by segment, so tmpfiles/utmp do not match)
+    normalized = path_lower.replace('\\', '/')
+    if any(directory in normalized for directory in TEMP_DIRECTORIES):
+        return 'high'
     
     # Unknown publisher (Windows only)
     if platform.system() == 'Windows' and not extract_publisher(path):
@@ -0,0 +1,228 @@
+"""
+Worker Pool Module
+Process pool for CPU-heavy scan stages, with shared-memory results and cancellation
+
+Work is split into chunks sent to worker processes, so hashing does not
+hold the API process's GIL. Each job gets one shared memory block: byte 0
+is a cancel flag the workers check between items, and the rest holds one
+fixed-size record per item that the workers fill in place. Only the
+chunk's inputs and rare error messages are pickled.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from multiprocessing import get_context, shared_memory
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .governor import governor
+from .instrumentation import STAGE_ERRORS
+
+
+# SCAN_WORKERS=0 keeps all work in the API process (the default)
+WORKERS = int(os.environ.get('SCAN_WORKERS', 0))
+CHUNK_SIZE = int(os.environ.get('SCAN_WORKER_CHUNK', 256))
+MIN_ITEMS = int(os.environ.get('SCAN_WORKER_MIN_ITEMS', 512))
+
+# Bytes before the first record; byte 0 is the cancel flag
+HEADER_SIZE = 8
+
+
+class ScanCancelled(Exception):
+    """The scan was cancelled before it finished"""
+
+    def __init__(self, message: str = "Scan cancelled", partial: Optional[Tuple[bytes, Dict[int, Any]]] = None):
+        super().__init__(message)
+        # WorkerPool.run: (records, extras) of the chunks that did finish
+        self.partial = partial
+
+
+def _init_worker(hash_bytes_per_sec: float):
+    """Give each worker its share of the parent's hashing budget"""
+    governor.set_hash_rate(hash_bytes_per_sec)
+
+
+@contextmanager
+def attach_results(name: str) -> Iterator[memoryview]:
+    """
+    Open a job's shared memory block from a worker
+
+    Yields:
+        The block's buffer (records start at HEADER_SIZE)
+    """
+    # Spawned workers share the parent's resource tracker, and the
+    # parent unlinks the block, so attaching needs no extra bookkeeping
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        yield block.buf
+    finally:
+        block.close()
+
+
+def is_cancelled(buf: memoryview) -> bool:
+    """True once the parent has cancelled the job"""
+    return buf[0] != 0
+
+
+class WorkerPool:
+    """
+    Lazily started ProcessPoolExecutor shared by every scan
+
+    Workers are spawned (not forked) so they never inherit the server's
+    threads or locks, and are reused across scans.
+    """
+
+    def __init__(self, workers: int = 0, chunk_size: int = 256, min_items: int = 512):
+        """
+        Args:
+            workers: Worker processes (0 disables the pool)
+            chunk_size: Items per work unit
+            min_items: Smaller jobs run in the calling process
+        """
+        self.workers = max(workers, 0)
+        self.chunk_size = max(chunk_size, 1)
+        self.min_items = min_items
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        # Jobs that lost a worker (callers then fall back to in-process work)
+        self.failures = 0
+        self.last_error: Optional[Dict] = None
+
+    @classmethod
+    def from_env(cls) -> 'WorkerPool':
+        """Build a pool configured from SCAN_WORKER* environment variables"""
+        return cls(workers=WORKERS, chunk_size=CHUNK_SIZE, min_items=MIN_ITEMS)
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    def status(self) -> Dict:
+        """Pool configuration and worker failures"""
+        return {
+            'enabled': self.enabled,
+            'workers': self.workers,
+            'running': self._executor is not None,
+            'failures': self.failures,
+            'last_error': self.last_error
+        }
+
+    def should_dispatch(self, count: int) -> bool:
+        """True if a job of `count` items is worth sending to the workers"""
+        return self.enabled and count >= self.min_items
+
+    def run(
+        self,
+        func: Callable[[str, int, List[Any]], Dict[int, Any]],
+        items: Sequence[Any],
+        record_size: int,
+        cancel: Optional[threading.Event] = None
+    ) -> Tuple[bytes, Dict[int, Any]]:
+        """
+        Process items in chunks across the workers
+
+        func(block_name, start, chunk) runs in a worker. It writes the
+        record of item i at HEADER_SIZE + i * record_size and returns a
+        dict of {item index: extra value} for anything that does not fit
+        a record (e.g. error messages). Records of items never processed
+        stay zeroed.
+
+        Args:
+            func: Module-level function (must be picklable)
+            items: Work items (picklable)
+            record_size: Bytes per result record
+            cancel: Set to stop; running chunks stop at their next item
+
+        Returns:
+            (records as bytes, merged extras)
+
+        Raises:
+            ScanCancelled: If cancel was set before all chunks finished;
+                its `partial` holds the records and extras computed so far
+            BrokenProcessPool: If a worker died (the pool is restarted next time)
+        """
+        # New blocks are zero-filled: no cancel flag, every record pending
+        block = shared_memory.SharedMemory(create=True, size=HEADER_SIZE + max(len(items), 1) * record_size)
+        size = len(items) * record_size
+        try:
+            extras = self._dispatch(func, block, items, cancel)
+            return bytes(block.buf[HEADER_SIZE:HEADER_SIZE + size]), extras
+        except ScanCancelled as e:
+            e.partial = (bytes(block.buf[HEADER_SIZE:HEADER_SIZE + size]), e.partial or {})
+            raise
+        finally:
+            block.close()
+            block.unlink()
+
+    def _dispatch(self, func, block, items, cancel) -> Dict[int, Any]:
+        executor = self._get_executor()
+        chunks = iter(range(0, len(items), self.chunk_size))
+        extras: Dict[int, Any] = {}
+        pending = set()
+
+        def submit_next() -> bool:
+            start = next(chunks, None)
+            if start is None:
+                return False
+            pending.add(executor.submit(func, block.name, start, list(items[start:start + self.chunk_size])))
+            return True
+
+        # Bounded in-flight work so a cancel does not leave a long queue behind
+        for _ in range(self.workers * 2):
+            if not submit_next():
+                break
+
+        try:
+            while pending:
+                if cancel is not None and cancel.is_set():
+                    block.buf[0] = 1
+                    for future in pending:
+                        future.cancel()
+                    wait(pending)
+                    for future in pending:
+                        if not future.cancelled() and future.exception() is None:
+                            extras.update(future.result())
+                    raise ScanCancelled("Scan cancelled", partial=extras)
+                done, _ = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.discard(future)
+                    extras.update(future.result())
+                    submit_next()
+        except BrokenProcessPool as e:
+            self.failures += 1
+            self.last_error = {'failed_at': int(time.time()), 'error': str(e) or type(e).__name__}
+            STAGE_ERRORS.inc('workers.pool')
+            self._reset()
+            raise
+        return extras
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(governor.hash_bytes_per_sec / self.workers,)
+                )
+            return self._executor
+
+    def _reset(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def shutdown(self):
+        """Stop the worker processes (they are restarted on the next job)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+# Shared by all scanners
+worker_pool = WorkerPool.from_env()
@@ -0,0 +1,74 @@
+"""
+Tests for baseline comparison by composite identity
+"""
+
+import pytest
+
+from security.baseline import BaselineManager
+
+
+def process(pid: int, username: str = 'root', cmdline: str = 'nginx: worker', risk_level: str = 'safe'):
+    return {
+        'pid': pid, 'name': 'nginx', 'exe': '/usr/sbin/nginx', 'username': username,
+        'cmdline': cmdline, 'risk_level': risk_level,
+    }
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return BaselineManager(db_path=str(tmp_path / 'baselines.db'))
+
+
+def test_owner_change_is_reported_as_modified(manager):
+    diff = manager._compare_lists([process(100, username='www-data')], [process(100, username='root')], 'processes')
+
+    assert diff['added'] == [] and diff['removed'] == []
+    assert len(diff['modified']) == 1
+    assert diff['modified'][0]['changed_fields'] == ['username']
+    assert diff['modified'][0]['before']['username'] == 'www-data'
+    assert diff['modified'][0]['after']['username'] == 'root'
+
+
+def test_same_identity_instances_pair_by_pid(manager):
+    baseline = [process(10, cmdline='nginx: master'), process(11, cmdline='nginx: worker'),
+                process(12, cmdline='nginx: worker')]
+    current = [process(12, cmdline='nginx: worker -q'), process(10, cmdline='nginx: master -q'),
+               process(11, cmdline='nginx: worker')]
+
+    diff = manager._compare_lists(baseline, current, 'processes')
+
+    assert diff['unchanged'] == 1
+    pairs = sorted((m['before']['pid'], m['after']['pid']) for m in diff['modified'])
+    assert pairs == [(10, 10), (12, 12)]
+    assert all(m['changed_fields'] == ['cmdline'] for m in diff['modified'])
+
+
+def test_leftover_pairing_does_not_depend_on_scan_order(manager):
+    # New PIDs on every side, so pairing falls back to fingerprint order
+    baseline = [process(1, cmdline='a'), process(2, cmdline='b'), process(3, cmdline='c')]
+    current = [process(4, cmdline='d'), process(5, cmdline='e')]
+
+    def pairs(diff):
+        return [(m['before']['pid'], m['after']['pid']) for m in diff['modified']]
+
+    expected = manager._compare_lists(baseline, current, 'processes')
+    reordered = manager._compare_lists(baseline[::-1], current[::-1], 'processes')
+
+    assert pairs(reordered) == pairs(expected)
+    assert reordered['removed'] == expected['removed']
+    assert len(expected['modified']) == 2 and len(expected['removed']) == 1
+
+
+def test_comparison_history_rejects_invalid_timestamps(manager):
+    with pytest.raises(ValueError):
+        manager.get_comparison_history(1, start='last tuesday')
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('2026-10-01', '2026-10-01 00:00:00'),
+    ('2026-10-01T12:30:00', '2026-10-01 12:30:00'),
+    ('2026-10-01T14:30:00+02:00', '2026-10-01 12:30:00'),
+    ('2026-10-01T12:30:00Z', '2026-10-01 12:30:00'),
+])
+def test_comparison_history_timestamps_are_utc(value, expected):
+    assert BaselineManager._parse_timestamp(value, 'from') == expected
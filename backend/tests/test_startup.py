@@ -0,0 +1,93 @@
+"""
+Tests for the systemd startup collector and startup risk analysis
+"""
+
+import os
+
+import pytest
+
+from security import startup
+from security.startup import analyze_startup_risk, scan_systemd_services
+
+
+# Stock Debian units whose names contain 'tmp'
+STOCK_UNITS = {
+    'systemd-tmpfiles-setup.service': 'systemd-tmpfiles --create --remove --boot --exclude-prefix=/dev',
+    'systemd-tmpfiles-setup-dev.service': 'systemd-tmpfiles --prefix=/dev --create --boot',
+    'systemd-tmpfiles-clean.service': 'systemd-tmpfiles --clean',
+    'systemd-update-utmp.service': '/lib/systemd/systemd-update-utmp reboot',
+    'systemd-update-utmp-runlevel.service': '/lib/systemd/systemd-update-utmp runlevel',
+}
+
+
+def write_unit(directory, name: str, command: str):
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, name), 'w') as f:
+        f.write(f"[Unit]\nDescription={name}\n\n[Service]\nExecStart={command}\n")
+
+
+def enable_unit(unit_dir, target: str, name: str):
+    wants = os.path.join(unit_dir, f"{target}.wants")
+    os.makedirs(wants, exist_ok=True)
+    os.symlink(os.path.join(unit_dir, name), os.path.join(wants, name))
+
+
+@pytest.fixture
+def unit_dirs(tmp_path, monkeypatch):
+    etc = str(tmp_path / 'etc')
+    vendor = str(tmp_path / 'lib')
+    os.makedirs(etc)
+    monkeypatch.setitem(startup.SYSTEMD_UNIT_DIRS, 'system', lambda: [etc, vendor])
+    monkeypatch.setattr(startup, 'SYSTEMD_VENDOR_DIRS', (vendor,))
+    return etc, vendor
+
+
+def test_stock_units_are_low_risk(unit_dirs):
+    _, vendor = unit_dirs
+    for name, command in STOCK_UNITS.items():
+        write_unit(vendor, name, command)
+        enable_unit(vendor, 'sysinit.target', name)
+
+    items = scan_systemd_services('system')
+
+    assert sorted(item['name'] for item in items) == sorted(STOCK_UNITS)
+    assert all(item['risk_level'] in ('safe', 'low') for item in items)
+
+
+def test_disabled_and_masked_units_are_skipped(unit_dirs):
+    etc, vendor = unit_dirs
+    write_unit(vendor, 'enabled.service', '/usr/bin/enabled')
+    write_unit(vendor, 'disabled.service', '/usr/bin/disabled')
+    write_unit(vendor, 'masked.service', '/usr/bin/masked')
+    enable_unit(vendor, 'multi-user.target', 'enabled.service')
+    enable_unit(vendor, 'multi-user.target', 'masked.service')
+    os.symlink(os.devnull, os.path.join(etc, 'masked.service'))
+    # Vendor aliases do not enable anything
+    os.symlink(os.path.join(vendor, 'disabled.service'), os.path.join(vendor, 'alias.service'))
+
+    items = scan_systemd_services('system')
+
+    assert [item['name'] for item in items] == ['enabled.service']
+
+
+def test_unit_started_from_temp_directory_is_high_risk(unit_dirs):
+    etc, _ = unit_dirs
+    write_unit(etc, 'updater.service', '/dev/shm/.x/updater --daemon')
+    enable_unit(etc, 'multi-user.target', 'updater.service')
+
+    items = scan_systemd_services('system')
+
+    assert [item['risk_level'] for item in items] == ['high']
+
+
+@pytest.mark.parametrize('path, expected', [
+    ('/tmp/payload', 'high'),
+    ('/var/tmp/.cache/run.sh', 'high'),
+    ('C:\\Users\\me\\AppData\\Local\\Temp\\setup.exe', 'high'),
+    ('/usr/bin/systemd-tmpfiles --clean', 'safe'),
+    ('/lib/systemd/systemd-update-utmp reboot', 'safe'),
+    ('/usr/lib/tmpfiles.d/extra.conf', 'safe'),
+])
+def test_temp_directories_match_by_segment(monkeypatch, path, expected):
+    monkeypatch.setattr(startup.platform, 'system', lambda: 'Linux')
+    assert analyze_startup_risk('item', path) == expected
@@ -1,5 +1,5 @@
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
-import { Baseline, BaselineSummary, BaselineComparison } from '@/types/baseline';
+import { Baseline, BaselineSummary, BaselineComparison, ComparisonHistory } from '@/types/baseline';
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
 
@@ -27,7 +27,8 @@ export function useActiveBaseline() {
   return useQuery<{ exists: boolean; baseline?: Baseline; message?: string }>({
     queryKey: ['activeBaseline'],
     queryFn: async () => {
-      const response = await fetch(`${API_BASE_URL}/api/baseline/active`);
+      // Metadata only: the page never renders the stored items
+      const response = await fetch(`${API_BASE_URL}/api/baseline/active?sections=`);
       if (!response.ok) throw new Error('Failed to fetch active baseline');
       return response.json();
     },
@@ -113,3 +114,27 @@ export function useCompareWithBaseline() {
     },
   });
 }
+
+export function useComparisonHistory(
+  baselineId: number | null,
+  options: { from?: string; to?: string; limit?: number; offset?: number } = {}
+) {
+  return useQuery<ComparisonHistory>({
+    queryKey: ['comparisonHistory', baselineId, options],
+    queryFn: async () => {
+      const params = new URLSearchParams();
+      if (options.from) params.set('from', options.from);
+      if (options.to) params.set('to', options.to);
+      if (options.limit) params.set('limit', String(options.limit));
+      if (options.offset) params.set('offset', String(options.offset));
+      
+      const response = await fetch(
+        `${API_BASE_URL}/api/baseline/${baselineId}/comparisons?${params.toString()}`
+      );
+      if (!response.ok) throw new Error('Failed to fetch comparison history');
+      return response.json();
+    },
+    enabled: !!baselineId,
+    staleTime: 30000,
+  });
+}
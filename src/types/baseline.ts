@@ -20,6 +20,7 @@ export interface Baseline {
   ports?: NetworkPort[];
   startup_items?: StartupItem[];
   file_integrity?: FileIntegrityCheck[];
+  pagination?: Record<string, { total: number; limit: number | null; offset: number }>;
 }
 
 export interface BaselineSummary {
@@ -31,20 +32,29 @@ export interface BaselineSummary {
   metrics: BaselineMetrics;
 }
 
+export interface ModifiedItem<T> {
+  before: T;
+  after: T;
+  changed_fields: string[];
+}
+
 export interface ComparisonDifferences {
   processes: {
     added: SecurityProcess[];
     removed: SecurityProcess[];
+    modified: ModifiedItem<SecurityProcess>[];
     unchanged: number;
   };
   ports: {
     added: NetworkPort[];
     removed: NetworkPort[];
+    modified: ModifiedItem<NetworkPort>[];
     unchanged: number;
   };
   startup_items: {
     added: StartupItem[];
     removed: StartupItem[];
+    modified: ModifiedItem<StartupItem>[];
     unchanged: number;
   };
   summary: {
@@ -54,6 +64,9 @@ export interface ComparisonDifferences {
     closed_ports: number;
     new_startup: number;
     removed_startup: number;
+    modified_processes: number;
+    modified_ports: number;
+    modified_startup: number;
     risk_score: number;
     risk_level: 'safe' | 'low' | 'medium' | 'high';
   };
@@ -68,3 +81,19 @@ export interface BaselineComparison {
   compared_at: string;
   differences: ComparisonDifferences;
 }
+
+export interface ComparisonHistoryEntry {
+  id: number;
+  baseline_id: number;
+  compared_at: string;
+  risk_score: number;
+  summary: ComparisonDifferences['summary'];
+  differences?: ComparisonDifferences | null;
+}
+
+export interface ComparisonHistory {
+  comparisons: ComparisonHistoryEntry[];
+  total: number;
+  limit: number;
+  offset: number;
+}
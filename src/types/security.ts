@@ -7,9 +7,24 @@ export interface SecurityProcess {
   username: string;
   cmdline: string[];
   create_time: number;
+  exe?: string | null;
+  exe_hash?: string | null;
+  reputation?: 'known_good' | 'known_bad' | 'unknown' | null;
+  ppid?: number | null;
+  lineage_alerts?: LineageFinding[];
   risk_level: 'safe' | 'low' | 'medium' | 'high';
 }
 
+export interface LineageFinding {
+  rule: string;
+  severity: 'safe' | 'low' | 'medium' | 'high';
+  title: string;
+  pid: number;
+  name: string;
+  ancestor_pid: number;
+  ancestor_name: string;
+}
+
 export interface NetworkPort {
   local_address: string;
   local_port: number;
@@ -28,6 +43,10 @@ export interface StartupItem {
   location: string;
   enabled: boolean;
   publisher?: string;
+  source?: string;
+  command?: string | null;
+  executable?: string | null;
+  executable_hash?: string | null;
   risk_level: 'safe' | 'low' | 'medium' | 'high';
 }
 
@@ -79,4 +98,31 @@ export interface ScanResults {
 }
 
 export type RiskLevel = 'safe' | 'low' | 'medium' | 'high';
-export type ScanType = 'quick' | 'full' | 'custom';
\ No newline at end of file
+export type ScanType = 'quick' | 'full' | 'custom';
+
+export interface MetricPoint {
+  timestamp: number;
+  // Present on downsampled points read from storage
+  samples?: number;
+  [metric: string]: number | undefined;
+}
+
+export interface MetricsHistory {
+  key: string;
+  kind: 'host' | 'process' | 'port' | null;
+  label: string | null;
+  metrics: string[];
+  points: MetricPoint[];
+}
+
+export interface AnomalyFinding {
+  kind: 'host' | 'process';
+  // Process name, or 'host'
+  key: string;
+  metric: string;
+  value: number;
+  mean: number;
+  p95: number;
+  z_score: number;
+  severity: 'medium' | 'high';
+}